@@ -0,0 +1 @@
+"""Performance benchmarks for the extractors (not part of the shipped packages)."""
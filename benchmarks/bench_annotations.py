@@ -0,0 +1,96 @@
+"""Micro-benchmark: annotation extraction in tool_extractor._render_signature.
+
+Generates a heavily annotated module of about 20k lines and times signature
+rendering with the per-file line-offset index (_SourceIndex) against the
+previous approach that called ``ast.get_source_segment`` per annotation.
+
+The old approach is quadratic, so by default it is timed on a sample of the
+functions and its per-annotation cost is extrapolated to the whole module.
+
+Usage:
+    python -m benchmarks.bench_annotations [--lines 20000] [--baseline-sample 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import time
+from typing import List, Optional
+
+from tool_extractor.extractor import _SourceIndex, _render_signature
+
+
+def generate_annotated_module(lines: int) -> str:
+    """Return source for a module of roughly ``lines`` lines of annotated defs."""
+    chunks: List[str] = ["from typing import Any, Dict, List, Optional, Tuple\n\n"]
+    i = 0
+    total = 2
+    while total < lines:
+        chunks.append(
+            f"def func_{i}(a: int, b: Dict[str, List[Tuple[int, float]]], /,\n"
+            f"            c: Optional['Thing'] = None, *args: Any,\n"
+            f"            d: \"List[Dict[str, Any]]\" = [], **kw: float) -> Dict[\n"
+            f"        str, Optional[int]]:\n"
+            f"    \"\"\"Generated function {i}.\"\"\"\n"
+            f"    return {{}}\n\n"
+        )
+        total += 7
+        i += 1
+    return "".join(chunks)
+
+
+def _render_all(fns: List[ast.AST], index: _SourceIndex) -> List[str]:
+    return [_render_signature(fn, index) for fn in fns]
+
+
+def _render_all_legacy(fns: List[ast.AST], source: str) -> List[str]:
+    class _Legacy:
+        """The pre-index behavior: ast.get_source_segment for every annotation."""
+
+        def segment(self, node: ast.AST) -> Optional[str]:
+            return ast.get_source_segment(source, node)
+
+    return [_render_signature(fn, _Legacy()) for fn in fns]  # type: ignore[arg-type]
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=20000, help="Approximate module size in lines")
+    parser.add_argument(
+        "--baseline-sample",
+        type=int,
+        default=200,
+        help="Functions timed with the legacy approach (0 = all; slow)",
+    )
+    args = parser.parse_args(argv)
+
+    source = generate_annotated_module(args.lines)
+    module = ast.parse(source)
+    fns = [n for n in module.body if isinstance(n, ast.FunctionDef)]
+    n_lines = source.count("\n")
+
+    t0 = time.perf_counter()
+    index = _SourceIndex(source)
+    fast = _render_all(fns, index)
+    t_fast = time.perf_counter() - t0
+
+    sample = fns if args.baseline_sample <= 0 else fns[: args.baseline_sample]
+    t0 = time.perf_counter()
+    legacy = _render_all_legacy(sample, source)
+    t_legacy_sample = time.perf_counter() - t0
+    t_legacy = t_legacy_sample * len(fns) / max(1, len(sample))
+
+    if legacy != fast[: len(sample)]:
+        print("MISMATCH between indexed and legacy signature rendering")
+        return 1
+    extrapolated = "" if len(sample) == len(fns) else f" (extrapolated from {len(sample)} functions)"
+    print(f"Module: {n_lines} lines, {len(fns)} functions")
+    print(f"Indexed slicing:     {t_fast:8.3f}s")
+    print(f"get_source_segment:  {t_legacy:8.3f}s{extrapolated}")
+    print(f"Speedup:             {t_legacy / t_fast:8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
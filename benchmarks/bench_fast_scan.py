@@ -0,0 +1,199 @@
+"""Benchmark: Pass 1 with the top-level scanner (--fast) against full ASTs.
+
+Generates a repository shaped like real-world code (packages with
+re-exporting ``__init__`` files, modules mixing classes, long function bodies,
+docstrings, comments and multi-line literals), or uses an existing one, and
+times ``_summarize_file`` over every file with and without ``fast``. Both
+paths must produce identical summaries; files the scanner hands back to a
+full parse are counted as fallbacks.
+
+Usage:
+    python -m benchmarks.bench_fast_scan [--files 2000] [--seed 0] [--repo PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from tool_extractor.extractor import _summarize_file
+from tool_extractor.filesystem import discover_python_files
+from tool_extractor.models import FileSummary
+from tool_extractor.scanner import reduce_source
+
+
+_WORDS = ("load", "parse", "item", "value", "config", "batch", "node", "token", "cache", "frame", "user", "path")
+
+
+def _name(rng: random.Random, parts: int = 2) -> str:
+    return "_".join(rng.choice(_WORDS) for _ in range(parts))
+
+
+def _body(rng: random.Random, indent: str, statements: int) -> List[str]:
+    """Statements of the kind that make up most of a real function body."""
+    lines: List[str] = []
+    for i in range(statements):
+        kind = rng.randrange(6)
+        var = f"{_name(rng, 1)}_{i}"
+        if kind == 0:
+            lines.append(f"{indent}{var} = {{'key': [1, 2, (3, 4)], \"other\": f'{{{var}!r}} # not a comment'}}")
+        elif kind == 1:
+            lines.append(f"{indent}# {_name(rng, 3)}: handle the (unbalanced [ case")
+            lines.append(f"{indent}{var} = compute(")
+            lines.append(f"{indent}    {_name(rng)},")
+            lines.append(f"{indent}    mode='strict',")
+            lines.append(f"{indent})")
+        elif kind == 2:
+            lines.append(f"{indent}for {var} in range(10):")
+            lines.append(f"{indent}    if {var} % 3 == 0:")
+            lines.append(f"{indent}        continue")
+            lines.append(f"{indent}    total += {var}")
+        elif kind == 3:
+            lines.append(f'{indent}{var} = """')
+            lines.append("def not_a_function():")
+            lines.append("    class NotAClass: ...")
+            lines.append(f'{indent}"""')
+        elif kind == 4:
+            lines.append(f"{indent}try:")
+            lines.append(f"{indent}    {var} = helper({_name(rng)}, [x for x in items if x])")
+            lines.append(f"{indent}except (KeyError, ValueError) as exc:")
+            lines.append(f"{indent}    raise RuntimeError('failed: %s' % (exc,)) from exc")
+        else:
+            lines.append(f"{indent}{var} = lambda a, b=2: (a + b) * \\")
+            lines.append(f"{indent}    3")
+    lines.append(f"{indent}return None")
+    return lines
+
+
+def _function(rng: random.Random, indent: str, name: str, decorator: Optional[str] = None) -> List[str]:
+    lines: List[str] = []
+    if decorator:
+        lines.append(f"{indent}@{decorator}")
+    params = ", ".join(f"{_name(rng, 1)}_{k}: int = {k}" for k in range(rng.randrange(4)))
+    self_param = "self, " if indent else ""
+    lines.append(f"{indent}def {name}({self_param}{params}) -> Optional[Dict[str, int]]:")
+    if rng.random() < 0.7:
+        lines.append(f'{indent}    """{name.replace("_", " ").capitalize()}.')
+        lines.append("")
+        lines.append(f"{indent}    Longer description of {name}.")
+        lines.append(f'{indent}    """')
+    lines.extend(_body(rng, indent + "    ", rng.randrange(4, 30)))
+    lines.append("")
+    return lines
+
+
+def _module(rng: random.Random, index: int) -> str:
+    lines = [
+        f'"""Module {index}: {_name(rng, 3)}."""',
+        "from __future__ import annotations",
+        "",
+        "import os",
+        "from typing import Dict, List, Optional",
+        "",
+        "__all__ = [",
+        "    'entry_point',",
+        "]",
+        "",
+        "_TABLE = {",
+        "    'a': 1,",
+        "    'b': [2, 3],",
+        "}",
+        "",
+    ]
+    for k in range(rng.randrange(2, 8)):
+        if rng.random() < 0.4:
+            lines.append(f"class {_name(rng).title().replace('_', '')}{k}(object):")
+            lines.append(f'    """Generated class {k}."""')
+            lines.append("")
+            lines.append(f"    limit = ({k},")
+            lines.append("             10)")
+            lines.append("")
+            lines.extend(_function(rng, "    ", "__init__"))
+            for m in range(rng.randrange(1, 8)):
+                decorator = rng.choice((None, None, "property", "staticmethod", "classmethod"))
+                lines.extend(_function(rng, "    ", f"{_name(rng)}_{m}", decorator))
+        else:
+            lines.extend(_function(rng, "", f"{_name(rng)}_{k}", rng.choice((None, None, "functools.lru_cache()"))))
+        lines.append("")
+    lines.extend(_function(rng, "", "entry_point"))
+    lines.append("if __name__ == '__main__':")
+    lines.append("    entry_point()")
+    return "\n".join(lines) + "\n"
+
+
+def generate_repo(root: Path, files: int, seed: int = 0) -> None:
+    """Write a deterministic package tree of about ``files`` Python files under root."""
+    rng = random.Random(seed)
+    written = 0
+    pkg = 0
+    while written < files:
+        package = root / "src" / f"pkg{pkg}"
+        for sub in range(3):
+            directory = package / f"sub{sub}" if sub else package
+            directory.mkdir(parents=True, exist_ok=True)
+            modules = [f"mod{m}" for m in range(rng.randrange(3, 12))]
+            init = [f"from .{m} import entry_point as {m}_entry" for m in modules]
+            if sub == 0:
+                init.append("from .sub1 import *")
+            (directory / "__init__.py").write_text("\n".join(init) + "\n", encoding="utf-8")
+            written += 1
+            for m in modules:
+                (directory / f"{m}.py").write_text(_module(rng, written), encoding="utf-8")
+                written += 1
+        pkg += 1
+
+
+def _time_pass1(files: List[Path], fast: bool) -> Tuple[float, List[Optional[FileSummary]]]:
+    t0 = time.perf_counter()
+    summaries = [_summarize_file(f, fast) for f in files]
+    return time.perf_counter() - t0, summaries
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000, help="Approximate number of generated files")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the generated repository")
+    parser.add_argument("--repo", default=None, help="Benchmark an existing repository instead")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(args.repo) if args.repo else Path(tmp)
+        if args.repo is None:
+            generate_repo(root, args.files, args.seed)
+        files = list(discover_python_files(root))
+        total_bytes = sum(f.stat().st_size for f in files)
+
+        fallbacks = 0
+        for f in files:
+            try:
+                if reduce_source(f.read_text(encoding="utf-8")) is None:
+                    fallbacks += 1
+            except (OSError, UnicodeDecodeError):
+                pass
+
+        # Full first, so both runs see a warm page cache
+        _time_pass1(files, fast=False)
+        t_full, full = _time_pass1(files, fast=False)
+        t_fast, fast = _time_pass1(files, fast=True)
+
+    mismatches = sum(
+        1 for a, b in zip(full, fast) if (a.to_dict() if a else None) != (b.to_dict() if b else None)
+    )
+    print(f"Repository: {len(files)} files, {total_bytes / 1e6:.1f} MB")
+    print(f"Full AST:    {t_full:8.3f}s  ({len(files) / t_full:8.0f} files/s)")
+    print(f"Fast scan:   {t_fast:8.3f}s  ({len(files) / t_fast:8.0f} files/s)")
+    print(f"Speedup:     {t_full / t_fast:8.2f}x")
+    print(f"Scanner fallbacks to full parse: {fallbacks}")
+    if mismatches:
+        # Expected only for files with syntax errors inside function bodies
+        print(f"Summaries differing from the full parse: {mismatches}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,338 @@
+"""Benchmark: how extract_tools scales with repository size and shape.
+
+Generates synthetic repositories of increasing size (1k and 10k files by
+default, 100k with ``--sizes 1000 10000 100000``) from one RepoShape:
+package nesting depth, annotation density, how many modules each
+``__init__`` re-exports from (explicitly or with ``*``), subpackage aliases
+(``from . import sub as alias``) and ``__all__`` usage. For every size it
+times discovery (discover_python_files), Pass 1 (_summarize_file, split into
+read, parse and render) and Pass 2 (_synthesize_tools) separately, serially,
+keeping the best of ``--repeat`` runs.
+
+Per-file times should stay flat as the repository grows; the growth
+exponent between consecutive sizes (1.0 = linear) points at super-linear
+behavior in re-export resolution or signature rendering. Results are
+written as JSON; ``--compare`` checks them against an earlier run (e.g. from
+the previous commit) and exits with 1 if a phase got slower by more than
+``--threshold``.
+
+Usage:
+    python -m benchmarks.bench_scaling [--sizes 1000 10000] [--depth 3] [--out scaling.json]
+    python -m benchmarks.bench_scaling --compare baseline.json [--threshold 0.2]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from tool_extractor.extractor import _summarize_file
+from tool_extractor.filesystem import discover_python_files
+from tool_extractor.metrics import PhaseClock
+from tool_extractor.models import ExtractionStats, FileSummary
+from tool_extractor.synthesis import _synthesize_tools
+
+
+_WORDS = ("load", "parse", "item", "value", "config", "batch", "node", "token", "cache", "frame", "user", "path")
+
+_ANNOTATIONS = (
+    "int",
+    "str",
+    "Optional[str]",
+    "List[int]",
+    "Dict[str, List[Tuple[int, float]]]",
+    "Callable[..., Awaitable[Optional[int]]]",
+    "'Node'",
+    "Union[int, Sequence[Mapping[str, Any]]]",
+)
+
+# Phases timed per size, in report order
+PHASES = ("discovery", "pass1", "read", "parse", "render", "pass2")
+
+# Changes smaller than this are noise, whatever the ratio
+_MIN_REGRESSION_SECONDS = 0.01
+
+
+@dataclass(frozen=True)
+class RepoShape:
+    """Shape of a generated repository; sizes vary, the shape stays the same.
+
+    - depth: levels of subpackages below each top-level package (two per level)
+    - modules: modules per package besides its ``__init__``
+    - annotation_density: fraction of parameters and returns that are annotated
+    - fanout: modules (and subpackages) each ``__init__`` re-exports from
+    - star_ratio: fraction of those re-exports written as ``from .x import *``
+    - alias_ratio: fraction of packages aliasing a subpackage
+    - all_ratio: fraction of modules and ``__init__`` files defining ``__all__``
+    """
+
+    depth: int = 3
+    modules: int = 8
+    annotation_density: float = 0.5
+    fanout: int = 4
+    star_ratio: float = 0.25
+    alias_ratio: float = 0.2
+    all_ratio: float = 0.5
+    seed: int = 0
+
+
+def _name(rng: random.Random, parts: int = 2) -> str:
+    return "_".join(rng.choice(_WORDS) for _ in range(parts))
+
+
+def _annotation(rng: random.Random, shape: RepoShape, prefix: str) -> str:
+    return f"{prefix}{rng.choice(_ANNOTATIONS)}" if rng.random() < shape.annotation_density else ""
+
+
+def _function(rng: random.Random, shape: RepoShape, indent: str, name: str) -> List[str]:
+    params = [f"{_name(rng, 1)}_{k}{_annotation(rng, shape, ': ')}" for k in range(rng.randrange(5))]
+    if indent:
+        params.insert(0, "self")
+    returns = _annotation(rng, shape, " -> ")
+    return [
+        f"{indent}def {name}({', '.join(params)}){returns}:",
+        f'{indent}    """{name.replace("_", " ").capitalize()}."""',
+        f"{indent}    return None",
+        "",
+    ]
+
+
+def _module(rng: random.Random, shape: RepoShape) -> Tuple[str, List[str]]:
+    """Source of a module and its public top-level names."""
+    names: List[str] = []
+    body: List[str] = []
+    for k in range(rng.randrange(3, 9)):
+        if rng.random() < 0.3:
+            name = f"{_name(rng).title().replace('_', '')}{k}"
+            body.append(f"class {name}:")
+            body.append(f'    """Generated class {k}."""')
+            body.append("")
+            for m in range(rng.randrange(1, 6)):
+                body.extend(_function(rng, shape, "    ", f"{_name(rng)}_{m}"))
+        else:
+            name = f"{_name(rng)}_{k}"
+            body.extend(_function(rng, shape, "", name))
+        names.append(name)
+    header = ["from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union", ""]
+    if rng.random() < shape.all_ratio:
+        exported = names[: max(1, len(names) // 2)]
+        header += [f"__all__ = {exported!r}", ""]
+        names = exported
+    return "\n".join(header + body) + "\n", names
+
+
+def _package(
+    rng: random.Random, shape: RepoShape, directory: Path, level: int, budget: List[int]
+) -> List[str]:
+    """Write a package and its subpackages while budget[0] files remain; return its exported names."""
+    directory.mkdir(parents=True, exist_ok=True)
+    budget[0] -= 1  # the __init__
+    sources: List[Tuple[str, List[str], bool]] = []  # (relative module, public names, is a package)
+    for m in range(shape.modules):
+        if budget[0] <= 0:
+            break
+        source, names = _module(rng, shape)
+        (directory / f"mod{m}.py").write_text(source, encoding="utf-8")
+        budget[0] -= 1
+        sources.append((f"mod{m}", names, False))
+    if level < shape.depth:
+        for s in range(2):
+            if budget[0] <= 0:
+                break
+            sources.append((f"sub{s}", _package(rng, shape, directory / f"sub{s}", level + 1, budget), True))
+
+    lines: List[str] = []
+    exported: List[str] = []
+    for module, names, _ in rng.sample(sources, min(shape.fanout, len(sources))):
+        if not names:
+            continue
+        if rng.random() < shape.star_ratio:
+            lines.append(f"from .{module} import *")
+            exported.extend(names)
+        else:
+            picked = names[: rng.randrange(1, len(names) + 1)]
+            lines.append(f"from .{module} import {', '.join(picked)}")
+            exported.extend(picked)
+    subpackages = [module for module, _, is_package in sources if is_package]
+    if subpackages and rng.random() < shape.alias_ratio:
+        sub = rng.choice(subpackages)
+        lines.append(f"from . import {sub} as {sub}_api")
+    if exported and rng.random() < shape.all_ratio:
+        exported = sorted(set(exported))
+        lines.append(f"__all__ = {exported!r}")
+    (directory / "__init__.py").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return exported
+
+
+def generate_scaling_repo(root: Path, files: int, shape: RepoShape) -> None:
+    """Write a deterministic tree of exactly ``files`` Python files under root/src."""
+    rng = random.Random(shape.seed)
+    budget = [files]
+    pkg = 0
+    while budget[0] > 0:
+        _package(rng, shape, root / "src" / f"pkg{pkg}", 0, budget)
+        pkg += 1
+
+
+def _measure(root: Path) -> Tuple[Dict[str, float], int, int]:
+    """Seconds per phase for one extraction of root, the bytes scanned and the tools found."""
+    seconds: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    files = list(discover_python_files(root))
+    seconds["discovery"] = time.perf_counter() - t0
+
+    clock = PhaseClock()
+    t0 = time.perf_counter()
+    summaries: List[Optional[FileSummary]] = []
+    for f in files:
+        clock.start()
+        summaries.append(_summarize_file(f, clock=clock))
+    seconds["pass1"] = time.perf_counter() - t0
+    for phase in ("read", "parse", "render"):
+        seconds[phase] = clock.phases.get(phase, {}).get("wall_seconds", 0.0)
+
+    rel_paths = [f.relative_to(root).as_posix() for f in files]
+    t0 = time.perf_counter()
+    tools = sum(1 for _ in _synthesize_tools(zip(rel_paths, summaries), ExtractionStats()))
+    seconds["pass2"] = time.perf_counter() - t0
+    return seconds, sum(f.stat().st_size for f in files), tools
+
+
+def run(sizes: List[int], shape: RepoShape, repeat: int) -> Dict[str, Any]:
+    """Benchmark every size; the best of ``repeat`` runs is kept per phase."""
+    runs: List[Dict[str, Any]] = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            generate_scaling_repo(root, size, shape)
+            best: Dict[str, float] = {}
+            for _ in range(repeat):
+                seconds, total_bytes, tools = _measure(root)
+                best = {phase: min(best.get(phase, math.inf), seconds[phase]) for phase in PHASES}
+        runs.append({
+            "files": size,
+            "bytes": total_bytes,
+            "tools": tools,
+            "seconds": {phase: round(best[phase], 6) for phase in PHASES},
+            "us_per_file": {phase: round(best[phase] / size * 1e6, 3) for phase in PHASES},
+        })
+    return {
+        "benchmark": "scaling",
+        "python": sys.version.split()[0],
+        "shape": asdict(shape),
+        "repeat": repeat,
+        "runs": runs,
+        "exponents": _exponents(runs),
+    }
+
+
+def _exponents(runs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Growth exponent k of time ~ files**k per phase between consecutive sizes."""
+    result = []
+    for a, b in zip(runs, runs[1:]):
+        growth = math.log(b["files"] / a["files"])
+        result.append({
+            "from": a["files"],
+            "to": b["files"],
+            **{
+                phase: round(math.log(b["seconds"][phase] / a["seconds"][phase]) / growth, 3)
+                for phase in PHASES
+                if a["seconds"][phase] > 0 and b["seconds"][phase] > 0
+            },
+        })
+    return result
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Phases of sizes present in both results that got slower by more than threshold."""
+    if current["shape"] != baseline["shape"]:
+        print("Warning: the baseline was generated with a different shape")
+    before = {r["files"]: r["seconds"] for r in baseline["runs"]}
+    regressions = []
+    for r in current["runs"]:
+        base = before.get(r["files"])
+        if base is None:
+            continue
+        for phase in PHASES:
+            old, new = base.get(phase), r["seconds"][phase]
+            if old and new > old * (1 + threshold) and new - old > _MIN_REGRESSION_SECONDS:
+                regressions.append(f"{r['files']} files, {phase}: {old:.3f}s -> {new:.3f}s (+{new / old - 1:.0%})")
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    defaults = RepoShape()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="Repository sizes in files")
+    parser.add_argument("--depth", type=int, default=defaults.depth, help="Subpackage levels per top-level package")
+    parser.add_argument("--modules", type=int, default=defaults.modules, help="Modules per package")
+    parser.add_argument(
+        "--annotation-density",
+        type=float,
+        default=defaults.annotation_density,
+        help="Fraction of parameters and returns annotated",
+    )
+    parser.add_argument("--fanout", type=int, default=defaults.fanout, help="Re-export sources per __init__")
+    parser.add_argument("--star-ratio", type=float, default=defaults.star_ratio, help="Fraction of star re-exports")
+    parser.add_argument(
+        "--alias-ratio", type=float, default=defaults.alias_ratio, help="Fraction of packages aliasing a subpackage"
+    )
+    parser.add_argument("--all-ratio", type=float, default=defaults.all_ratio, help="Fraction of files with __all__")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Seed for the generated repositories")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size; the fastest is kept")
+    parser.add_argument("--out", default=None, help="Write the results as JSON to this path")
+    parser.add_argument("--compare", default=None, metavar="BASELINE", help="Results JSON of an earlier run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="With --compare, relative slowdown of a phase counted as a regression (default: 0.2)",
+    )
+    args = parser.parse_args(argv)
+
+    shape = RepoShape(
+        depth=args.depth,
+        modules=args.modules,
+        annotation_density=args.annotation_density,
+        fanout=args.fanout,
+        star_ratio=args.star_ratio,
+        alias_ratio=args.alias_ratio,
+        all_ratio=args.all_ratio,
+        seed=args.seed,
+    )
+    results = run(sorted(set(args.sizes)), shape, max(1, args.repeat))
+
+    print(f"{'files':>8} {'tools':>8} " + " ".join(f"{phase:>10}" for phase in PHASES) + "   (us per file)")
+    for r in results["runs"]:
+        cells = " ".join(f"{r['us_per_file'][phase]:10.1f}" for phase in PHASES)
+        print(f"{r['files']:8d} {r['tools']:8d} {cells}")
+    for e in results["exponents"]:
+        cells = " ".join(f"{phase}={e[phase]:.2f}" for phase in PHASES if phase in e)
+        print(f"Growth exponent {e['from']} -> {e['to']} files: {cells}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No phase slower than {args.compare} by more than {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,134 @@
+"""Benchmark: memory of a million-record catalog as dicts versus a ToolStore.
+
+Generates tool records shaped like iter_tools output: modules of classes
+with methods and functions, with annotated signatures and docstrings, and
+packages re-exporting part of them. Every string is a fresh object, as
+when a catalog is read back from JSON, and a fraction of signatures repeat
+(``(self) -> None`` and the like). It then measures with tracemalloc the
+memory held by the records as a list of dicts and by a ToolStore built from
+the same stream, checks that the store gives back identical records, and
+times building the store and materializing it in catalog order.
+
+Usage:
+    python -m benchmarks.bench_tool_store [--records 1000000] [--reexport-ratio 0.3] [--seed 0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from tool_extractor.output import tool_sort_key
+from tool_extractor.store import ToolStore
+
+
+_WORDS = ("load", "parse", "item", "value", "config", "batch", "node", "token", "cache", "frame", "user", "path")
+
+_COMMON_SIGNATURES = ("(self) -> None", "(self)", "()", "(self, *args, **kwargs)", "(cls)")
+
+
+def _fresh(text: str) -> str:
+    """A new string object equal to text, as json.loads would create."""
+    return "".join(list(text))
+
+
+def generate_records(count: int, reexport_ratio: float, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield about ``count`` tool records: direct definitions, then their package re-exports."""
+    rng = random.Random(seed)
+    reexported: List[Dict[str, Any]] = []
+    direct = int(count / (1 + reexport_ratio))
+    produced = 0
+    m = 0
+    while produced < direct:
+        package = f"pkg{m // 20}.sub{m // 5 % 4}"
+        module = f"{package}.{rng.choice(_WORDS)}_{m}"
+        file = f"src/{module.replace('.', '/')}.py"
+        for k in range(rng.randrange(5, 40)):
+            word = rng.choice(_WORDS)
+            is_class = rng.random() < 0.3
+            name = f"{word.title()}{k}" if is_class else f"{word}_{rng.choice(_WORDS)}_{k}"
+            if rng.random() < 0.3:
+                signature = rng.choice(_COMMON_SIGNATURES)
+            else:
+                params = ", ".join(f"{rng.choice(_WORDS)}_{p}: Optional[Dict[str, int]] = None" for p in range(3))
+                signature = f"({params}) -> List[{word.title()}]"
+            record = {
+                "id": f"{module}:{name}",
+                "module": _fresh(module),
+                "name": name,
+                "signature": _fresh(signature),
+                "doc_first_line": f"{word.capitalize()} the {rng.choice(_WORDS)} of a {rng.choice(_WORDS)}.",
+                "file": _fresh(file),
+                "lineno": 10 + 12 * k,
+                "origin_id": f"{module}:{name}",
+                "kind": _fresh("class" if is_class else "function"),
+                "parent_id": None,
+            }
+            yield record
+            produced += 1
+            if rng.random() < reexport_ratio:
+                reexported.append(record)
+        m += 1
+    for origin in reexported:
+        package = origin["module"].rsplit(".", 1)[0]
+        yield {
+            **{key: _fresh(value) if isinstance(value, str) else value for key, value in origin.items()},
+            "id": f"{package}:{origin['name']}",
+            "module": _fresh(package),
+        }
+
+
+def _held(build: Callable[[], Any]) -> Tuple[Any, int]:
+    """(result, bytes it holds) for build(), measured with tracemalloc."""
+    tracemalloc.start()
+    result = build()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, held
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=1_000_000, help="Approximate number of tool records")
+    parser.add_argument("--reexport-ratio", type=float, default=0.3, help="Re-exports per direct definition")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the generated records")
+    args = parser.parse_args(argv)
+
+    def records() -> Iterator[Dict[str, Any]]:
+        return generate_records(args.records, args.reexport_ratio, args.seed)
+
+    dicts, dict_bytes = _held(lambda: list(records()))
+    store, store_bytes = _held(lambda: ToolStore.from_records(records()))
+    # Timed again without tracing, and net of generating the records
+    t0 = time.perf_counter()
+    for _ in records():
+        pass
+    t_generate = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    ToolStore.from_records(records())
+    t_build = time.perf_counter() - t0 - t_generate
+
+    if list(store) != dicts:
+        print("MISMATCH between the store and the records it was built from")
+        return 1
+    t0 = time.perf_counter()
+    in_order = sum(1 for _ in store.iter_sorted())
+    t_sorted = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    sorted(dicts, key=tool_sort_key)
+    t_sorted_dicts = time.perf_counter() - t0
+
+    print(f"Records:       {len(dicts)} ({len(store._signature)} distinct definitions, {len(store._strings)} strings)")
+    print(f"List of dicts: {dict_bytes / 1e6:8.1f} MB  ({dict_bytes / len(dicts):6.0f} bytes/record)")
+    print(f"ToolStore:     {store_bytes / 1e6:8.1f} MB  ({store_bytes / len(dicts):6.0f} bytes/record)")
+    print(f"Reduction:     {dict_bytes / store_bytes:8.1f}x")
+    print(f"Build store:   {t_build:8.2f}s")
+    print(f"Catalog order: {t_sorted:8.2f}s for {in_order} materialized records (sorting the dicts: {t_sorted_dicts:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
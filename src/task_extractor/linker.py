@@ -3,7 +3,10 @@ from __future__ import annotations
 import ast
 import json
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from tool_extractor.catalog import SQLITE_SUFFIXES, ToolCatalog
+from tool_extractor.output import iter_jsonl
 
 from .models import NotebookUnit, ToolRef
 
@@ -110,17 +113,24 @@ def _extract_call_dotted(code: str, import_map: Dict[str, str]) -> List[str]:
 	return dotted_calls
 
 
-def _load_tool_candidates(tools_json: Path) -> Tuple[Dict[str, str], Dict[str, Set[str]]]:
-	# Returns (full_dotted_to_id, name_to_ids)
+def _load_tool_candidates(tools_json: Path) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+	# Returns (full_dotted_to_id, name_to_ids); ids sharing a name come most central first
+	# when the catalog was built with --call-graph, then by id
 	full_map: Dict[str, str] = {}
 	name_map: Dict[str, Set[str]] = {}
+	centrality: Dict[str, float] = {}
 	if not tools_json.exists():
-		return full_map, name_map
-	data = json.loads(tools_json.read_text())
-	if isinstance(data, dict):
-		records = data.get("tools", [])
+		return full_map, {}
+	records: Iterable[Dict[str, Any]]
+	if tools_json.suffix == ".jsonl":
+		# Streamed catalog (tool_extractor --format jsonl): one record per line
+		records = iter_jsonl(tools_json)
 	else:
-		records = data
+		data = json.loads(tools_json.read_text())
+		if isinstance(data, dict):
+			records = data.get("tools", [])
+		else:
+			records = data
 	for rec in records:
 		tool_id = rec.get("id") or rec.get("tool_id")
 		module = rec.get("module") or rec.get("mod") or ""
@@ -133,7 +143,12 @@ def _load_tool_candidates(tools_json: Path) -> Tuple[Dict[str, str], Dict[str, S
 		name_map.setdefault(name, set()).add(tool_id)
 		# Also allow matching by id if referenced directly
 		full_map[tool_id] = tool_id
-	return full_map, name_map
+		if "centrality" in rec:
+			centrality[tool_id] = rec["centrality"]
+	ranked = {
+		name: sorted(ids, key=lambda i: (-centrality.get(i, 0.0), i)) for name, ids in name_map.items()
+	}
+	return full_map, ranked
 
 
 def link_tools_for_unit(unit: NotebookUnit, tools_json: Path, cumulative_import_map: Dict[str, str] | None = None) -> List[ToolRef]:
@@ -144,17 +159,31 @@ def link_tools_for_unit(unit: NotebookUnit, tools_json: Path, cumulative_import_
 	import_map.update(local_imports)
 
 	calls = _extract_call_dotted(unit.code_text, import_map)
+	if tools_json.suffix in SQLITE_SUFFIXES:
+		# Indexed catalog (tool_extractor --format sqlite): query per call instead of loading it
+		if not tools_json.exists():
+			return []
+		with ToolCatalog(tools_json) as catalog:
+			return _match_calls(calls, catalog.resolve, catalog.ids_for_name)
 	full_map, name_map = _load_tool_candidates(tools_json)
+	return _match_calls(calls, full_map.get, lambda name: name_map.get(name, []))
+
 
+def _match_calls(
+	calls: List[str],
+	resolve: Callable[[str], Optional[str]],
+	ids_for_name: Callable[[str], Iterable[str]],
+) -> List[ToolRef]:
 	seen: Set[str] = set()
 	refs: List[ToolRef] = []
 	for dotted in calls:
-		if dotted in full_map and full_map[dotted] not in seen:
-			refs.append(ToolRef(tool_id=full_map[dotted], match_type="exact"))
-			seen.add(full_map[dotted])
+		exact = resolve(dotted)
+		if exact is not None and exact not in seen:
+			refs.append(ToolRef(tool_id=exact, match_type="exact"))
+			seen.add(exact)
 			continue
 		last = dotted.split(".")[-1]
-		candidate_ids = name_map.get(last, set())
+		candidate_ids = ids_for_name(last)
 		for cid in candidate_ids:
 			if cid in seen:
 				continue
@@ -2,11 +2,17 @@
 
 Exposes a simple API:
     extract_tools(repo_path: str) -> tuple[list[dict], int, int]
-which returns (tools, files_scanned, files_skipped).
+which returns (tools, files_scanned, files_skipped), and
+    iter_tools(repo_path: str) -> Iterator[dict]
+which streams the same records with bounded memory. Both accept
+``limits=ParseLimits(...)`` to guard against pathological files. Large
+catalogs can be held compactly in a ``ToolStore``.
 """
 
-from .extractor import extract_tools  # noqa: F401
+from .extractor import extract_tools, iter_tools  # noqa: F401
+from .guards import ParseLimits  # noqa: F401
+from .store import ToolStore  # noqa: F401
 
-__all__ = ["extract_tools"]
+__all__ = ["extract_tools", "iter_tools", "ParseLimits", "ToolStore"]
 
 
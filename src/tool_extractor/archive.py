@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .cache import BlobCache, ContentKey, _digest
+from .extractor import summarize_contents
+from .filesystem import is_excluded_rel_path, is_package_init, python_suffixes
+from .guards import content_skip_reason
+from .metrics import PhaseClock
+from .models import ExtractionStats, FileSummary
+
+
+ARCHIVE_SUFFIXES = (".whl", ".zip", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz", ".tar")
+
+# Wheel data directories whose contents are installed next to the packages
+_WHEEL_LIBS = {"purelib", "platlib"}
+
+# Member bytes held at a time: read this much, summarize it, release it
+_MEMBER_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+def is_archive(path: Path) -> bool:
+    """Whether path is a file extract_tools reads as an archive (by suffix)."""
+    return path.name.lower().endswith(ARCHIVE_SUFFIXES) and path.is_file()
+
+
+def _iter_members(path: Path, suffixes: Tuple[str, ...] = (".py",)) -> Iterator[Tuple[str, bytes]]:
+    """(member name, contents) of the regular files with one of ``suffixes``, in archive order."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and info.filename.endswith(suffixes):
+                    yield info.filename, zf.read(info)
+        return
+    # Sequential mode: members are decompressed once, in order, never seeked
+    with tarfile.open(path, "r|*") as tar:
+        for member in tar:
+            if member.isfile() and member.name.endswith(suffixes):
+                f = tar.extractfile(member)
+                if f is not None:
+                    yield member.name, f.read()
+
+
+def _layout(names: List[str], wheel: bool) -> Dict[str, str]:
+    """Map member names to repo-relative paths as if the archive were unpacked as a checkout.
+
+    Wheels install ``<name>.data/purelib|platlib/`` next to the packages and
+    nothing else from ``.data``. Sdists and source zips keep everything under
+    one top-level directory (``name-1.0/``), which is dropped unless it is a
+    package itself; module names then follow from the remaining path like
+    for a directory, including src layouts. Unsafe names are left out.
+    """
+    cleaned: Dict[str, str] = {}
+    for name in names:
+        rel = name
+        while rel.startswith("./"):
+            rel = rel[2:]
+        parts = rel.split("/")
+        if not rel or rel.startswith("/") or ".." in parts or "" in parts:
+            continue
+        if wheel and parts[0].endswith(".data"):
+            if len(parts) < 3 or parts[1] not in _WHEEL_LIBS:
+                continue
+            rel = "/".join(parts[2:])
+        cleaned[name] = rel
+    if not wheel:
+        tops = {rel.split("/", 1)[0] for rel in cleaned.values()}
+        if len(tops) == 1:
+            top = next(iter(tops))
+            if all("/" in rel for rel in cleaned.values()) and not any(
+                is_package_init(rel) and rel.count("/") == 1 for rel in cleaned.values()
+            ):
+                cleaned = {name: rel[len(top) + 1 :] for name, rel in cleaned.items()}
+    return {name: rel for name, rel in cleaned.items() if not is_excluded_rel_path(rel)}
+
+
+def iter_archive_summaries(
+    path: Path,
+    workers: int,
+    cache: Optional[BlobCache] = None,
+    fast: bool = False,
+    stats: Optional[ExtractionStats] = None,
+    include_stubs: bool = False,
+    calls: bool = False,
+) -> Iterator[Tuple[str, Optional[FileSummary]]]:
+    """Yield (rel path, summary) for the Python files of a wheel, sdist or zip archive.
+
+    Members are read straight from the archive (tar files in one sequential
+    pass) and fed to the same parse pipeline as files on disk (see
+    summarize_contents) in chunks of about _MEMBER_CHUNK_BYTES, whose bytes
+    are released once summarized; nothing is extracted to disk. The
+    filesystem exclusion rules apply to member paths after _layout, which
+    needs every name, so results are yielded once the archive is read, in
+    the same order a directory walk gives. ``cache`` is keyed by the
+    members' sha256, so unchanged files of another version of the same
+    distribution are not parsed again. With include_stubs, ``.pyi`` members
+    are read too. Copies count as deduplicated in ``stats``.
+    """
+    if not is_archive(path):
+        raise ValueError(f"{path} is not a supported archive ({', '.join(ARCHIVE_SUFFIXES)})")
+    if stats is None:
+        stats = ExtractionStats()
+    clock = PhaseClock(stats.phases)
+    wheel = path.name.lower().endswith(".whl")
+    members: List[Tuple[str, ContentKey, int]] = []
+    summaries: Dict[ContentKey, Optional[FileSummary]] = {}
+    reasons: Dict[ContentKey, str] = {}
+    chunk: Dict[str, bytes] = {}
+    wanted: List[Tuple[ContentKey, str]] = []
+
+    def _summarize_chunk() -> None:
+        # Decompressing the members is both listing and reading them
+        clock.lap("discovery")
+        summarize_contents(chunk.__getitem__, wanted, workers, cache, fast, summaries, stats, calls)
+        for key, _ in wanted:
+            if summaries[key] is None and key not in reasons:
+                reasons[key] = content_skip_reason(chunk[key[0]])
+        chunk.clear()
+        wanted.clear()
+        clock.start()
+
+    chunk_bytes = 0
+    for name, data in _iter_members(path, python_suffixes(include_stubs)):
+        # Left out however the full layout turns out, so not worth parsing
+        if not _layout([name], wheel):
+            continue
+        key = (_digest(data), is_package_init(name))
+        members.append((name, key, len(data)))
+        chunk[key[0]] = data
+        wanted.append((key, f"{path.name}:{name}"))
+        chunk_bytes += len(data)
+        if chunk_bytes >= _MEMBER_CHUNK_BYTES:
+            _summarize_chunk()
+            chunk_bytes = 0
+    _summarize_chunk()
+
+    layout = _layout([name for name, _, _ in members], wheel)
+    # Duplicate names (appended tar members): the last one wins, as when unpacking
+    entries = list({layout[name]: (layout[name], key, size) for name, key, size in members if name in layout}.values())
+    entries.sort(key=lambda e: e[0].split("/"))
+    clock.lap("discovery")
+    stats.bytes_scanned += sum(size for _, _, size in entries)
+    emitted: Set[ContentKey] = set()
+    for rel, key, size in entries:
+        if key in emitted:
+            stats.files_deduplicated += 1
+            stats.bytes_deduplicated += size
+        emitted.add(key)
+        if key in reasons:
+            stats.count_skip(reasons[key])
+        yield rel, summaries[key]
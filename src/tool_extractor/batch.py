@@ -0,0 +1,478 @@
+from __future__ import annotations
+
+import argparse
+import functools
+import itertools
+import json
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .cache import ContentKey, SummaryCache
+from .extractor import _decode_source, _FileTriage, _parse_guarded, _resolve_workers, _summarize_source
+from .filesystem import discover_python_files, is_package_init
+from .guards import ParseLimits, add_limit_arguments, skip_reason
+from .models import ExtractionStats, FileSummary
+from .output import write_summary, write_tools_json
+from .synthesis import _synthesize_tools
+
+
+# Files shipped to a worker per task; small enough to keep every worker busy
+# until the end of the batch, large enough to amortize IPC per task
+CHUNK_SIZE = 32
+# Chunks in flight per worker; files are read only as their chunk is
+# submitted, so this bounds the source text held in memory
+TASKS_PER_WORKER = 2
+
+
+@dataclass
+class _RepoJob:
+    """One manifest entry and its in-flight Pass-1 state."""
+
+    repo: Path
+    out: Path
+    files: List[Path] = field(default_factory=list)
+    total_bytes: int = 0
+    summaries: List[Optional[FileSummary]] = field(default_factory=list)
+    remaining: int = 0
+    parse_seconds: float = 0.0
+    cache: Optional[SummaryCache] = None
+    # Content keys and sizes of the files sent to workers, by file index
+    contents: Dict[int, Tuple[ContentKey, int]] = field(default_factory=dict)
+    # Deduplication counts as Pass 1 goes; Pass 2 fills in the rest
+    stats: ExtractionStats = field(default_factory=ExtractionStats)
+    # Set once every file was checked, so no more parses can be scheduled
+    triaged: bool = False
+    # Files turned away by the parse limits or timed out, by file index
+    skipped: Dict[int, str] = field(default_factory=dict)
+    error: Optional[str] = None
+    report: Dict[str, Any] = field(default_factory=dict)
+
+
+# Skip reason of files whose parse raised; their repository is reported as failed
+_SKIP_ERROR = "error"
+
+
+def _error(what: str, exc: BaseException) -> str:
+    return f"{what}: {type(exc).__name__}: {exc}"
+
+
+def _read_source(file: Path) -> Optional[str]:
+    try:
+        return _decode_source(file.read_bytes())
+    except OSError:
+        return None
+
+
+def _summarize_chunk(
+    sources: List[Tuple[Optional[str], str, bool]], fast: bool = False
+) -> Tuple[List[Optional[FileSummary]], float]:
+    """Worker task: summarize a chunk of (text, file name, is package init) sources and report the time spent."""
+    t0 = time.perf_counter()
+    summaries = [_summarize_source(text, name, init, fast) for text, name, init in sources]
+    return summaries, time.perf_counter() - t0
+
+
+def load_manifest(path: Path, out_root: Path) -> List[Tuple[Path, Path]]:
+    """Read a batch manifest into (repo, tools.json output) pairs.
+
+    The manifest is a JSON array whose entries are either a repository path or
+    an object ``{"repo": ..., "out": ...}``. Relative paths are resolved
+    against the manifest's directory. Without ``out``, output goes to
+    ``<out_root>/<repo directory name>/tools.json``. Raises ValueError when
+    two entries would write the same output (see check_outputs).
+    """
+    base = path.parent
+    entries = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(entries, list):
+        raise ValueError(f"manifest {path} must contain a JSON array")
+    jobs: List[Tuple[Path, Path]] = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"repo": entry}
+        if not isinstance(entry, dict) or "repo" not in entry:
+            raise ValueError(f"invalid manifest entry: {entry!r}")
+        repo = base / entry["repo"]
+        out = base / entry["out"] if entry.get("out") else out_root / repo.name / "tools.json"
+        jobs.append((repo, out))
+    check_outputs(jobs)
+    return jobs
+
+
+def check_outputs(repos: List[Tuple[Path, Path]]) -> None:
+    """Raise ValueError if two (repo, output) pairs share an output path.
+
+    One job would silently overwrite the other's tools.json and
+    tools_summary.txt: the same repository listed twice, or two repositories
+    with the same directory name and no explicit ``out``.
+    """
+    owners: Dict[Path, Path] = {}
+    for repo, out in repos:
+        first = owners.get(out.resolve())
+        if first is not None:
+            raise ValueError(f"{first} and {repo} would both write {out}; give one of them an explicit \"out\"")
+        owners[out.resolve()] = repo
+
+
+def _prepare(job: _RepoJob, cache_dir: Optional[Path], respect_gitignore: bool, fast: bool) -> None:
+    if not job.repo.is_dir():
+        job.error = "not a directory or not accessible"
+        return
+    job.files = list(discover_python_files(job.repo, respect_gitignore=respect_gitignore))
+    for file in job.files:
+        try:
+            job.total_bytes += file.stat().st_size
+        except OSError:
+            pass
+    job.summaries = [None] * len(job.files)
+    if cache_dir is not None:
+        job.cache = SummaryCache(cache_dir, job.repo, fast=fast)
+
+
+def _finalize(job: _RepoJob, started: float) -> None:
+    """Run Pass 2 for a repo whose files are all summarized and write its outputs.
+
+    Errors (e.g. an unwritable output) are recorded in ``job.error`` rather
+    than raised, so the rest of the batch goes on.
+    """
+    try:
+        _write_outputs(job, started)
+    except Exception as exc:
+        job.error = _error("writing output failed", exc)
+    # Pass-1 state is no longer needed once the repo is written
+    job.summaries = []
+
+
+def _write_outputs(job: _RepoJob, started: float) -> None:
+    stats = job.stats
+    rel_paths = [f.relative_to(job.repo).as_posix() for f in job.files]
+    job.out.parent.mkdir(parents=True, exist_ok=True)
+    total_tools = write_tools_json(_synthesize_tools(zip(rel_paths, job.summaries), stats), job.out)
+    for i, summary in enumerate(job.summaries):
+        if summary is None:
+            stats.count_skip(job.skipped.get(i) or skip_reason(job.files[i]))
+    if job.cache is not None:
+        job.cache.save()
+        stats.cache_hits = job.cache.hits
+        stats.cache_misses = job.cache.misses
+    write_summary(job.out.parent / "tools_summary.txt", stats, total_tools, job.cache is not None, job.out)
+    job.report.update(
+        files_scanned=stats.files_scanned,
+        files_skipped=stats.files_skipped,
+        skip_reasons=stats.skip_reasons,
+        tools_found=total_tools,
+        bytes=job.total_bytes,
+        cache_hits=stats.cache_hits,
+        cache_misses=stats.cache_misses,
+        files_deduplicated=stats.files_deduplicated,
+        bytes_deduplicated=stats.bytes_deduplicated,
+        parse_seconds=round(job.parse_seconds, 3),
+        finished_after_seconds=round(time.perf_counter() - started, 3),
+    )
+
+
+def run_batch(
+    repos: List[Tuple[Path, Path]],
+    workers: Optional[int] = None,
+    cache_dir: Optional[Path] = None,
+    respect_gitignore: bool = False,
+    fast: bool = False,
+    limits: Optional[ParseLimits] = None,
+) -> Dict[str, Any]:
+    """Extract tools for many repositories on one shared worker pool.
+
+    Files of every repository are discovered up front and parsed by a single
+    process pool in chunks, largest repositories first so they do not end up
+    as the long tail. As soon as all files of a repository are summarized, its
+    Pass 2 runs in the parent and its ``tools.json`` and ``tools_summary.txt``
+    are written. ``fast`` selects the top-level scanner (see iter_tools).
+    Output paths must be distinct (check_outputs).
+
+    A repository that cannot be discovered, whose files make a parse raise
+    (in a worker or here) or whose outputs cannot be written is reported
+    with an ``error`` and not written; the other repositories still finish,
+    parsing their own copies of a file whose parse raised.
+
+    Files are read and hashed as their chunk is scheduled, with at most
+    TASKS_PER_WORKER chunks per worker in flight, and workers get the text
+    read: content already summarized anywhere in the batch (or cached under
+    another path of the same repository) is reused, and copies of a file
+    that is still being parsed wait for its result, so each distinct content
+    is parsed once per batch. ``limits`` guard every parse (see iter_tools);
+    files they isolate are parsed from this process, one killable process
+    each, while the pool works on the rest. Returns a throughput report for
+    the whole batch.
+    """
+    check_outputs(repos)
+    started = time.perf_counter()
+    n_workers = _resolve_workers(workers)
+    limits = limits or ParseLimits()
+    jobs = [_RepoJob(repo=repo, out=out) for repo, out in repos]
+    for job in jobs:
+        job.report.update(repo=str(job.repo), out=str(job.out))
+        try:
+            _prepare(job, cache_dir, respect_gitignore, fast)
+        except Exception as exc:
+            job.error = _error("discovery failed", exc)
+
+    # Limits, cache and dedupe are shared with iter_tools; copies of a file
+    # in flight wait here for its result, by content key
+    triage = _FileTriage(limits)
+    waiting: Dict[ContentKey, List[Tuple[_RepoJob, int, Tuple[ContentKey, int]]]] = {}
+
+    isolated: Deque[Tuple[_RepoJob, int, Optional[str]]] = deque()
+
+    def _settle(job: _RepoJob) -> None:
+        if job.triaged and job.remaining == 0:
+            if job.error is None:
+                _finalize(job, started)
+            else:
+                job.summaries = []
+
+    def _tasks() -> Iterator[Tuple[_RepoJob, List[int], List[Tuple[Optional[str], str, bool]]]]:
+        """Check files, largest repositories first, yielding chunks of (file indices, sources) to parse.
+
+        Cached and duplicate files are resolved here, and isolated files
+        queued for _parse_isolated.
+        """
+        for job in sorted((j for j in jobs if j.error is None), key=lambda j: -j.total_bytes):
+            indices: List[int] = []
+            sources: List[Tuple[Optional[str], str, bool]] = []
+            for i, file in enumerate(job.files):
+                verdict = triage.check(file, job.cache, job.stats)
+                if verdict.action == "done":
+                    job.summaries[i] = verdict.summary
+                    if verdict.reason is not None:
+                        job.skipped[i] = verdict.reason
+                    continue
+                job.remaining += 1
+                content = verdict.content
+                if verdict.action == "wait":
+                    assert content is not None
+                    waiting[content[0]].append((job, i, content))
+                    continue
+                if content is not None:
+                    waiting[content[0]] = []
+                    job.contents[i] = content
+                if limits.isolates(file):
+                    isolated.append((job, i, verdict.text))
+                    continue
+                indices.append(i)
+                sources.append((verdict.text, str(file), is_package_init(file.name)))
+                if len(indices) == CHUNK_SIZE:
+                    yield job, indices, sources
+                    indices, sources = [], []
+            job.triaged = True
+            if indices:
+                yield job, indices, sources
+            else:
+                _settle(job)
+
+    def _resolved(job: _RepoJob, i: int, summary: Optional[FileSummary], reason: Optional[str] = None) -> None:
+        """Record the parse result of file i (reason if it timed out) and of the copies waiting for it."""
+        job.summaries[i] = summary
+        if reason is not None:
+            job.skipped[i] = reason
+        content = job.contents.pop(i, None)
+        triage.parsed(job.files[i], content, summary, reason, job.cache)
+        if content is not None:
+            for other, j, copy in waiting.pop(content[0]):
+                other.summaries[j], copy_reason = triage.copied(other.files[j], copy, other.cache, other.stats)
+                if copy_reason is not None:
+                    other.skipped[j] = copy_reason
+                other.remaining -= 1
+                if other is not job:
+                    _settle(other)
+        job.remaining -= 1
+        _settle(job)
+
+    def _complete(job: _RepoJob, indices: List[int], result: Tuple[List[Optional[FileSummary]], float]) -> None:
+        summaries, seconds = result
+        job.parse_seconds += seconds
+        for i, summary in zip(indices, summaries):
+            _resolved(job, i, summary)
+
+    def _failed(job: _RepoJob, indices: List[int], exc: BaseException) -> None:
+        """Fail the repo of a chunk whose parse raised; its files are skipped with reason ``error``.
+
+        Nothing is cached or remembered for their contents, so copies in other
+        repositories do not inherit the failure: they are read and queued to
+        be parsed for their own repository.
+        """
+        if job.error is None:
+            job.error = _error("parse failed", exc)
+        for i in indices:
+            job.summaries[i] = None
+            job.skipped[i] = _SKIP_ERROR
+            content = job.contents.pop(i, None)
+            if content is not None:
+                triage.in_flight.discard(content[0])
+                for other, j, _ in waiting.pop(content[0]):
+                    if other is job:
+                        other.skipped[j] = _SKIP_ERROR
+                        other.remaining -= 1
+                    else:
+                        isolated.append((other, j, _read_source(other.files[j])))
+            job.remaining -= 1
+        _settle(job)
+
+    def _parse_isolated() -> None:
+        while isolated:
+            job, i, text = isolated.popleft()
+            t0 = time.perf_counter()
+            try:
+                reason, summary = _parse_guarded(job.files[i], text, fast, limits)
+            except Exception as exc:
+                _failed(job, [i], exc)
+                continue
+            job.parse_seconds += time.perf_counter() - t0
+            _resolved(job, i, summary, reason)
+
+    summarize_chunk = functools.partial(_summarize_chunk, fast=fast)
+    tasks = _tasks()
+    if n_workers <= 1:
+        for job, indices, sources in tasks:
+            try:
+                result = summarize_chunk(sources)
+            except Exception as exc:
+                _failed(job, indices, exc)
+            else:
+                _complete(job, indices, result)
+            _parse_isolated()
+        _parse_isolated()
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures: Dict[Future, Tuple[_RepoJob, List[int]]] = {}
+            while True:
+                for job, indices, sources in itertools.islice(tasks, n_workers * TASKS_PER_WORKER - len(futures)):
+                    try:
+                        futures[executor.submit(summarize_chunk, sources)] = (job, indices)
+                    except Exception as exc:  # e.g. a pool broken by a crashed worker
+                        _failed(job, indices, exc)
+                if isolated:
+                    # The pool keeps working on the chunks in flight meanwhile
+                    _parse_isolated()
+                    continue
+                if not futures:
+                    break
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job, indices = futures.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as exc:
+                        _failed(job, indices, exc)
+                    else:
+                        _complete(job, indices, result)
+
+    wall = time.perf_counter() - started
+    done = [j.report for j in jobs if j.error is None]
+    files = sum(r["files_scanned"] for r in done)
+    total_bytes = sum(r["bytes"] for r in done)
+    for job in jobs:
+        if job.error is not None:
+            job.report["error"] = job.error
+    return {
+        "workers": n_workers,
+        "repos": [j.report for j in jobs],
+        "totals": {
+            "repos": len(jobs),
+            "repos_failed": len(jobs) - len(done),
+            "files_scanned": files,
+            "files_skipped": sum(r["files_skipped"] for r in done),
+            "skip_reasons": dict(sum((Counter(r["skip_reasons"]) for r in done), Counter())),
+            "tools_found": sum(r["tools_found"] for r in done),
+            "files_deduplicated": sum(r["files_deduplicated"] for r in done),
+            "bytes_deduplicated": sum(r["bytes_deduplicated"] for r in done),
+            "bytes": total_bytes,
+            "wall_seconds": round(wall, 3),
+            "parse_seconds": round(sum(r["parse_seconds"] for r in done), 3),
+            "files_per_second": round(files / wall, 1) if wall else 0.0,
+            "bytes_per_second": round(total_bytes / wall, 1) if wall else 0.0,
+        },
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tool_extractor batch",
+        description="Extract tools from many repositories with one shared worker pool",
+    )
+    parser.add_argument("--manifest", required=True, help="JSON array of repo paths or {repo, out} objects")
+    parser.add_argument(
+        "--out-root",
+        default="artifacts/batch",
+        help="Output root for entries without 'out' (default: artifacts/batch)",
+    )
+    parser.add_argument(
+        "--report",
+        default=None,
+        help="Path of the throughput report (default: <out-root>/batch_report.json)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Number of processes shared by all repositories (default: 0 = all CPUs)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for the per-file extraction cache (default: <out-root>/.tool_cache)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the extraction cache")
+    parser.add_argument(
+        "--respect-gitignore",
+        action="store_true",
+        help="Skip files and directories ignored by each repository's .gitignore files",
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Parse only top-level statements (see the main command's --fast)",
+    )
+    add_limit_arguments(parser)
+    args = parser.parse_args(argv)
+
+    manifest = Path(args.manifest)
+    if not manifest.is_file():
+        print(f"Error: --manifest '{manifest}' is not a file.")
+        return 2
+    if args.workers < 0:
+        print(f"Error: --workers must be >= 0, got {args.workers}.")
+        return 2
+    out_root = Path(args.out_root)
+    try:
+        repos = load_manifest(manifest, out_root)
+    except ValueError as exc:
+        print(f"Error: {exc}")
+        return 2
+
+    cache_dir: Optional[Path] = None
+    if not args.no_cache:
+        cache_dir = Path(args.cache_dir) if args.cache_dir else out_root / ".tool_cache"
+
+    report = run_batch(
+        repos,
+        workers=args.workers,
+        cache_dir=cache_dir,
+        respect_gitignore=args.respect_gitignore,
+        fast=args.fast,
+        limits=ParseLimits.from_args(args),
+    )
+
+    report_path = Path(args.report) if args.report else out_root / "batch_report.json"
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with report_path.open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    totals = report["totals"]
+    print(
+        f"Processed {totals['repos']} repos ({totals['repos_failed']} failed): "
+        f"{totals['files_scanned']} files ({totals['files_deduplicated']} duplicates reused), "
+        f"{totals['tools_found']} tools in {totals['wall_seconds']}s ({totals['files_per_second']} files/s)"
+    )
+    return 1 if totals["repos_failed"] else 0
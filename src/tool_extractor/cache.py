@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .filesystem import is_package_init
+from .models import FileSummary
+
+
+# Bump whenever FileSummary contents or the way they are computed change, so
+# stale caches are discarded instead of silently producing old results.
+CACHE_VERSION = 5
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _variant(fast: bool, calls: bool) -> str:
+    """Cache file name suffix for the kind of summaries it holds."""
+    return ("-fast" if fast else "") + ("-calls" if calls else "")
+
+
+# What a FileSummary depends on: the file's content hash and whether it is a
+# package __init__ (.py or .pyi). Its location does not matter, so equal keys share one.
+ContentKey = Tuple[str, bool]
+
+
+def content_key(path: Path, data: Optional[bytes] = None) -> Optional[Tuple[ContentKey, int]]:
+    """(content key, size in bytes) of a file, or None if it cannot be read.
+
+    ``data`` is the file's contents if the caller has read them already.
+    """
+    if data is None:
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+    return (_digest(data), is_package_init(path.name)), len(data)
+
+
+class SummaryCache:
+    """On-disk cache of per-file Pass-1 summaries for one repository.
+
+    Entries are keyed by the repo-relative path and validated by file size and
+    mtime. When those differ but the size matches, the content hash recorded at
+    store time decides, so touched-but-unchanged files (fresh checkouts, branch
+    switches) are still hits. Files that failed to parse are cached as well.
+    ``lookup_content`` finds a summary by content alone, for copies of a file
+    cached under another path.
+
+    The cache lives in a single JSON file under ``cache_dir`` named after the
+    resolved repository path; summaries made by the fast scanner go to a
+    separate file, since they differ for files whose function bodies do not
+    parse, and so do summaries with calls (see iter_tools' ``call_graph``).
+    Only entries looked up during a run are written
+    back by ``save()``, which prunes files that no longer exist.
+    """
+
+    def __init__(self, cache_dir: Path, repo_root: Path, fast: bool = False, calls: bool = False) -> None:
+        self.repo_root = repo_root
+        key = _digest(str(repo_root.resolve()).encode("utf-8"))[:16]
+        self.path = cache_dir / f"summaries-{key}{_variant(fast, calls)}.json"
+        self.hits = 0
+        self.misses = 0
+        self._old: Dict[str, Dict[str, Any]] = self._load()
+        self._new: Dict[str, Dict[str, Any]] = {}
+        self._by_content: Optional[Dict[ContentKey, Dict[str, Any]]] = None
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return {}
+        entries = data.get("entries")
+        return entries if isinstance(entries, dict) else {}
+
+    def _key(self, path: Path) -> str:
+        return path.relative_to(self.repo_root).as_posix()
+
+    def lookup(self, path: Path) -> Tuple[bool, Optional[FileSummary]]:
+        """Return (hit, summary) for a file; summary is None for cached skips.
+
+        On a miss the caller is expected to parse the file and call ``store``.
+        """
+        key = self._key(path)
+        entry = self._old.get(key)
+        try:
+            st = path.stat()
+        except OSError:
+            entry = None
+            st = None
+        if entry is not None and st is not None and entry["size"] == st.st_size:
+            fresh = entry["mtime_ns"] == st.st_mtime_ns
+            if not fresh:
+                # Same size, new mtime: fall back to comparing content hashes
+                try:
+                    fresh = entry["sha256"] == _digest(path.read_bytes())
+                except OSError:
+                    fresh = False
+            if fresh:
+                self.hits += 1
+                self._new[key] = dict(entry, mtime_ns=st.st_mtime_ns)
+                data = entry["summary"]
+                return True, FileSummary.from_dict(data) if data is not None else None
+        self.misses += 1
+        return False, None
+
+    def lookup_content(self, key: ContentKey) -> Tuple[bool, Optional[FileSummary]]:
+        """Return (hit, summary) for any file cached with the same content key.
+
+        Does not count as a hit or miss; the caller still ``store``s the
+        summary under the new path.
+        """
+        if self._by_content is None:
+            self._by_content = {
+                (entry["sha256"], is_package_init(rel)): entry for rel, entry in self._old.items()
+            }
+        entry = self._by_content.get(key)
+        if entry is None:
+            return False, None
+        data = entry["summary"]
+        return True, FileSummary.from_dict(data) if data is not None else None
+
+    def store(self, path: Path, summary: Optional[FileSummary], digest: Optional[str] = None) -> None:
+        """Record the freshly computed summary (or None for a skipped file).
+
+        ``digest`` is the content hash if the caller already computed it.
+        """
+        try:
+            st = path.stat()
+            if digest is None:
+                digest = _digest(path.read_bytes())
+        except OSError:
+            return
+        self._new[self._key(path)] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": digest,
+            "summary": summary.to_dict() if summary is not None else None,
+        }
+
+    def save(self) -> None:
+        """Atomically write the entries seen during this run to disk."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "entries": self._new}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+class BlobCache:
+    """On-disk cache of Pass-1 summaries keyed by content hash.
+
+    Used for sources that are not files on disk: git blobs (keyed by blob id)
+    and archive members (keyed by sha256). Entries are valid for every
+    revision, archive or repository containing the same content; the only
+    other input is whether the file is a package ``__init__.py``. Unlike
+    SummaryCache, entries are never pruned, since the blobs of other revisions
+    are expected to be asked for again. Fast-scanner summaries and summaries
+    with calls are kept in separate files.
+    """
+
+    def __init__(self, cache_dir: Path, fast: bool = False, calls: bool = False) -> None:
+        self.path = cache_dir / f"blobs{_variant(fast, calls)}.json"
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Optional[Dict[str, Any]]] = self._load()
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Optional[Dict[str, Any]]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return {}
+        entries = data.get("entries")
+        return entries if isinstance(entries, dict) else {}
+
+    @staticmethod
+    def _key(key: ContentKey) -> str:
+        blob, is_init = key
+        return f"{blob}:{int(is_init)}"
+
+    def __contains__(self, key: ContentKey) -> bool:
+        return self._key(key) in self._entries
+
+    def lookup(self, key: ContentKey) -> Tuple[bool, Optional[FileSummary]]:
+        """Return (hit, summary) for a (blob id, is package init) key."""
+        try:
+            data = self._entries[self._key(key)]
+        except KeyError:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, FileSummary.from_dict(data) if data is not None else None
+
+    def store(self, key: ContentKey, summary: Optional[FileSummary]) -> None:
+        self._entries[self._key(key)] = summary.to_dict() if summary is not None else None
+        self._dirty = True
+
+    def save(self) -> None:
+        """Atomically write the cache to disk if anything was stored."""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "entries": self._entries}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self._dirty = False
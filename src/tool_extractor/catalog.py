@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import sqlite3
+from dataclasses import asdict, fields
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .models import ExtractionStats, ToolRecord
+
+
+SQLITE_SUFFIXES = {".db", ".sqlite", ".sqlite3"}
+
+# Columns mirror ToolRecord so new record fields are stored automatically
+COLUMNS: List[str] = [f.name for f in fields(ToolRecord)]
+_INTEGER_COLUMNS = {"lineno"}
+# Added when the records come from --call-graph; calls is stored as a JSON array of ids
+CALL_COLUMNS: List[str] = ["calls", "centrality"]
+FTS_COLUMNS = ("name", "signature", "doc_first_line")
+
+
+def _create_schema(conn: sqlite3.Connection, call_graph: bool) -> bool:
+    """Create the tables; return whether full-text search is available."""
+    column_defs = ", ".join(
+        f"{c} {'INTEGER' if c in _INTEGER_COLUMNS else 'TEXT'}" for c in COLUMNS
+    )
+    if call_graph:
+        column_defs += ", calls TEXT, centrality REAL"
+    conn.execute(f"CREATE TABLE tools (rowid INTEGER PRIMARY KEY, {column_defs})")
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+    try:
+        conn.execute(
+            f"CREATE VIRTUAL TABLE tools_fts USING fts5({', '.join(FTS_COLUMNS)}, "
+            "content='tools', content_rowid='rowid')"
+        )
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5; indexed lookups still work
+        return False
+    return True
+
+
+def _create_indexes(conn: sqlite3.Connection) -> None:
+    # Built after the bulk insert, which is considerably faster than maintaining them
+    # Not UNIQUE: a module may define the same function name more than once
+    conn.execute("CREATE INDEX idx_tools_id ON tools(id)")
+    conn.execute("CREATE INDEX idx_tools_module ON tools(module)")
+    conn.execute("CREATE INDEX idx_tools_name ON tools(name)")
+    conn.execute("CREATE INDEX idx_tools_module_name ON tools(module, name)")
+    conn.execute("CREATE INDEX idx_tools_origin ON tools(origin_id)")
+    conn.execute("CREATE INDEX idx_tools_parent ON tools(parent_id)")
+
+
+def write_sqlite(
+    records: Iterable[Dict[str, Any]],
+    path: Path,
+    stats: Optional[ExtractionStats] = None,
+) -> int:
+    """Write tool records to a fresh SQLite catalog at path; return the count.
+
+    Records are inserted as they arrive, so a streaming iterator (iter_tools)
+    keeps memory bounded. When the first record has ``calls`` and
+    ``centrality`` (``call_graph=True``), the table gets CALL_COLUMNS too.
+    Scan counters from ``stats`` are stored in the
+    ``meta`` table once all records are written. The database is built next
+    to its destination and moved into place atomically.
+    """
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    if tmp.exists():
+        tmp.unlink()
+    conn = sqlite3.connect(tmp)
+    try:
+        # A half-written temp file is discarded on failure, so durability is moot
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        records = iter(records)
+        first = next(records, None)
+        call_graph = first is not None and "calls" in first
+        has_fts = _create_schema(conn, call_graph)
+        columns = COLUMNS + CALL_COLUMNS if call_graph else COLUMNS
+        placeholders = ", ".join("?" for _ in columns)
+        insert = f"INSERT INTO tools ({', '.join(columns)}) VALUES ({placeholders})"
+        count = 0
+        batch: List[Tuple[Any, ...]] = []
+        for record in itertools.chain([first] if first is not None else [], records):
+            row = tuple(record.get(c) for c in COLUMNS)
+            if call_graph:
+                row += (json.dumps(record["calls"]), record["centrality"])
+            batch.append(row)
+            if len(batch) >= 5000:
+                conn.executemany(insert, batch)
+                count += len(batch)
+                batch = []
+        conn.executemany(insert, batch)
+        count += len(batch)
+
+        _create_indexes(conn)
+        if has_fts:
+            conn.execute("INSERT INTO tools_fts(tools_fts) VALUES ('rebuild')")
+
+        meta: Dict[str, Any] = asdict(stats) if stats is not None else {}
+        for reason, n in meta.pop("skip_reasons", {}).items():
+            meta[f"files_skipped.{reason}"] = n
+        for phase, entry in meta.pop("phases", {}).items():
+            for name, value in entry.items():
+                meta[f"phases.{phase}.{name}"] = value
+        meta["tools_found"] = count
+        meta["fts5"] = int(has_fts)
+        conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            [(k, str(v)) for k, v in meta.items()],
+        )
+        conn.commit()
+    except BaseException:
+        conn.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    conn.close()
+    os.replace(tmp, path)
+    return count
+
+
+class ToolCatalog:
+    """Read-only access to a SQLite tool catalog written by write_sqlite.
+
+    Lookups are indexed queries, so callers do not need to load the catalog
+    into memory. Records of a ``--call-graph`` catalog come back with their
+    ``calls`` and ``centrality``. Usable as a context manager.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        self._conn.row_factory = sqlite3.Row
+        present = {row["name"] for row in self._conn.execute("PRAGMA table_info(tools)")}
+        self._call_graph = all(c in present for c in CALL_COLUMNS)
+        self._columns = COLUMNS + CALL_COLUMNS if self._call_graph else COLUMNS
+        self._select = ", ".join(self._columns)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ToolCatalog":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _record(self, row: sqlite3.Row) -> Dict[str, Any]:
+        record = {c: row[c] for c in self._columns}
+        if self._call_graph:
+            record["calls"] = json.loads(record["calls"])
+        return record
+
+    def _rows(self, sql: str, params: Tuple[Any, ...] = ()) -> List[Dict[str, Any]]:
+        return [self._record(row) for row in self._conn.execute(sql, params)]
+
+    def meta(self) -> Dict[str, str]:
+        """Scan counters and catalog properties stored alongside the records."""
+        return dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+
+    def get(self, tool_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._rows(f"SELECT {self._select} FROM tools WHERE id = ?", (tool_id,))
+        return rows[0] if rows else None
+
+    def find(self, module: str, name: str) -> Optional[Dict[str, Any]]:
+        rows = self._rows(
+            f"SELECT {self._select} FROM tools WHERE module = ? AND name = ?", (module, name)
+        )
+        return rows[0] if rows else None
+
+    def by_module(self, module: str) -> List[Dict[str, Any]]:
+        return self._rows(
+            f"SELECT {self._select} FROM tools WHERE module = ? ORDER BY name", (module,)
+        )
+
+    def exposures(self, origin_id: str) -> List[Dict[str, Any]]:
+        """Every record exposing the definition origin_id, the definition included."""
+        return self._rows(
+            f"SELECT {self._select} FROM tools WHERE origin_id = ? ORDER BY id", (origin_id,)
+        )
+
+    def members(self, class_id: str) -> List[Dict[str, Any]]:
+        """Methods, properties and constructor listed under a class record."""
+        return self._rows(
+            f"SELECT {self._select} FROM tools WHERE parent_id = ? ORDER BY lineno, name", (class_id,)
+        )
+
+    def resolve(self, dotted: str) -> Optional[str]:
+        """Return the id of the tool whose ``module.name`` (or id) equals dotted.
+
+        Matches the map the linker builds from JSON catalogs: names may be
+        dotted themselves (``Class.method``), so every split of dotted into
+        module and name is tried, and of several matching records the one
+        written last wins.
+        """
+        parts = dotted.split(".")
+        pairs = [(".".join(parts[:i]), ".".join(parts[i:])) for i in range(len(parts))]
+        where = " OR ".join(["id = ?"] + ["(module = ? AND name = ?)"] * len(pairs))
+        row = self._conn.execute(
+            f"SELECT id FROM tools WHERE {where} ORDER BY rowid DESC LIMIT 1",
+            [dotted, *(value for pair in pairs for value in pair)],
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def ids_for_name(self, name: str) -> List[str]:
+        """Ids of every tool exposed under the given (unqualified) name, most central first if known."""
+        order = "centrality DESC, id" if self._call_graph else "id"
+        return [r[0] for r in self._conn.execute(f"SELECT id FROM tools WHERE name = ? ORDER BY {order}", (name,))]
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Full-text search over name, signature and doc_first_line, best first.
+
+        ``query`` uses FTS5 syntax. Falls back to a substring match on name and
+        doc_first_line when the catalog was built without FTS5.
+        """
+        cols = ", ".join(f"t.{c}" for c in self._columns)
+        if self.meta().get("fts5") == "1":
+            return self._rows(
+                f"SELECT {cols} FROM tools_fts JOIN tools t ON t.rowid = tools_fts.rowid "
+                "WHERE tools_fts MATCH ? ORDER BY rank LIMIT ?",
+                (query, limit),
+            )
+        like = f"%{query}%"
+        return self._rows(
+            f"SELECT {cols} FROM tools t WHERE t.name LIKE ? OR t.doc_first_line LIKE ? "
+            "ORDER BY t.module, t.name LIMIT ?",
+            (like, like, limit),
+        )
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        cursor = self._conn.execute(f"SELECT {self._select} FROM tools ORDER BY module, name")
+        for row in cursor:
+            yield self._record(row)
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM tools").fetchone()[0]
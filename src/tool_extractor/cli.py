@@ -1,12 +1,22 @@
 from __future__ import annotations
 
 import argparse
-import json
-import os
+import cProfile
+import sys
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional
 
-from .extractor import extract_tools
+from .archive import is_archive
+from .catalog import write_sqlite
+from .extractor import iter_tools
+from .guards import ParseLimits, add_limit_arguments
+from .metrics import PhaseClock, RunMeter
+from .models import ExtractionStats
+from .output import external_sort, write_json_array, write_jsonl, write_metrics, write_summary
+from .store import ToolStore
+
+
+_DEFAULT_OUT_NAMES = {"json": "tools.json", "jsonl": "tools.jsonl", "sqlite": "tools.db"}
 
 
 def _ensure_dir(path: Path) -> None:
@@ -14,46 +24,230 @@ def _ensure_dir(path: Path) -> None:
 
 
 def main(argv: List[str] | None = None) -> int:
-    parser = argparse.ArgumentParser(description="AST-based tool extractor (POC)")
-    parser.add_argument("--repo", required=True, help="Path to the target repository root")
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "batch":
+        from .batch import main as batch_main
+
+        return batch_main(argv[1:])
+    if argv and argv[0] == "timeline":
+        from .timeline import main as timeline_main
+
+        return timeline_main(argv[1:])
+    if argv and argv[0] == "diff":
+        from .diff import main as diff_main
+
+        return diff_main(argv[1:])
+    if argv and argv[0] == "cluster":
+        from .cluster import main as cluster_main
+
+        return cluster_main(argv[1:])
+
+    parser = argparse.ArgumentParser(
+        description="AST-based tool extractor (POC)",
+        epilog=(
+            "Subcommands: 'batch' extracts many repositories on a shared worker pool, 'timeline' extracts "
+            "a catalog per git tag and the API changes between them, 'diff' compares two catalogs, "
+            "'cluster' groups like tools (see '<subcommand> --help')."
+        ),
+    )
+    parser.add_argument(
+        "--repo",
+        required=True,
+        help="Path to the target repository root, or a .whl, sdist (.tar.gz) or .zip archive",
+    )
     parser.add_argument(
         "--out",
-        default=str(Path("artifacts") / "tools.json"),
-        help="Path to output JSON (default: artifacts/tools.json)",
+        default=None,
+        help="Path to output file (default: artifacts/tools.json, tools.jsonl or tools.db by --format)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to parse files (default: 1; 0 uses all CPUs)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for the per-file extraction cache (default: <out dir>/.tool_cache)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse every file and do not read or write the extraction cache",
+    )
+    parser.add_argument(
+        "--respect-gitignore",
+        action="store_true",
+        help="Skip files and directories ignored by the repository's .gitignore files",
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Parse only top-level statements and class headers; syntax errors inside function bodies go unnoticed",
+    )
+    parser.add_argument(
+        "--prefer-stubs",
+        action="store_true",
+        help="Also read .pyi stubs and take signatures from them instead of the .py file next to them",
+    )
+    add_limit_arguments(parser)
+    parser.add_argument(
+        "--git-rev",
+        default=None,
+        metavar="REV",
+        help="Extract from this git revision of --repo, read from the object store without a checkout",
+    )
+    parser.add_argument(
+        "--call-graph",
+        action="store_true",
+        help="Add to each record the tools its body calls and its centrality in the call graph",
+    )
+    parser.add_argument(
+        "--format",
+        choices=tuple(_DEFAULT_OUT_NAMES),
+        default="json",
+        help="Output format: a sorted JSON array (default), streamed JSON Lines, or an indexed SQLite catalog",
+    )
+    parser.add_argument(
+        "--sort",
+        action="store_true",
+        help="With --format jsonl, sort records by (module, name) using a bounded-memory external sort",
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        metavar="PATH",
+        help="Profile the run with cProfile and write pstats data to PATH (worker processes are not profiled)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and incrementally rewrite the JSON output whenever files change",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Polling interval in seconds for --watch (default: 1.0)",
     )
     args = parser.parse_args(argv)
+    limits = ParseLimits.from_args(args)
 
     repo_root = Path(args.repo)
-    if not repo_root.is_dir():
-        print(f"Error: --repo '{repo_root}' is not a directory or not accessible.")
+    archive = is_archive(repo_root)
+    if not repo_root.is_dir() and not archive:
+        print(f"Error: --repo '{repo_root}' is not a directory, a supported archive, or not accessible.")
         return 2
+    if archive and (args.watch or args.git_rev is not None):
+        print("Error: --watch and --git-rev need a directory, not an archive.")
+        return 2
+    if limits is not None and (archive or args.git_rev is not None):
+        print("Error: --max-file-size, --parse-timeout and --skip-generated need a directory.")
+        return 2
+    if args.workers < 0:
+        print(f"Error: --workers must be >= 0, got {args.workers}.")
+        return 2
+    if args.watch and args.format != "json":
+        print("Error: --watch only supports --format json.")
+        return 2
+    if args.watch and args.git_rev is not None:
+        print("Error: --watch reads the working tree and cannot be combined with --git-rev.")
+        return 2
+    if args.call_graph and (args.fast or args.watch):
+        print("Error: --call-graph cannot be combined with --fast or --watch.")
+        return 2
+    if args.git_rev is not None:
+        from .gitrev import resolve_tree
 
-    tools, files_scanned, files_skipped = extract_tools(str(repo_root))
-
-    # Deterministic ordering
-    tools_sorted: List[Dict[str, Any]] = sorted(tools, key=lambda r: (r["module"], r["name"]))
+        try:
+            resolve_tree(repo_root, args.git_rev)
+        except ValueError as exc:
+            print(f"Error: {exc}")
+            return 2
 
-    out_path = Path(args.out)
+    out_path = Path(args.out) if args.out else Path("artifacts") / _DEFAULT_OUT_NAMES[args.format]
     out_dir = out_path.parent
     _ensure_dir(out_dir)
 
-    # Write tools.json
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(tools_sorted, f, ensure_ascii=False, indent=2)
-
-    # Write summary next to the JSON output
-    summary_path = out_dir / "tools_summary.txt"
-    total_tools = len(tools_sorted)
-    summary_lines = [
-        f"Scanned files: {files_scanned}",
-        f"Files skipped: {files_skipped}",
-        f"Tools found: {total_tools}",
-        f"Output: {out_path}",
-    ]
-    with summary_path.open("w", encoding="utf-8") as f:
-        f.write("\n".join(summary_lines) + "\n")
-
-    print(f"Scanned {files_scanned} files, found {total_tools} tools, skipped {files_skipped} files")
+    cache_dir: Optional[str] = None
+    if not args.no_cache:
+        cache_dir = args.cache_dir or str(out_dir / ".tool_cache")
+
+    if args.watch:
+        from .watch import watch_tools
+
+        def _report(update: Dict[str, Any]) -> None:
+            print(
+                f"Updated {out_path}: {update['changed']} changed, {update['added']} added, "
+                f"{update['removed']} removed files; {update['tools']} tools ({update['seconds']}s)"
+            )
+
+        print(f"Watching {repo_root} (every {args.interval}s, Ctrl+C to stop)")
+        watch_tools(
+            str(repo_root),
+            out_path,
+            interval=args.interval,
+            workers=args.workers,
+            cache_dir=cache_dir,
+            respect_gitignore=args.respect_gitignore,
+            on_update=_report,
+            fast=args.fast,
+            prefer_stubs=args.prefer_stubs,
+            limits=limits,
+        )
+        return 0
+
+    stats = ExtractionStats()
+    meter = RunMeter()
+    clock = PhaseClock(stats.phases)
+    profiler: Optional[cProfile.Profile] = None
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    options = dict(
+        workers=args.workers,
+        cache_dir=cache_dir,
+        stats=stats,
+        respect_gitignore=args.respect_gitignore,
+        fast=args.fast,
+        git_rev=args.git_rev,
+        prefer_stubs=args.prefer_stubs,
+        limits=limits,
+        call_graph=args.call_graph,
+    )
+
+    if args.format == "jsonl":
+        # Stream records straight to disk; sorting is an opt-in external sort
+        records: Iterable[Dict[str, Any]] = iter_tools(str(repo_root), **options)
+        if args.sort:
+            records = external_sort(records)
+        total_tools = write_jsonl(clock.consumed(records, "output"), out_path)
+    elif args.format == "sqlite":
+        # Inserted in catalog order so the database content is deterministic
+        records = external_sort(iter_tools(str(repo_root), **options))
+        total_tools = write_sqlite(clock.consumed(records, "output"), out_path, stats)
+    else:
+        # Held in a ToolStore until every record is in, then written in catalog order
+        store = ToolStore.from_records(clock.consumed(iter_tools(str(repo_root), **options), "output"))
+        clock.start()
+        total_tools = write_json_array(store.iter_sorted(), out_path)
+        clock.lap("output")
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+    # Totals of the whole run, output included
+    meter.finish(stats)
+    # Write summary and metrics next to the output
+    write_summary(out_dir / "tools_summary.txt", stats, total_tools, cache_dir is not None, out_path)
+    write_metrics(out_dir / "tools_metrics.json", stats)
+
+    print(
+        f"Scanned {stats.files_scanned} files, found {total_tools} tools, "
+        f"skipped {stats.files_skipped} files"
+    )
     return 0
 
 
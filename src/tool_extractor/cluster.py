@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import random
+import re
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Sequence, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # the pure-Python path computes the same signatures, only slower
+    np = None  # type: ignore[assignment]
+
+from .diff import iter_catalog
+
+
+Record = Dict[str, Any]
+
+DEFAULT_THRESHOLD = 0.6
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+
+# Mersenne prime modulus of the permutations h(x) = (a * x + b) % P; with
+# 31-bit a and b and 32-bit token hashes x, a * x + b fits in a uint64
+_PRIME = (1 << 31) - 1
+# Buckets larger than this are verified against their first member only
+_MAX_BUCKET = 200
+# Definitions with fewer features (e.g. ``def __init__(self)``) say too little to be clustered
+_MIN_FEATURES = 3
+# Token hashes per vectorized block (num_perm x block uint64s at a time)
+_HASH_BLOCK = 1 << 16
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_SUBWORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+_STOPWORDS = frozenset(
+    "the and for with from that this are was were into onto over its their given return returns "
+    "of to in on a an or by as is be if it at".split()
+)
+_SKIPPED_PARAMS = frozenset(("self", "cls", "/", "*"))
+
+
+def _words(text: str) -> Iterable[str]:
+    """Lowercased sub-words of the identifiers in text (snake_case and CamelCase split)."""
+    for identifier in _IDENTIFIER.findall(text):
+        for word in _SUBWORD.findall(identifier):
+            yield word.lower()
+
+
+def _split_params(signature: str) -> Tuple[List[str], str]:
+    """(parameter texts, return annotation) of a rendered ``def f(a: int = ...) -> str``.
+
+    For ``class C(Base, metaclass=M)`` the "parameters" are the bases.
+    """
+    params: List[str] = []
+    start = signature.find("(") + 1
+    if not start:
+        return [], ""
+    depth = 0
+    for i, char in enumerate(signature[start - 1 :], start - 1):
+        if char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+            if depth == 0:
+                params.append(signature[start:i])
+                return [p.strip() for p in params if p.strip()], signature[i + 1 :].lstrip(" ->")
+        elif char == "," and depth == 1:
+            params.append(signature[start:i])
+            start = i + 1
+    return [], ""
+
+
+def tool_features(record: Record) -> FrozenSet[str]:
+    """What two like tools share: name words, parameter names, annotation and docstring words.
+
+    Signatures are normalized to the names of their parameters (``self``
+    and ``cls`` dropped, defaults ignored) and the identifiers of their
+    annotations (and of the bases of classes), so formatting, defaults and
+    ``async`` do not matter.
+    """
+    features = {f"n:{w}" for w in _words(record["name"].rsplit(".", 1)[-1])}
+    params, returns = _split_params(record["signature"])
+    # Catalogs written before records had a kind still render classes as ``class C(...)``
+    if record.get("kind", "class" if record["signature"].startswith("class ") else "function") == "class":
+        # Base classes say what a class is, like annotations do
+        features.update(f"t:{w}" for w in _words(" ".join(params)))
+        params = []
+    for param in params:
+        name, _, annotation = param.lstrip("*").partition(":")
+        name = name.split("=", 1)[0].strip()
+        if name and name not in _SKIPPED_PARAMS:
+            features.add(f"p:{name.lower()}")
+        features.update(f"t:{w}" for w in _words(annotation.split("=", 1)[0]))
+    features.update(f"t:{w}" for w in _words(returns))
+    features.update(
+        f"d:{w}" for w in re.findall(r"[a-z0-9]+", record["doc_first_line"].lower())
+        if len(w) > 1 and w not in _STOPWORDS
+    )
+    return frozenset(features)
+
+
+def _coefficients(num_perm: int, seed: int) -> Tuple[List[int], List[int]]:
+    rng = random.Random(seed)
+    return [rng.randrange(1, _PRIME) for _ in range(num_perm)], [rng.randrange(_PRIME) for _ in range(num_perm)]
+
+
+def minhash_signatures(token_sets: Sequence[Sequence[int]], num_perm: int, seed: int = 1) -> List[List[int]]:
+    """MinHash signature (num_perm minima) of each non-empty set of 32-bit token hashes.
+
+    With NumPy, every permutation is applied to a block of many sets' tokens
+    at once and the minima are taken per set with ``minimum.reduceat``;
+    without it, the same values are computed set by set.
+    """
+    a, b = _coefficients(num_perm, seed)
+    if np is None:
+        return [[min((ai * x + bi) % _PRIME for x in tokens) for ai, bi in zip(a, b)] for tokens in token_sets]
+
+    coef_a = np.array(a, dtype=np.uint64)[:, None]
+    coef_b = np.array(b, dtype=np.uint64)[:, None]
+    result = np.empty((len(token_sets), num_perm), dtype=np.uint64)
+    start = 0
+    while start < len(token_sets):
+        end, size = start, 0
+        while end < len(token_sets) and (end == start or size + len(token_sets[end]) <= _HASH_BLOCK):
+            size += len(token_sets[end])
+            end += 1
+        block = token_sets[start:end]
+        lengths = np.fromiter((len(tokens) for tokens in block), dtype=np.int64, count=len(block))
+        tokens = np.fromiter(itertools.chain.from_iterable(block), dtype=np.uint64, count=size)
+        hashed = (coef_a * tokens[None, :] + coef_b) % np.uint64(_PRIME)
+        offsets = np.concatenate((np.zeros(1, dtype=np.int64), np.cumsum(lengths)[:-1]))
+        result[start:end] = np.minimum.reduceat(hashed, offsets, axis=1).T
+        start = end
+    return result.tolist()
+
+
+def _jaccard(x: FrozenSet[str], y: FrozenSet[str]) -> float:
+    shared = len(x & y)
+    return shared / (len(x) + len(y) - shared)
+
+
+def cluster_tools(
+    catalogs: Sequence[Iterable[Record]],
+    threshold: float = DEFAULT_THRESHOLD,
+    num_perm: int = DEFAULT_NUM_PERM,
+    bands: int = DEFAULT_BANDS,
+) -> Dict[str, Any]:
+    """Group like tools of one or more catalogs into clusters.
+
+    Records exposing the same definition (same ``origin_id`` in the same
+    catalog, or the same id for records without one) count once. Each
+    definition is reduced to its tool_features, MinHashed, and the
+    signatures are cut into ``bands`` bands; definitions sharing a band
+    bucket are candidates, which are alike only if the exact Jaccard
+    similarity of their features is at least ``threshold``. The work is
+    linear in the number of definitions plus the candidate pairs; a bucket
+    of more than _MAX_BUCKET definitions is only compared with its first
+    member. Definitions with fewer than _MIN_FEATURES features are left out.
+
+    Clusters are stars rather than connected components, which chain
+    unrelated tools through intermediate ones: the definition with the most
+    alike neighbors becomes a center and takes those not yet in a cluster,
+    and so on; a definition whose neighbors are all taken joins the cluster
+    of the first one whose center it is alike to. Every member is thus
+    alike to its cluster's center.
+
+    Returns the counts and every cluster of two or more definitions, largest
+    first, with an id (``c0``, ``c1``, ...), its members as ``{"catalog":
+    index, "id": origin id}`` and a representative: the member exposed by
+    the most records, preferring documented ones. Definitions not listed
+    form a cluster of their own.
+    """
+    if num_perm < 1 or bands < 1:
+        raise ValueError(f"num_perm ({num_perm}) and bands ({bands}) must be positive")
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+    started = time.perf_counter()
+    # (catalog, origin id) -> index; records[index] is the definition's own record when listed
+    definitions: Dict[Tuple[int, str], int] = {}
+    records: List[Record] = []
+    exposures: List[int] = []
+    record_count = 0
+    for catalog, items in enumerate(catalogs):
+        for record in items:
+            record_count += 1
+            origin_id = record.get("origin_id") or record["id"]
+            key = (catalog, origin_id)
+            index = definitions.get(key)
+            if index is None:
+                definitions[key] = len(records)
+                records.append(record)
+                exposures.append(1)
+            else:
+                exposures[index] += 1
+                if record["id"] == origin_id:
+                    records[index] = record
+    keys = list(definitions)
+    features = [tool_features(r) for r in records]
+
+    signed = [i for i, f in enumerate(features) if len(f) >= _MIN_FEATURES]
+    signatures = minhash_signatures(
+        [[zlib.crc32(token.encode("utf-8")) for token in features[i]] for i in signed], num_perm
+    )
+    size = len(records)
+    compared: Set[int] = set()
+    neighbors: Dict[int, List[int]] = {}
+    rows = num_perm // bands
+    for band in range(bands):
+        buckets: Dict[int, List[int]] = {}
+        lo, hi = band * rows, (band + 1) * rows
+        for i, signature in zip(signed, signatures):
+            buckets.setdefault(hash(tuple(signature[lo:hi])), []).append(i)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            pairs = (
+                itertools.combinations(members, 2)
+                if len(members) <= _MAX_BUCKET
+                else ((members[0], j) for j in members[1:])
+            )
+            for i, j in pairs:
+                pair = i * size + j if i < j else j * size + i
+                if pair in compared:
+                    continue
+                compared.add(pair)
+                if _jaccard(features[i], features[j]) >= threshold:
+                    neighbors.setdefault(i, []).append(j)
+                    neighbors.setdefault(j, []).append(i)
+
+    center: Dict[int, int] = {}
+    groups: Dict[int, List[int]] = {}
+    for i in sorted(neighbors, key=lambda i: (-len(neighbors[i]), keys[i])):
+        if i in center:
+            continue
+        free = [j for j in neighbors[i] if j not in center]
+        if free:
+            groups[i] = [i, *free]
+            for j in groups[i]:
+                center[j] = i
+            continue
+        for j in neighbors[i]:
+            if _jaccard(features[i], features[center[j]]) >= threshold:
+                center[i] = center[j]
+                groups[center[j]].append(i)
+                break
+
+    def rank(i: int) -> Tuple[int, bool, Tuple[int, str]]:
+        return (-exposures[i], not records[i]["doc_first_line"], keys[i])
+
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda i: keys[i])
+        best = min(members, key=rank)
+        clusters.append((best, members))
+    clusters.sort(key=lambda c: (-len(c[1]), keys[c[0]]))
+
+    def ref(i: int) -> Dict[str, Any]:
+        return {"catalog": keys[i][0], "id": keys[i][1]}
+
+    return {
+        "params": {"threshold": threshold, "num_perm": num_perm, "bands": bands, "numpy": np is not None},
+        "counts": {
+            "records": record_count,
+            "definitions": len(records),
+            "candidate_pairs": len(compared),
+            "verified_pairs": sum(len(n) for n in neighbors.values()) // 2,
+            "clusters": len(clusters),
+            "clustered_definitions": sum(len(m) for _, m in clusters),
+        },
+        "seconds": round(time.perf_counter() - started, 3),
+        "clusters": [
+            {
+                "cluster_id": f"c{n}",
+                "representative": {
+                    **ref(best),
+                    "name": records[best]["name"],
+                    "signature": records[best]["signature"],
+                    "doc_first_line": records[best]["doc_first_line"],
+                },
+                "members": [ref(i) for i in members],
+            }
+            for n, (best, members) in enumerate(clusters)
+        ],
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tool_extractor cluster",
+        description="Group like tools of one or more catalogs with MinHash/LSH over signatures and docstrings",
+    )
+    parser.add_argument("catalogs", nargs="+", help="Catalogs (JSON, JSON Lines or SQLite), e.g. one per repository")
+    parser.add_argument("--out", default="artifacts/clusters.json", help="Where to write the clusters")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Feature Jaccard similarity at which two tools are alike (default: {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--num-perm", type=int, default=DEFAULT_NUM_PERM, help=f"MinHash permutations (default: {DEFAULT_NUM_PERM})"
+    )
+    parser.add_argument(
+        "--bands",
+        type=int,
+        default=DEFAULT_BANDS,
+        help=f"LSH bands; more bands find less similar candidates (default: {DEFAULT_BANDS})",
+    )
+    args = parser.parse_args(argv)
+
+    paths = [Path(p) for p in args.catalogs]
+    for path in paths:
+        if not path.is_file():
+            print(f"Error: catalog '{path}' is not a file or not accessible.")
+            return 2
+    if not 0 < args.threshold <= 1:
+        print(f"Error: --threshold must be in (0, 1], got {args.threshold}.")
+        return 2
+    if args.num_perm < 1:
+        print(f"Error: --num-perm must be > 0, got {args.num_perm}.")
+        return 2
+    if args.bands < 1:
+        print(f"Error: --bands must be > 0, got {args.bands}.")
+        return 2
+    try:
+        result = cluster_tools(
+            [iter_catalog(p) for p in paths], threshold=args.threshold, num_perm=args.num_perm, bands=args.bands
+        )
+    except (ValueError, KeyError, sqlite3.Error) as exc:
+        print(f"Error: {exc}")
+        return 2
+    result["catalogs"] = [str(p) for p in paths]
+
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open("w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    counts = result["counts"]
+    print(
+        f"{counts['clusters']} clusters of {counts['clustered_definitions']} like definitions "
+        f"among {counts['definitions']} ({counts['records']} records) in {result['seconds']}s; "
+        f"written to {out_path}"
+    )
+    return 0
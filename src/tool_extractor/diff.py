@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .catalog import SQLITE_SUFFIXES, ToolCatalog
+from .output import iter_json_array, iter_jsonl
+
+
+Record = Dict[str, Any]
+
+# A record that keeps these but changes id was moved, not removed and added
+_MOVE_FIELDS = ("name", "kind", "signature", "doc_first_line")
+# Where a definition sits; a record differing only in these was relocated, not changed
+_LOCATION_FIELDS = ("file", "lineno")
+
+
+def iter_catalog(path: Path) -> Iterator[Record]:
+    """Records of a catalog in any --format, read one at a time (chosen by suffix)."""
+    if path.suffix in SQLITE_SUFFIXES:
+        with ToolCatalog(path) as catalog:
+            yield from catalog
+    elif path.suffix == ".jsonl":
+        yield from iter_jsonl(path)
+    else:
+        yield from iter_json_array(path)
+
+
+def _digest(value: Any) -> bytes:
+    text = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def record_digest(record: Record) -> bytes:
+    """32-byte hash of a record, independent of key order.
+
+    The first 16 bytes cover its content (every field but _LOCATION_FIELDS:
+    signature, docstring line, kind, origin and so on), the last 16 its
+    location, so records that only moved within their file compare equal on
+    the first half.
+    """
+    content = {k: v for k, v in record.items() if k not in _LOCATION_FIELDS}
+    return _digest(content) + _digest([record.get(f) for f in _LOCATION_FIELDS])
+
+
+def _key(tool_id: str, occurrence: int) -> str:
+    # A module may define the same name twice; later occurrences get their own key
+    return tool_id if occurrence == 0 else f"{tool_id}\0{occurrence}"
+
+
+def _match(old: Dict[str, bytes], duplicates: Dict[str, int], tool_id: str) -> Optional[str]:
+    """Key of the first old record with this id not matched yet, or None."""
+    for occurrence in range(duplicates.get(tool_id, 1)):
+        key = _key(tool_id, occurrence)
+        if key in old:
+            return key
+    return None
+
+
+def _moves(removed: List[Record], added: List[Record]) -> Tuple[List[Dict[str, str]], List[Record], List[Record]]:
+    """Pair removed and added records with the same definition: (moves, still removed, still added)."""
+    candidates: Dict[Tuple[Any, ...], List[Record]] = {}
+    for record in reversed(added):
+        candidates.setdefault(tuple(record.get(f) for f in _MOVE_FIELDS), []).append(record)
+    moves: List[Dict[str, str]] = []
+    gone: List[Record] = []
+    moved_to = set()
+    for record in removed:
+        pending = candidates.get(tuple(record.get(f) for f in _MOVE_FIELDS))
+        if pending:
+            target = pending.pop()
+            moved_to.add(id(target))
+            moves.append({"from": record["id"], "to": target["id"]})
+        else:
+            gone.append(record)
+    return moves, gone, [r for r in added if id(r) not in moved_to]
+
+
+def diff_catalogs(old_path: Path, new_path: Path) -> Dict[str, Any]:
+    """The change set between two catalogs, keyed by record id.
+
+    Catalogs are streamed (see iter_catalog) and never held in memory: the
+    old one is read into a map from id to a 32-byte hash (record_digest), so
+    a record of the new catalog that did not change costs one hash and one
+    lookup. The old catalog is read a second time, only if something
+    changed, to fetch the previous values of changed and relocated records
+    and the removed ones. Records of the new catalog whose id is new are kept until
+    the end to detect moves: a removed and an added record with the same
+    name, kind, signature and docstring are reported as moved.
+
+    Returns counts plus the ids ``added`` and ``removed``, the ``moved``
+    pairs and, for ``changed`` ids, each differing field as [before, after].
+    Records whose content is the same and only ``file`` or ``lineno``
+    differ (code above them was edited) are listed apart, as ``relocated``,
+    in the same form; ``changed`` holds only records whose signature,
+    docstring line, kind, origin or other content differs. Lists follow
+    catalog order (old catalog order for removed, changed and relocated).
+    """
+    old: Dict[str, bytes] = {}
+    duplicates: Dict[str, int] = {}  # ids occurring more than once in the old catalog -> occurrences
+    old_count = 0
+    for record in iter_catalog(old_path):
+        old_count += 1
+        tool_id = record["id"]
+        key = tool_id
+        if key in old:
+            occurrence = duplicates.get(tool_id, 1)
+            duplicates[tool_id] = occurrence + 1
+            key = _key(tool_id, occurrence)
+        old[key] = record_digest(record)
+
+    added: List[Record] = []
+    changed_to: Dict[str, Record] = {}
+    relocated_to: Dict[str, Record] = {}
+    new_count = unchanged = 0
+    for record in iter_catalog(new_path):
+        new_count += 1
+        key = _match(old, duplicates, record["id"])
+        if key is None:
+            added.append(record)
+            continue
+        before, after = old.pop(key), record_digest(record)
+        if before == after:
+            unchanged += 1
+        elif before[:16] == after[:16]:
+            relocated_to[key] = record
+        else:
+            changed_to[key] = record
+
+    removed: List[Record] = []
+    changed: List[Dict[str, Any]] = []
+    relocated: List[Dict[str, Any]] = []
+    if old or changed_to or relocated_to:
+        # Left in ``old``: keys of removed records
+        occurrences: Dict[str, int] = {}
+        for record in iter_catalog(old_path):
+            tool_id = record["id"]
+            occurrence = 0
+            if tool_id in duplicates:
+                occurrence = occurrences.get(tool_id, 0)
+                occurrences[tool_id] = occurrence + 1
+            key = _key(tool_id, occurrence)
+            if key in old:
+                removed.append(record)
+                continue
+            for bucket, targets in ((changed, changed_to), (relocated, relocated_to)):
+                after = targets.get(key)
+                if after is not None:
+                    fields = {
+                        f: [record.get(f), after.get(f)]
+                        for f in dict.fromkeys([*record, *after])
+                        if record.get(f) != after.get(f)
+                    }
+                    bucket.append({"id": tool_id, "fields": fields})
+
+    moved, removed, added = _moves(removed, added)
+    return {
+        "old": str(old_path),
+        "new": str(new_path),
+        "counts": {
+            "old": old_count,
+            "new": new_count,
+            "unchanged": unchanged,
+            "added": len(added),
+            "removed": len(removed),
+            "moved": len(moved),
+            "changed": len(changed),
+            "relocated": len(relocated),
+        },
+        "added": [r["id"] for r in added],
+        "removed": [r["id"] for r in removed],
+        "moved": moved,
+        "changed": changed,
+        "relocated": relocated,
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tool_extractor diff",
+        description="Compare two tool catalogs (JSON, JSON Lines or SQLite) by record id",
+    )
+    parser.add_argument("old", help="The earlier catalog")
+    parser.add_argument("new", help="The later catalog")
+    parser.add_argument("--out", default=None, help="Write the change set to this file instead of stdout")
+    parser.add_argument(
+        "--exit-code",
+        action="store_true",
+        help="Exit with 1 if the catalogs differ (like 'git diff --exit-code')",
+    )
+    args = parser.parse_args(argv)
+
+    old_path, new_path = Path(args.old), Path(args.new)
+    for path in (old_path, new_path):
+        if not path.is_file():
+            print(f"Error: catalog '{path}' is not a file or not accessible.", file=sys.stderr)
+            return 2
+    try:
+        changes = diff_catalogs(old_path, new_path)
+    except (ValueError, KeyError, sqlite3.Error) as exc:
+        print(f"Error: cannot read catalogs: {exc}", file=sys.stderr)
+        return 2
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(changes, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+    else:
+        json.dump(changes, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    counts = changes["counts"]
+    print(
+        f"+{counts['added']} -{counts['removed']} moved {counts['moved']} changed {counts['changed']} "
+        f"relocated {counts['relocated']} ({counts['unchanged']} of {counts['new']} unchanged)",
+        file=sys.stderr,
+    )
+    differ = counts["added"] or counts["removed"] or counts["moved"] or counts["changed"] or counts["relocated"]
+    return 1 if args.exit_code and differ else 0
@@ -1,26 +1,52 @@
 from __future__ import annotations
 
 import ast
-from collections import defaultdict
+import builtins
+import functools
+import itertools
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Set, Tuple, Dict, Any
+from typing import List, Optional, Set, Tuple, Dict, Any, Callable, Iterable, Iterator, Union
 
-from .filesystem import discover_python_files
-from .models import ToolRecord
+from .cache import BlobCache, ContentKey, SummaryCache, content_key
+from .filesystem import discover_python_files, is_package_init
+from .guards import ParseLimits, run_isolated, skip_reason
+from .metrics import PhaseClock, Phases, RunMeter
+from .models import DefinitionSummary, ExtractionStats, FileSummary
+from .scanner import reduce_source
+from .synthesis import _synthesize_tools
 
 
-def _read_and_parse(path: Path) -> Tuple[Optional[str], Optional[ast.Module]]:
-    """Read a file and return (source_text, parsed_ast_module).
+# Texts read ahead of the process pool at a time by summarize_contents and
+# _iter_file_summaries, which bounds memory
+_CONTENT_CHUNK = 256
 
-    Returns (None, None) on I/O, decoding, or syntax errors so callers can
-    count the file as skipped without raising.
-    """
+
+def _read_source(path: Path) -> Optional[str]:
+    """Read a file as UTF-8 text; None on I/O or decoding errors."""
     try:
-        text = path.read_text(encoding="utf-8")
+        return path.read_text(encoding="utf-8")
     except (OSError, UnicodeDecodeError):
-        return None, None
+        return None
+
+
+def _decode_source(data: bytes) -> Optional[str]:
+    """Decode raw file contents exactly like _read_source reads them from disk."""
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    # read_text translates newlines like open() in text mode does
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _parse(text: str, filename: str) -> Tuple[Optional[str], Optional[ast.Module]]:
+    """Return (source_text, parsed_ast_module), or (None, None) on syntax errors."""
     try:
-        module = ast.parse(text, filename=str(path))
+        module = ast.parse(text, filename=filename)
     except SyntaxError:
         return None, None
     return text, module
@@ -54,21 +80,105 @@ def _extract_literal_all(module: ast.Module) -> Set[str]:
     return names
 
 
-def _extract_top_level_functions(module: ast.Module) -> List[ast.AST]:
-    """Return top-level function and async function definitions from a module."""
+def _extract_top_level_definitions(module: ast.Module) -> List[ast.AST]:
+    """Return top-level function, async function and class definitions in source order."""
     return [
         n
         for n in module.body
-        if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))
+        if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
     ]
 
 
+# Decorators that change how a method is exposed; matched on the last name
+# component so 'functools.cached_property' counts as well
+_MEMBER_KINDS = {
+    "classmethod": "classmethod",
+    "staticmethod": "staticmethod",
+    "property": "property",
+    "cached_property": "property",
+}
+# Accessors of an already listed property, and typing stubs of the real method
+_SKIPPED_DECORATORS = {"setter", "getter", "deleter", "overload"}
+
+
+def _decorator_name(node: ast.AST) -> Optional[str]:
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def _is_skipped(fn: ast.AST) -> bool:
+    """Whether a function or method is a property accessor or an @overload stub."""
+    return any(_decorator_name(decorator) in _SKIPPED_DECORATORS for decorator in fn.decorator_list)
+
+
+def _member_kind(fn: ast.AST) -> Optional[str]:
+    """Kind of a method from its decorators; None if it should not be listed."""
+    if _is_skipped(fn):
+        return None
+    kind = "method"
+    for decorator in fn.decorator_list:
+        kind = _MEMBER_KINDS.get(_decorator_name(decorator), kind)
+    return kind
+
+
+def _is_public_member(name: str) -> bool:
+    """Public methods plus the constructor; other dunders are protocol plumbing."""
+    return not name.startswith("_") or name == "__init__"
+
+
 def _is_public(name: str, literal_all: Set[str]) -> bool:
     """Heuristic publicness: not leading underscore unless present in __all__."""
     return (not name.startswith("_")) or (name in literal_all)
 
 
-def _get_annotation_text(source: str, annotation: Optional[ast.AST]) -> Optional[str]:
+class _SourceIndex:
+    """Line-offset table over a file's source for cheap node segment slicing.
+
+    ``ast.get_source_segment`` re-splits the whole source on every call, which
+    makes annotation extraction O(annotations x file size). Here line starts are
+    computed once per file (splitting on CR, LF and CRLF like the stdlib) and
+    each segment is a direct slice. AST column offsets are UTF-8 byte offsets,
+    so non-ASCII lines are converted through their encoding.
+    """
+
+    _LINE_BREAK = re.compile(r"\r\n?|\n")
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.line_starts: List[int] = [0]
+        self.line_starts.extend(m.end() for m in self._LINE_BREAK.finditer(source))
+
+    def _char_offset(self, lineno: int, byte_col: int) -> int:
+        """Absolute character offset of a (1-based line, byte column) position."""
+        starts = self.line_starts
+        start = starts[lineno - 1]
+        if byte_col == 0:
+            return start
+        end = starts[lineno] if lineno < len(starts) else len(self.source)
+        line = self.source[start:end]
+        if line.isascii():
+            return start + byte_col
+        return start + len(line.encode("utf-8")[:byte_col].decode("utf-8"))
+
+    def segment(self, node: ast.AST) -> Optional[str]:
+        """Return the exact source text of node, like ast.get_source_segment."""
+        end_lineno = getattr(node, "end_lineno", None)
+        end_col_offset = getattr(node, "end_col_offset", None)
+        if end_lineno is None or end_col_offset is None:
+            return None
+        if node.lineno > len(self.line_starts) or end_lineno > len(self.line_starts):
+            return None
+        start = self._char_offset(node.lineno, node.col_offset)
+        end = self._char_offset(end_lineno, end_col_offset)
+        return self.source[start:end]
+
+
+def _get_annotation_text(source: _SourceIndex, annotation: Optional[ast.AST]) -> Optional[str]:
     """Render an annotation AST back to text.
 
     Preference order:
@@ -80,7 +190,7 @@ def _get_annotation_text(source: str, annotation: Optional[ast.AST]) -> Optional
         return None
     # Prefer exact source segment
     try:
-        seg = ast.get_source_segment(source, annotation)
+        seg = source.segment(annotation)
         if seg:
             return seg.strip()
     except Exception:
@@ -102,13 +212,39 @@ def _format_param(name: str, ann: Optional[str], default: bool) -> str:
     return base
 
 
-def _render_signature(fn: ast.AST, source: str) -> str:
+def _doc_first_line(node: ast.AST) -> str:
+    """First line of the cleaned docstring without cleaning the whole docstring.
+
+    Equal to ``ast.get_docstring(node, clean=True).strip().splitlines()[0]``:
+    cleaning only removes indentation, which the strip discards anyway, so the
+    raw docstring can skip the per-line work of ``inspect.cleandoc``.
+    """
+    doc = ast.get_docstring(node, clean=False)
+    if not doc:
+        return ""
+    lines = doc.expandtabs().strip().splitlines()
+    return lines[0] if lines else ""
+
+
+def _render_class_signature(cls: ast.ClassDef, source: _SourceIndex) -> str:
+    """Render 'class Name(Base, metaclass=Meta)' with bases as written in the source."""
+    parts = [_get_annotation_text(source, base) or "..." for base in cls.bases]
+    for kw in cls.keywords:
+        value = _get_annotation_text(source, kw.value) or "..."
+        parts.append(f"{kw.arg}={value}" if kw.arg else f"**{value}")
+    if parts:
+        return f"class {cls.name}({', '.join(parts)})"
+    return f"class {cls.name}"
+
+
+def _render_signature(fn: ast.AST, source: _SourceIndex) -> str:
     """Reconstruct a Python signature string from a FunctionDef/AsyncFunctionDef.
 
     Handles all parameter kinds (positional-only, positional-or-keyword, var-positional,
     keyword-only, var-keyword) and aligns defaults according to the AST's defaults
     layout. Inserts '/' for positional-only and '*' when needed for keyword-only
-    parameters. Preserves annotation text using source segments when possible.
+    parameters. Preserves annotation text using source segments when possible,
+    sliced through the file's precomputed _SourceIndex.
     """
     assert isinstance(fn, (ast.FunctionDef, ast.AsyncFunctionDef))
     args = fn.args
@@ -166,59 +302,620 @@ def _render_signature(fn: ast.AST, source: str) -> str:
     return f"{kind} {fn.name}({params_rendered})"
 
 
-def _normalize_module_name(mod: str) -> str:
-    """Normalize module names for src-layout and future rules.
+# Calls to these are not recorded unless the module defines the name itself
+_BUILTIN_NAMES = frozenset(dir(builtins))
 
-    Current rules:
-    - Strip leading 'src.' if present.
+
+def _bind_import(node: ast.AST, names: Dict[str, str]) -> None:
+    """Add the names an import statement binds to ``names`` (local name -> dotted target).
+
+    Relative targets keep their leading dots (``from .core import run`` binds
+    'run' to '.core.run'); they are resolved against the module at merge time.
     """
-    if mod.startswith("src."):
-        mod = mod[len("src.") :]
-    return mod
+    if isinstance(node, ast.Import):
+        for n in node.names:
+            if n.asname:
+                names[n.asname] = n.name
+            else:
+                root = n.name.partition(".")[0]
+                names[root] = root
+    elif isinstance(node, ast.ImportFrom):
+        prefix = "." * (node.level or 0) + (f"{node.module}." if node.module else "")
+        for n in node.names:
+            if n.name != "*":
+                names[n.asname or n.name] = prefix + n.name
+
+
+def _module_imports(body: List[ast.stmt]) -> Dict[str, str]:
+    """Names bound by module-level imports, including those under if/try blocks."""
+    names: Dict[str, str] = {}
+    stack: List[ast.AST] = list(reversed(body))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            _bind_import(node, names)
+        elif not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            children = [c for c in ast.iter_child_nodes(node) if isinstance(c, (ast.stmt, ast.excepthandler))]
+            stack.extend(reversed(children))
+    return names
 
 
-def _module_name_for(file_path: Path, repo_root: Path) -> str:
-    """Compute the dotted module name for a file under the repository root.
+def _called_names(fn: ast.AST, imports: Dict[str, str], defined: Set[str], owner: Optional[str] = None) -> List[str]:
+    """Dotted names a function body calls, in order of first call.
 
-    - Produces src-layout aware names (e.g., strips trailing '.__init__').
-    - Normalizes with _normalize_module_name for consistency across layouts.
+    Calls are resolved like task_extractor.linker._extract_call_dotted: the
+    root of ``f(...)`` or ``np.linalg.norm(...)`` is replaced by what the
+    module, or the function itself, imported under that name; ``self`` and
+    ``cls`` become the enclosing class ``owner``. Other plain names are kept
+    as they are, to be looked up in the module at merge time. Attribute calls
+    on anything else (locals, parameters, call results) cannot be resolved
+    statically and are dropped, as are builtins the module does not redefine.
     """
-    rel = file_path.relative_to(repo_root).as_posix()
-    mod = rel[:-3].replace("/", ".")  # strip .py
-    if mod.endswith(".__init__"):
-        mod = mod[: -len(".__init__")]
-    return _normalize_module_name(mod)
+    names = imports
+    found: List[ast.Call] = []
+    for stmt in fn.body:
+        for node in ast.walk(stmt):
+            if isinstance(node, ast.Call):
+                found.append(node)
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                if names is imports:
+                    names = dict(imports)
+                _bind_import(node, names)
+    calls: Dict[str, None] = {}
+    for call in found:
+        attrs: List[str] = []
+        func = call.func
+        while isinstance(func, ast.Attribute):
+            attrs.append(func.attr)
+            func = func.value
+        if not isinstance(func, ast.Name):
+            continue
+        root = func.id
+        if root in names:
+            root = names[root]
+        elif owner is not None and root in ("self", "cls"):
+            root = owner
+        elif root not in defined and (attrs or root in _BUILTIN_NAMES):
+            continue
+        calls[".".join([root, *reversed(attrs)])] = None
+    return list(calls)
 
 
-def _resolve_relative_module(current_module: str, module: Optional[str], level: int) -> str:
-    """Resolve a relative import target to an absolute dotted path.
+def _summarize_module(module: ast.Module, source: str, is_package_init: bool, calls: bool = False) -> FileSummary:
+    """Collect the Pass-1 facts for one parsed file into a FileSummary.
+
+    Only public top-level functions and classes (with their public methods,
+    classmethods, staticmethods, properties and constructor) are kept, with
+    signatures rendered while the AST is at hand so the summary no longer needs
+    the source or AST. @overload stubs and property accessors are left out at
+    both levels (see _SKIPPED_DECORATORS). Re-exports and subpackage
+    aliases are recorded for package ``__init__`` files only, star imports for
+    every file; relative targets are kept unresolved and resolved against the
+    module name at merge time. With ``calls``, functions and methods also
+    carry the names their bodies call (see _called_names).
+    """
+    literal_all = _extract_literal_all(module)
+    summary = FileSummary(literal_all=sorted(literal_all))
+    index = _SourceIndex(source)
+    tops = _extract_top_level_definitions(module)
+    imports = _module_imports(module.body) if calls else {}
+    defined = {node.name for node in tops}
 
-    Parameters
-    - current_module: The dotted path of the module performing the import
-      (e.g., 'pkg.subpkg.__init__' caller context already normalized upstream).
-    - module: The 'from X import ...' target (can be None for 'from . import ...').
-    - level: The number of leading dots indicating relative depth.
+    for node in tops:
+        if not _is_public(node.name, literal_all):
+            continue
+        if not isinstance(node, ast.ClassDef):
+            if _is_skipped(node):
+                continue
+            summary.defs.append(DefinitionSummary(
+                name=node.name,
+                signature=_render_signature(node, index),
+                doc_first_line=_doc_first_line(node),
+                lineno=node.lineno,
+                calls=_called_names(node, imports, defined) if calls else [],
+            ))
+            continue
+        members: List[DefinitionSummary] = []
+        for fn in node.body:
+            if not isinstance(fn, (ast.FunctionDef, ast.AsyncFunctionDef)) or not _is_public_member(fn.name):
+                continue
+            kind = _member_kind(fn)
+            if kind is None:
+                continue
+            members.append(DefinitionSummary(
+                name=fn.name,
+                signature=_render_signature(fn, index),
+                doc_first_line=_doc_first_line(fn),
+                lineno=fn.lineno,
+                kind=kind,
+                calls=_called_names(fn, imports, defined, node.name) if calls else [],
+            ))
+        summary.defs.append(DefinitionSummary(
+            name=node.name,
+            signature=_render_class_signature(node, index),
+            doc_first_line=_doc_first_line(node),
+            lineno=node.lineno,
+            kind="class",
+            members=members,
+        ))
 
-    The algorithm climbs 'level-1' parents from current_module, then appends the
-    explicit 'module' if provided. For 'from . import subpkg as alias', module is
-    None and we return the package prefix for alias handling at the call site.
+    for node in module.body:
+        if not isinstance(node, ast.ImportFrom):
+            # Direct 'import' rarely used for local re-exports; ignore for now
+            continue
+        level = node.level or 0
+        if node.names[0].name == "*":
+            # Any module may re-export by star; chains are followed at merge time
+            summary.star_imports.append((node.module, level))
+        elif not is_package_init:
+            continue
+        elif node.module is None and level > 0:
+            # from . import subpkg as alias
+            for n in node.names:
+                summary.aliases.append((n.asname or n.name, n.name))
+        else:
+            # from X import a as b
+            for n in node.names:
+                summary.exports.append((node.module, level, n.name, n.asname or n.name))
+    return summary
+
+
+def _fast_parse(text: str, filename: str) -> Tuple[Optional[str], Optional[ast.Module]]:
+    """Like _parse, but parse only what reduce_source keeps.
+
+    Function and method bodies are never parsed, so a syntax error inside one
+    goes unnoticed. Falls back to a full parse when the scanner cannot handle
+    the file or the reduced text does not parse.
     """
-    # Resolve relative import target to absolute dotted path
-    if level <= 0:
-        return module or current_module
-    parts = current_module.split(".")
-    # If importing from a package __init__, current_module is the package path
-    base = parts[: len(parts) - level + 1] if level > 0 else parts
-    prefix = ".".join([p for p in base if p])
-    if module:
-        if prefix:
-            return f"{prefix}.{module}"
-        return module
-    return prefix
-
-
-def extract_tools(repo_path: str) -> Tuple[List[Dict[str, Any]], int, int]:
-    """Extract public top-level functions and their public API exposure.
+    reduced = reduce_source(text)
+    if reduced is not None:
+        try:
+            return reduced, ast.parse(reduced, filename=filename)
+        except SyntaxError:
+            pass
+    return _parse(text, filename)
+
+
+def _summarize_source(
+    text: Optional[str],
+    filename: str,
+    is_package_init: bool,
+    fast: bool = False,
+    clock: Optional[PhaseClock] = None,
+    calls: bool = False,
+) -> Optional[FileSummary]:
+    """Parse and summarize one file's text; None if it must be skipped.
+
+    ``text`` is None for files that could not be read or decoded. ``fast``
+    parses through the top-level scanner (see _fast_parse); ``calls`` is
+    passed on to _summarize_module. A ``clock`` is charged with the "parse"
+    and "render" (collection and signature rendering) phases.
+    """
+    if text is None:
+        return None
+    source, module = _fast_parse(text, filename) if fast else _parse(text, filename)
+    if clock is not None:
+        clock.lap("parse")
+    if module is None or source is None:
+        return None
+    summary = _summarize_module(module, source, is_package_init, calls)
+    if clock is not None:
+        clock.lap("render")
+    return summary
+
+
+def _summarize_file(
+    path: Path, fast: bool = False, clock: Optional[PhaseClock] = None, calls: bool = False
+) -> Optional[FileSummary]:
+    """Read, parse and summarize a single file; None if it must be skipped.
+
+    This is the unit of work shipped to worker processes in parallel mode, so it
+    takes and returns only picklable values. A ``clock`` is charged with the
+    "read" phase and those of _summarize_source.
+    """
+    text = _read_source(path)
+    if clock is not None:
+        clock.lap("read")
+    return _summarize_source(text, str(path), is_package_init(path.name), fast, clock, calls)
+
+
+def _summarize_source_timed(
+    text: Optional[str], filename: str, is_package_init: bool, fast: bool = False, calls: bool = False
+) -> Tuple[Optional[FileSummary], Phases]:
+    """_summarize_source plus the time it spent per phase."""
+    clock = PhaseClock()
+    return _summarize_source(text, filename, is_package_init, fast, clock, calls), clock.phases
+
+
+def _parse_guarded(
+    file: Path,
+    text: Optional[str],
+    fast: bool,
+    limits: ParseLimits,
+    clock: Optional[PhaseClock] = None,
+    calls: bool = False,
+) -> Tuple[Optional[str], Optional[FileSummary]]:
+    """(None, summary) for a file that passed limits.check, or (skip reason, None) if it timed out.
+
+    ``text`` is the file's source as already read (see _FileTriage.check).
+    Files the limits isolate are parsed by run_isolated under the time
+    budget; the phases of a child that finished are merged into ``clock``.
+    The time spent waiting on one that did not is charged to "parse" (the
+    caller starts ``clock``).
+    """
+    args = (text, str(file), is_package_init(file.name), fast)
+    if limits.isolates(file):
+        assert limits.timeout is not None
+        reason, result = run_isolated(_summarize_source_timed, args + (calls,), limits.timeout)
+        if result is None:
+            if clock is not None:
+                clock.lap("parse")
+            return reason, None
+        summary, phases = result
+        if clock is not None:
+            clock.merge(phases)
+        return None, summary
+    return None, _summarize_source(*args, clock=clock, calls=calls)
+
+
+def _summarize_guarded(file: Path, fast: bool, limits: ParseLimits) -> Tuple[Optional[str], Optional[FileSummary]]:
+    """Pass 1 for one file under ``limits``: (None, summary), or (skip reason, None)."""
+    reason = limits.check(file)
+    if reason is not None:
+        return reason, None
+    reason, summary = _parse_guarded(file, _read_source(file), fast, limits)
+    if reason is None and summary is None:
+        reason = skip_reason(file)
+    return reason, summary
+
+
+@dataclass
+class _Verdict:
+    """What _FileTriage.check decided for a file before parsing.
+
+    ``action`` is "done" when the outcome is known without parsing (its
+    ``summary``, or the skip ``reason`` of a file turned away), "wait" for a
+    copy of content that is being parsed (see _FileTriage.copied), and
+    "parse" otherwise, with the ``text`` to parse (None if the file cannot
+    be read or decoded).
+    """
+
+    action: str
+    summary: Optional[FileSummary] = None
+    reason: Optional[str] = None
+    content: Optional[Tuple[ContentKey, int]] = None
+    text: Optional[str] = None
+
+
+class _FileTriage:
+    """Pass-1 bookkeeping around parsing files, shared by _iter_file_summaries and batch.run_batch.
+
+    ``check`` settles a file without parsing it where it can: files the
+    ``limits`` turn away, files with a valid entry in their cache, and copies
+    of content already summarized in the run (or cached under another path),
+    which count as deduplicated. The content key of every other file is
+    marked in flight, so its copies wait for ``parsed`` instead of being
+    parsed again; a content whose parse timed out is skipped for its copies
+    too, with the same reason. One triage can serve several repositories,
+    each with its own cache and stats.
+
+    A file is read once: the bytes that are hashed are also decoded for
+    parsing (see _decode_source).
+    """
+
+    def __init__(self, limits: Optional[ParseLimits] = None) -> None:
+        self.limits = limits if limits is not None else ParseLimits()
+        self.seen: Dict[ContentKey, Optional[FileSummary]] = {}
+        self.failed: Dict[ContentKey, str] = {}
+        self.in_flight: Set[ContentKey] = set()
+
+    def check(
+        self,
+        file: Path,
+        cache: Optional[SummaryCache],
+        stats: ExtractionStats,
+        clock: Optional[PhaseClock] = None,
+    ) -> _Verdict:
+        """Settle ``file`` or tell how to go on; ``clock`` is charged with "read" and "cache" (the rest)."""
+        if clock is None:
+            clock = PhaseClock()
+        reason = self.limits.check(file)
+        if reason is not None:
+            clock.lap("cache")
+            return _Verdict("done", reason=reason)
+        if cache is not None:
+            hit, summary = cache.lookup(file)
+            if hit:
+                clock.lap("cache")
+                return _Verdict("done", summary=summary)
+        clock.lap("cache")
+        try:
+            data = file.read_bytes()
+        except OSError:
+            clock.lap("read")
+            return _Verdict("parse")
+        clock.lap("read")
+        content = content_key(file, data)
+        assert content is not None
+        key = content[0]
+        if key in self.in_flight:
+            clock.lap("cache")
+            return _Verdict("wait", content=content)
+        if key not in self.seen and key not in self.failed:
+            hit, summary = cache.lookup_content(key) if cache is not None else (False, None)
+            if not hit:
+                self.in_flight.add(key)
+                clock.lap("cache")
+                text = _decode_source(data)
+                clock.lap("read")
+                return _Verdict("parse", content=content, text=text)
+            self.seen[key] = summary
+        summary, reason = self.copied(file, content, cache, stats)
+        clock.lap("cache")
+        return _Verdict("done", summary=summary, reason=reason)
+
+    def copied(
+        self,
+        file: Path,
+        content: Tuple[ContentKey, int],
+        cache: Optional[SummaryCache],
+        stats: ExtractionStats,
+    ) -> Tuple[Optional[FileSummary], Optional[str]]:
+        """(summary, None) for a copy of summarized content, or (None, skip reason) if that content timed out."""
+        key, size = content
+        reason = self.failed.get(key)
+        if reason is not None:
+            return None, reason
+        summary = self.seen[key]
+        stats.files_deduplicated += 1
+        stats.bytes_deduplicated += size
+        if cache is not None:
+            cache.store(file, summary, key[0])
+        return summary, None
+
+    def parsed(
+        self,
+        file: Path,
+        content: Optional[Tuple[ContentKey, int]],
+        summary: Optional[FileSummary],
+        reason: Optional[str],
+        cache: Optional[SummaryCache],
+    ) -> None:
+        """Record the result of a file check() sent to "parse"; ``reason`` if it timed out (not cached)."""
+        if content is not None:
+            key = content[0]
+            self.in_flight.discard(key)
+            if reason is None:
+                self.seen[key] = summary
+            else:
+                self.failed[key] = reason
+        if reason is None and cache is not None:
+            cache.store(file, summary, content[0][0] if content is not None else None)
+
+
+def _iter_file_summaries(
+    files: Iterable[Path],
+    workers: int,
+    cache: Optional[SummaryCache] = None,
+    fast: bool = False,
+    stats: Optional[ExtractionStats] = None,
+    limits: Optional[ParseLimits] = None,
+    skipped: Optional[Dict[Path, str]] = None,
+    calls: bool = False,
+) -> Iterator[Tuple[Path, Optional[FileSummary]]]:
+    """Yield (file, summary) pairs in input order, parsing in parallel if requested.
+
+    Files with a valid entry in ``cache`` are not parsed at all; fresh results
+    are stored back into it. Every other file is read and hashed once, and a
+    file whose content key (see cache.content_key) was already summarized in
+    this run, or is cached under another path, reuses that summary; ``stats``
+    receives the counts (see _FileTriage). With workers <= 1 the remaining
+    files are parsed in-process from the text read. Otherwise a process pool
+    parses the texts, read a bounded window of files ahead, and results are
+    consumed in submission order, so the merged output is identical to the
+    serial path. ``fast`` and ``calls`` are passed on to _summarize_source.
+
+    ``limits`` (see guards.ParseLimits) are applied before the cache: files
+    they turn away are neither parsed nor cached, and files they isolate are
+    parsed in a killable process of their own, from this process, while the
+    pool works on the rest. Timed-out files are not cached either, so a later
+    run with a larger budget tries again. The reason each file without a
+    summary was skipped is counted in ``stats.skip_reasons`` and, if given,
+    recorded in ``skipped``.
+
+    Time spent is charged to ``stats.phases``: "cache" for limit checks,
+    cache lookups and content hashing, "read" for reading and decoding, and
+    "parse" and "render" for Pass 1 proper, wherever it runs.
+    """
+    if stats is None:
+        stats = ExtractionStats()
+    triage = _FileTriage(limits)
+    clock = PhaseClock(stats.phases)
+
+    def _guarded(file: Path, verdict: _Verdict) -> Tuple[Optional[FileSummary], Optional[str]]:
+        clock.start()
+        reason, summary = _parse_guarded(file, verdict.text, fast, triage.limits, clock, calls)
+        triage.parsed(file, verdict.content, summary, reason, cache)
+        return summary, reason
+
+    def _result(
+        file: Path, summary: Optional[FileSummary], reason: Optional[str]
+    ) -> Tuple[Path, Optional[FileSummary]]:
+        if summary is None:
+            reason = reason or skip_reason(file)
+            stats.count_skip(reason)
+            if skipped is not None:
+                skipped[file] = reason
+        return file, summary
+
+    if workers <= 1:
+        for file in files:
+            clock.start()
+            verdict = triage.check(file, cache, stats, clock)
+            if verdict.action == "done":
+                yield _result(file, verdict.summary, verdict.reason)
+            else:
+                # Files are parsed one at a time here, so no copy ever waits
+                yield _result(file, *_guarded(file, verdict))
+        return
+
+    remaining = iter(files)
+    executor: Optional[ProcessPoolExecutor] = None
+
+    def _window() -> Tuple[List[Tuple[Path, _Verdict]], Iterator[Tuple[Optional[FileSummary], Phases]]]:
+        """Triage the next files and send the texts to parse to the pool, started on first need."""
+        nonlocal executor
+        window: List[Tuple[Path, _Verdict]] = []
+        pending: List[Tuple[Path, _Verdict]] = []
+        for file in itertools.islice(remaining, _CONTENT_CHUNK):
+            clock.start()
+            verdict = triage.check(file, cache, stats, clock)
+            window.append((file, verdict))
+            if verdict.action == "parse" and not triage.limits.isolates(file):
+                pending.append((file, verdict))
+        if not pending:
+            return window, iter(())
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        parsed = executor.map(
+            functools.partial(_summarize_source_timed, fast=fast, calls=calls),
+            [verdict.text for _, verdict in pending],
+            [str(file) for file, _ in pending],
+            [is_package_init(file.name) for file, _ in pending],
+            # Several files per task amortizes IPC overhead on small modules
+            chunksize=max(1, len(pending) // (workers * 4)),
+        )
+        return window, parsed
+
+    try:
+        # The next window is read and submitted while the pool parses the current one
+        window, parsed = _window()
+        while window:
+            upcoming, upcoming_parsed = _window()
+            for file, verdict in window:
+                if verdict.action == "done":
+                    yield _result(file, verdict.summary, verdict.reason)
+                elif verdict.action == "wait":
+                    assert verdict.content is not None
+                    yield _result(file, *triage.copied(file, verdict.content, cache, stats))
+                elif triage.limits.isolates(file):
+                    yield _result(file, *_guarded(file, verdict))
+                else:
+                    summary, phases = next(parsed)
+                    clock.merge(phases)
+                    triage.parsed(file, verdict.content, summary, None, cache)
+                    yield _result(file, summary, None)
+            window, parsed = upcoming, upcoming_parsed
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def summarize_contents(
+    read: Callable[[str], bytes],
+    wanted: Iterable[Tuple[ContentKey, str]],
+    workers: int,
+    cache: Optional[BlobCache] = None,
+    fast: bool = False,
+    known: Optional[Dict[ContentKey, Optional[FileSummary]]] = None,
+    stats: Optional[ExtractionStats] = None,
+    calls: bool = False,
+) -> Dict[ContentKey, Optional[FileSummary]]:
+    """Summaries for (content key, file name) pairs, parsing each distinct content at most once.
+
+    For sources that are not plain files (git blobs, archive members). Keys
+    already in ``known`` or in ``cache`` are not read; for the rest ``read``
+    returns the raw bytes given the key's hash, and they are parsed, on a
+    process pool if workers > 1, a bounded chunk of texts at a time. The file
+    name only labels syntax errors. Returns ``known`` (a new dict if None)
+    with every wanted key filled in. Time spent is charged to the phases of
+    ``stats``, as in _iter_file_summaries; "read" includes decoding. ``fast``
+    and ``calls`` are passed on to _summarize_source.
+    """
+    if known is None:
+        known = {}
+    clock = PhaseClock(stats.phases if stats is not None else None)
+    pending: List[Tuple[ContentKey, str]] = []
+    pending_keys: Set[ContentKey] = set()
+    clock.start()
+    for key, name in wanted:
+        if key in known or key in pending_keys:
+            continue
+        hit, summary = cache.lookup(key) if cache is not None else (False, None)
+        if hit:
+            known[key] = summary
+        else:
+            pending_keys.add(key)
+            pending.append((key, name))
+    clock.lap("cache")
+
+    def _done(key: ContentKey, summary: Optional[FileSummary]) -> None:
+        known[key] = summary
+        if cache is not None:
+            cache.store(key, summary)
+
+    if workers <= 1 or len(pending) <= 1:
+        for key, name in pending:
+            clock.start()
+            text = _decode_source(read(key[0]))
+            clock.lap("read")
+            _done(key, _summarize_source(text, name, key[1], fast, clock, calls))
+        return known
+    summarize = functools.partial(_summarize_source_timed, fast=fast, calls=calls)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, len(pending), _CONTENT_CHUNK):
+            chunk = pending[start : start + _CONTENT_CHUNK]
+            clock.start()
+            texts = [_decode_source(read(key[0])) for key, _ in chunk]
+            clock.lap("read")
+            parsed = executor.map(
+                summarize,
+                texts,
+                [name for _, name in chunk],
+                [key[1] for key, _ in chunk],
+                chunksize=max(1, len(chunk) // (workers * 4)),
+            )
+            for (key, _), (summary, phases) in zip(chunk, parsed):
+                clock.merge(phases)
+                _done(key, summary)
+    return known
+
+
+def _resolve_workers(workers: Optional[int]) -> int:
+    """Normalize a workers setting: None means serial, 0 means one per CPU."""
+    if workers is None:
+        return 1
+    if workers == 0:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+def _measured(files: Iterable[Path], stats: ExtractionStats) -> Iterator[Path]:
+    """Discovered files, charging the walk to the "discovery" phase and counting their bytes."""
+    clock = PhaseClock(stats.phases)
+    for file in clock.timed(files, "discovery"):
+        clock.start()
+        try:
+            stats.bytes_scanned += file.stat().st_size
+        except OSError:
+            pass
+        clock.lap("discovery")
+        yield file
+
+
+def iter_tools(
+    repo_path: str,
+    workers: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+    stats: Optional[ExtractionStats] = None,
+    respect_gitignore: bool = False,
+    fast: bool = False,
+    git_rev: Optional[str] = None,
+    prefer_stubs: bool = False,
+    limits: Optional[ParseLimits] = None,
+    call_graph: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """Yield tool records for public top-level functions and their public API exposure.
 
     Two-pass strategy over the repository:
     1) Parse files to collect function definitions and package-level export hints:
@@ -229,154 +926,148 @@ def extract_tools(repo_path: str) -> Tuple[List[Dict[str, Any]], int, int]:
        aliased subpackages. Falls back to heuristics when explicit exports are
        absent, optionally guided by __all__.
 
-    Returns (records, files_scanned, files_skipped).
+    Pass 1 runs per file and can be spread over ``workers`` processes (0 uses
+    every CPU); each file yields a FileSummary that is merged here in discovery
+    order, so the output does not depend on the number of workers.
+
+    When ``cache_dir`` is given, summaries are persisted there (see
+    SummaryCache) and only new or changed files are parsed on later runs; Pass
+    2 always runs over the full set of summaries. Files with identical content
+    (vendored copies, duplicated helpers) are parsed once. Pass an
+    ExtractionStats to receive scan, cache and deduplication counters. With ``respect_gitignore``, files ignored
+    by the repository's ``.gitignore`` files are not scanned. With ``fast``,
+    Pass 1 parses only the top-level statements it reads (see scanner.py);
+    the result is the same except that files with a syntax error inside a
+    function body are no longer skipped.
+
+    ``repo_path`` may also be a wheel, sdist or zip archive, whose members are
+    read without unpacking (see archive.iter_archive_summaries; the cache is
+    then keyed by content). With ``git_rev``, the files of that revision are read straight from the
+    git object store instead of the working tree (see
+    gitrev.iter_rev_summaries); the cache is then keyed by blob id and shared
+    by all revisions. Raises ValueError if the revision cannot be resolved.
+
+    With ``prefer_stubs``, ``.pyi`` type stubs are extracted as well and are
+    authoritative for their module: a stub replaces the ``.py`` file next to
+    it, which only supplies the docstrings the stub lacks (see ToolIndex).
+    Stubs without an implementation, as for C extensions, add modules of
+    their own.
+
+    ``limits`` guard Pass 1 against pathological files (see
+    guards.ParseLimits): oversized or generated files are skipped and large
+    files are parsed in a killable process under a time budget. Skipped
+    files are counted per reason in ``stats.skip_reasons``. Limits apply to
+    directories only; ValueError for archives and revisions.
+
+    ``stats`` also receives wall and CPU time per phase (discovery, cache,
+    read, parse, render, synthesis), bytes scanned and peak memory (see
+    metrics.py). Phase times inside worker processes are summed. The run's
+    total wall and CPU time include the consumer of the records.
+
+    With ``call_graph``, Pass 1 also records the names each function and
+    method body calls, resolved through the file's imports, and every record
+    gets ``calls`` (ids of the definitions its definition calls) and
+    ``centrality`` (its PageRank in that call graph, see callgraph.py).
+    This reuses the parse Pass 1 does anyway; the repository is not read
+    again, but records are only yielded once every file is merged. Needs
+    function bodies, so ValueError with ``fast``.
+
+    Records are yielded as soon as they are known: direct definitions while
+    files are merged, re-exports once Pass 1 is complete. Only the compact
+    Pass-1 state is retained, not the emitted records, so memory stays bounded
+    by the definitions rather than the output. Order follows discovery, not
+    (module, name); stats counters are final once the generator is exhausted.
     """
+    meter = RunMeter()
     repo_root = Path(repo_path)
-    results: List[Dict[str, Any]] = []
-    files_scanned = 0
-    files_skipped = 0
-
-    # Pass 1: collect function defs and package re-exports/aliases
-    defs_by_full: Dict[str, ToolRecord] = {}
-    exports_by_package: Dict[str, Dict[str, str]] = defaultdict(dict)  # pkg -> name -> origin full dotted
-    aliases_by_package: Dict[str, Dict[str, str]] = defaultdict(dict)  # pkg -> alias -> subpkg
-    all_by_package: Dict[str, Set[str]] = defaultdict(set)  # pkg -> names declared in __all__
-
-    seen_ids: Set[str] = set()
-
-    for file in discover_python_files(repo_root):
-        files_scanned += 1
-        source, module = _read_and_parse(file)
-        if module is None or source is None:
-            files_skipped += 1
-            continue
+    if stats is None:
+        stats = ExtractionStats()
 
-        module_name = _module_name_for(file, repo_root)
-        literal_all = _extract_literal_all(module)
+    cache: Optional[Union[SummaryCache, BlobCache]] = None
+    summaries: Iterable[Tuple[str, Optional[FileSummary]]]
+    if limits is not None and (git_rev is not None or repo_root.is_file()):
+        raise ValueError("parse limits apply to directories only, not to archives or git revisions")
+    if call_graph and fast:
+        raise ValueError("the call graph needs function bodies, which the fast scanner does not parse")
+    if git_rev is None and repo_root.is_file():
+        from .archive import iter_archive_summaries
 
-        # Collect top-level functions (definitions)
-        for fn in _extract_top_level_functions(module):
-            if not _is_public(fn.name, literal_all):
-                continue
-            signature = _render_signature(fn, source)
-            doc_first_raw = (ast.get_docstring(fn, clean=True) or "").strip().splitlines()
-            doc_first_line = doc_first_raw[0] if doc_first_raw else ""
-            record = ToolRecord(
-                id=f"{module_name}:{fn.name}",
-                module=module_name,
-                name=fn.name,
-                signature=signature,
-                doc_first_line=doc_first_line,
-                file=str(file.relative_to(repo_root).as_posix()),
-                lineno=fn.lineno,
+        cache = BlobCache(Path(cache_dir), fast=fast, calls=call_graph) if cache_dir is not None else None
+        summaries = iter_archive_summaries(
+            repo_root, _resolve_workers(workers), cache, fast, stats, include_stubs=prefer_stubs, calls=call_graph
+        )
+    elif git_rev is not None:
+        from .gitrev import iter_rev_summaries
+
+        cache = BlobCache(Path(cache_dir), fast=fast, calls=call_graph) if cache_dir is not None else None
+        summaries = iter_rev_summaries(
+            repo_root,
+            git_rev,
+            _resolve_workers(workers),
+            cache,
+            fast,
+            stats,
+            respect_gitignore,
+            prefer_stubs,
+            calls=call_graph,
+        )
+    else:
+        cache = None
+        if cache_dir is not None:
+            cache = SummaryCache(Path(cache_dir), repo_root, fast=fast, calls=call_graph)
+        files = _measured(
+            discover_python_files(repo_root, respect_gitignore=respect_gitignore, include_stubs=prefer_stubs), stats
+        )
+        summaries = (
+            (file.relative_to(repo_root).as_posix(), summary)
+            for file, summary in _iter_file_summaries(
+                files, _resolve_workers(workers), cache, fast, stats, limits, calls=call_graph
             )
-            results.append(record.to_dict())
-            seen_ids.add(record.id)
-            defs_by_full[f"{module_name}.{fn.name}"] = record
-
-        # If this is a package __init__, collect __all__, re-exports and aliases
-        if file.name == "__init__.py":
-            if literal_all:
-                all_by_package[module_name] |= literal_all
-            for node in module.body:
-                if isinstance(node, ast.ImportFrom):
-                    abs_mod = _resolve_relative_module(module_name, node.module, node.level or 0)
-                    if node.module is None and (node.level or 0) > 0:
-                        # from . import subpkg as alias
-                        for n in node.names:
-                            alias = n.asname or n.name
-                            aliases_by_package[module_name][alias] = n.name
-                    else:
-                        # from X import a as b, including star
-                        for n in node.names:
-                            if n.name == "*":
-                                # Defer star handling (optional future work)
-                                continue
-                            exported_name = n.asname or n.name
-                            origin = f"{abs_mod}.{n.name}"
-                            exports_by_package[module_name][exported_name] = origin
-                # Direct 'import' rarely used for local re-exports; ignore for now
-
-    # Helper: build public export mapping for a package with fallbacks
-    def _public_exports_for_package(pkg: str) -> Dict[str, str]:
-        """Return mapping export_name -> origin.full.dotted for a package.
-
-        Preference order:
-        - Explicit 'from X import name as alias' collected for the package
-        - If none, infer from available definitions within the package tree,
-          optionally restricting to names present in __all__
-        - As a last resort, consider the top-level package scope
-
-        Where multiple candidates exist, a simple score prefers modules whose
-        leaf name best matches the function name (e.g., '....<name>' > '...._<name>').
-        """
-        mapping = dict(exports_by_package.get(pkg, {}))
-        if mapping:
-            return mapping
-        preferred_names = all_by_package.get(pkg, set())
-        candidates = [full for full in defs_by_full.keys() if full.startswith(f"{pkg}.")]
-        if not candidates:
-            # fallback to top-level package scope
-            top = pkg.split(".")[0]
-            candidates = [full for full in defs_by_full.keys() if full.startswith(f"{top}.")]
-        name_to_best: Dict[str, str] = {}
-        def score(full: str, name: str) -> int:
-            mod = full.rsplit(".", 1)[0]
-            leaf = mod.split(".")[-1]
-            if leaf == name:
-                return 3
-            if leaf == f"_{name}":
-                return 2
-            return 1
-        for full in candidates:
-            name = full.split(".")[-1]
-            if preferred_names and name not in preferred_names:
-                continue
-            prev = name_to_best.get(name)
-            if prev is None or score(full, name) > score(prev, name):
-                name_to_best[name] = full
-        return name_to_best
-
-    # Pass 2: emit public API tool records based on re-exports and aliases
-    def _emit_public(public_module: str, export_name: str, origin: str) -> None:
-        """Emit a ToolRecord for a public API name if its origin is known.
-
-        Avoid duplicates by tracking seen ids. Carries over signature and
-        first-line doc from the origin definition.
-        """
-        src = defs_by_full.get(origin)
-        if not src:
-            return
-        rec_id = f"{public_module}:{export_name}"
-        if rec_id in seen_ids:
-            return
-        results.append(ToolRecord(
-            id=rec_id,
-            module=public_module,
-            name=export_name,
-            signature=src.signature,
-            doc_first_line=src.doc_first_line,
-            file=src.file,
-            lineno=src.lineno,
-        ).to_dict())
-        seen_ids.add(rec_id)
-
-    # Direct exports (explicit or inferred via __all__/fallback)
-    direct_pkgs = set(exports_by_package.keys()) | set(all_by_package.keys())
-    for pkg in direct_pkgs:
-        mapping = _public_exports_for_package(pkg)
-        for export_name, origin in mapping.items():
-            _emit_public(pkg, export_name, origin)
-
-    # Aliased subpackages on parent package (e.g., scanpy: pp -> preprocessing)
-    for parent_pkg, alias_map in aliases_by_package.items():
-        for alias, subpkg in alias_map.items():
-            child_pkg = f"{parent_pkg}.{subpkg}"
-            child_exports = _public_exports_for_package(child_pkg)
-            for export_name, origin in child_exports.items():
-                public_module = f"{parent_pkg}.{alias}"
-                _emit_public(public_module, export_name, origin)
-
-    return results, files_scanned, files_skipped
+        )
+    yield from _synthesize_tools(summaries, stats, call_graph)
+
+    if cache is not None:
+        clock = PhaseClock(stats.phases)
+        cache.save()
+        clock.lap("cache")
+        stats.cache_hits = cache.hits
+        stats.cache_misses = cache.misses
+    meter.finish(stats)
+
+
+def extract_tools(
+    repo_path: str,
+    workers: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+    stats: Optional[ExtractionStats] = None,
+    respect_gitignore: bool = False,
+    fast: bool = False,
+    git_rev: Optional[str] = None,
+    prefer_stubs: bool = False,
+    limits: Optional[ParseLimits] = None,
+    call_graph: bool = False,
+) -> Tuple[List[Dict[str, Any]], int, int]:
+    """Extract public top-level functions and their public API exposure.
+
+    Collects everything produced by iter_tools (see there for the strategy and
+    options) into a list.
+
+    Returns (records, files_scanned, files_skipped).
+    """
+    if stats is None:
+        stats = ExtractionStats()
+    results = list(iter_tools(
+        repo_path,
+        workers=workers,
+        cache_dir=cache_dir,
+        stats=stats,
+        respect_gitignore=respect_gitignore,
+        fast=fast,
+        git_rev=git_rev,
+        prefer_stubs=prefer_stubs,
+        limits=limits,
+        call_graph=call_graph,
+    ))
+    return results, stats.files_scanned, stats.files_skipped
 
 
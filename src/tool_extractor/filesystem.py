@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import os
+import re
 from pathlib import Path
-from typing import Generator, Iterable
+from typing import Generator, List, Optional, Pattern, Tuple
 
 
 EXCLUDED_DIR_NAMES = {
@@ -16,8 +18,12 @@ EXCLUDED_DIR_NAMES = {
     "__pycache__",
     ".mypy_cache",
     ".pytest_cache",
+    "node_modules",
 }
 
+# Names of package initializers: the source file and its type stub
+PACKAGE_INIT_NAMES = ("__init__.py", "__init__.pyi")
+
 
 def is_excluded_path(path: Path, repo_root: Path) -> bool:
     """Return True if any component of path (relative to repo_root) is excluded.
@@ -32,25 +38,191 @@ def is_excluded_path(path: Path, repo_root: Path) -> bool:
         return True
 
     for part in relative.parts:
-        if part in EXCLUDED_DIR_NAMES:
-            return True
-        if part.startswith(".") and part not in {".", ".."}:
-            # Skip other hidden directories/files by convention
+        if _is_excluded_name(part):
             return True
     return False
 
 
-def discover_python_files(repo_root: Path) -> Generator[Path, None, None]:
-    """Yield Python source files under repo_root respecting exclusion rules.
+def is_excluded_rel_path(rel_path: str) -> bool:
+    """Like is_excluded_path for a '/'-separated path inside a tree or archive."""
+    return any(_is_excluded_name(part) for part in rel_path.split("/"))
+
+
+def is_package_init(rel_path: str) -> bool:
+    """Whether a '/'-separated path (or bare file name) names a package ``__init__``."""
+    return rel_path.rsplit("/", 1)[-1] in PACKAGE_INIT_NAMES
+
+
+def python_suffixes(include_stubs: bool) -> Tuple[str, ...]:
+    """File name suffixes extracted from: sources, plus ``.pyi`` stubs if asked."""
+    return (".py", ".pyi") if include_stubs else (".py",)
+
+
+def _is_excluded_name(part: str) -> bool:
+    """Return True if a single path component is excluded by name."""
+    if part in EXCLUDED_DIR_NAMES:
+        return True
+    # Skip other hidden directories/files by convention
+    return part.startswith(".") and part not in {".", ".."}
+
+
+def _gitignore_pattern_to_regex(pattern: str) -> str:
+    """Translate a gitignore glob into a regex matching '/'-separated paths."""
+    out: List[str] = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == n:
+            out.append("/.*")
+            i += 3
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+                i += 1
+            else:
+                body = pattern[i + 1 : end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end + 1
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+class GitignoreRules:
+    """Patterns from a single ``.gitignore`` file, relative to its directory.
 
-    Files are yielded in sorted order for determinism.
+    Supports the commonly used subset of gitignore syntax: comments, ``!``
+    negation, trailing ``/`` for directory-only rules, leading or inner ``/``
+    for anchored rules, and ``*``, ``?``, ``[...]`` and ``**`` wildcards.
     """
-    candidates: Iterable[Path] = sorted(repo_root.rglob("*.py"))
-    for path in candidates:
-        if is_excluded_path(path, repo_root):
+
+    def __init__(self, base: str, lines: List[str]) -> None:
+        self.base = base  # repo-relative posix directory ('' for the root)
+        self.rules: List[Tuple[Pattern[str], bool, bool]] = []  # (regex, negate, dir_only)
+        for raw in lines:
+            line = raw.rstrip("\n").rstrip("\r")
+            if not line.endswith("\\ "):
+                line = line.rstrip(" ")
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            elif line.startswith("\\"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            line = line.lstrip("/")
+            regex = _gitignore_pattern_to_regex(line)
+            if not anchored:
+                regex = "(?:.*/)?" + regex
+            self.rules.append((re.compile(regex + r"\Z", re.DOTALL), negate, dir_only))
+
+    @classmethod
+    def load(cls, directory: Path, base: str) -> Optional["GitignoreRules"]:
+        try:
+            text = (directory / ".gitignore").read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return None
+        rules = cls(base, text.splitlines())
+        return rules if rules.rules else None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """Return True/False if a rule decides the path, else None.
+
+        ``rel_path`` is repo-relative; the last matching rule wins.
+        """
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return None
+            rel_path = rel_path[len(self.base) + 1 :]
+        decision: Optional[bool] = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                decision = not negate
+        return decision
+
+
+def _is_gitignored(rules: List[GitignoreRules], rel_path: str, is_dir: bool) -> bool:
+    ignored = False
+    for r in rules:
+        decision = r.match(rel_path, is_dir)
+        if decision is not None:
+            ignored = decision
+    return ignored
+
+
+def _walk_python_files(
+    directory: Path,
+    rel_dir: str,
+    gitignore: Optional[List[GitignoreRules]],
+    suffixes: Tuple[str, ...] = (".py",),
+) -> Generator[Path, None, None]:
+    if gitignore is not None:
+        own = GitignoreRules.load(directory, rel_dir)
+        if own is not None:
+            gitignore = gitignore + [own]
+    try:
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError:
+        return
+    for entry in entries:
+        name = entry.name
+        if _is_excluded_name(name):
+            continue
+        rel_path = f"{rel_dir}/{name}" if rel_dir else name
+        try:
+            # Like rglob, do not descend into symlinked directories
+            is_dir = entry.is_dir() and not entry.is_symlink()
+            is_py_file = not is_dir and name.endswith(suffixes) and entry.is_file()
+        except OSError:
+            continue
+        if not is_dir and not is_py_file:
             continue
-        if not path.is_file():
+        if gitignore and _is_gitignored(gitignore, rel_path, is_dir):
             continue
-        yield path
+        if is_dir:
+            yield from _walk_python_files(Path(entry.path), rel_path, gitignore, suffixes)
+        else:
+            yield Path(entry.path)
 
 
+def discover_python_files(
+    repo_root: Path, respect_gitignore: bool = False, include_stubs: bool = False
+) -> Generator[Path, None, None]:
+    """Yield Python source files under repo_root respecting exclusion rules.
+
+    The tree is walked with os.scandir and excluded or hidden directories are
+    pruned before descending into them. Entries are visited in name order, which
+    yields files in the same sorted order as sorting all paths up front, without
+    materializing the full list first. With respect_gitignore, ``.gitignore``
+    files found along the way are honored as well. With include_stubs, ``.pyi``
+    type stubs are yielded too; a stub directly follows its ``.py`` file, if
+    any, in that order.
+    """
+    yield from _walk_python_files(
+        repo_root, "", [] if respect_gitignore else None, python_suffixes(include_stubs)
+    )
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .cache import BlobCache, ContentKey
+from .extractor import summarize_contents
+from .filesystem import GitignoreRules, _is_gitignored, is_excluded_rel_path, is_package_init, python_suffixes
+from .guards import content_skip_reason
+from .metrics import PhaseClock
+from .models import ExtractionStats, FileSummary
+
+
+# (repo-relative path, blob id, size in bytes) of a Python file in a tree
+TreeEntry = Tuple[str, str, int]
+
+_BLOB_MODES = {b"100644", b"100755"}
+
+
+def _git(repo_root: Path, *args: str) -> bytes:
+    try:
+        result = subprocess.run(["git", *args], cwd=repo_root, capture_output=True)
+    except OSError as exc:
+        raise ValueError(f"cannot run git: {exc}") from exc
+    if result.returncode != 0:
+        message = result.stderr.decode("utf-8", errors="replace").strip()
+        raise ValueError(f"git {args[0]} failed: {message}")
+    return result.stdout
+
+
+def resolve_tree(repo_root: Path, rev: str) -> str:
+    """Id of the tree at ``rev`` for the directory repo_root; ValueError if unknown.
+
+    repo_root may be a subdirectory of a work tree (or a bare repository);
+    only that subdirectory of the revision is extracted, as when scanning it
+    on disk.
+    """
+    prefix = _git(repo_root, "rev-parse", "--show-prefix").decode("utf-8").strip()
+    try:
+        return _git(repo_root, "rev-parse", "--verify", f"{rev}^{{tree}}:{prefix}").decode("ascii").strip()
+    except ValueError:
+        raise ValueError(f"unknown revision {rev!r} in {repo_root}") from None
+
+
+def _content_key(rel: str, blob: str) -> ContentKey:
+    return blob, is_package_init(rel)
+
+
+class CatFile:
+    """A long-lived ``git cat-file --batch`` process reading blobs by id."""
+
+    def __init__(self, repo_root: Path) -> None:
+        self._proc = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            cwd=repo_root,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def read(self, blob: str) -> bytes:
+        assert self._proc.stdin is not None and self._proc.stdout is not None
+        self._proc.stdin.write(blob.encode("ascii") + b"\n")
+        self._proc.stdin.flush()
+        header = self._proc.stdout.readline().split()
+        if len(header) != 3 or header[1] != b"blob":
+            raise ValueError(f"cannot read blob {blob}")
+        data = self._proc.stdout.read(int(header[2]))
+        self._proc.stdout.read(1)  # the newline after each object
+        return data
+
+    def close(self) -> None:
+        if self._proc.stdin is not None:
+            self._proc.stdin.close()
+        self._proc.wait()
+
+    def __enter__(self) -> "CatFile":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _tree_ignored(rel_path: str, rules_by_dir: Dict[str, GitignoreRules]) -> bool:
+    """Whether rel_path or one of its directories is ignored, as the disk walk decides."""
+    parts = rel_path.split("/")
+    active: List[GitignoreRules] = []
+    for depth in range(len(parts)):
+        rules = rules_by_dir.get("/".join(parts[:depth]))
+        if rules is not None:
+            active.append(rules)
+        if active and _is_gitignored(active, "/".join(parts[: depth + 1]), depth < len(parts) - 1):
+            return True
+    return False
+
+
+def list_python_blobs(
+    repo_root: Path, tree: str, cat: CatFile, respect_gitignore: bool = False, include_stubs: bool = False
+) -> List[TreeEntry]:
+    """Python files of a tree with the same exclusion rules and order as discover_python_files.
+
+    Symlinks and submodules are skipped. With respect_gitignore, the
+    ``.gitignore`` files committed in the tree are honored; with
+    include_stubs, ``.pyi`` stubs are listed too.
+    """
+    suffixes = python_suffixes(include_stubs)
+    entries: List[TreeEntry] = []
+    gitignores: Dict[str, str] = {}
+    for line in _git(repo_root, "ls-tree", "--full-tree", "-r", "-l", "-z", tree).split(b"\0"):
+        if not line:
+            continue
+        meta, _, raw_path = line.partition(b"\t")
+        mode, kind, blob, size = meta.split()
+        if kind != b"blob" or mode not in _BLOB_MODES:
+            continue
+        rel = raw_path.decode("utf-8", errors="surrogateescape")
+        directory, _, name = rel.rpartition("/")
+        if directory and is_excluded_rel_path(directory):
+            continue
+        if name == ".gitignore":
+            gitignores[directory] = blob.decode("ascii")
+        elif name.endswith(suffixes) and not is_excluded_rel_path(name):
+            entries.append((rel, blob.decode("ascii"), int(size)))
+    if respect_gitignore and gitignores:
+        rules_by_dir: Dict[str, GitignoreRules] = {}
+        for base, blob in gitignores.items():
+            rules = GitignoreRules(base, cat.read(blob).decode("utf-8", errors="replace").splitlines())
+            if rules.rules:
+                rules_by_dir[base] = rules
+        entries = [e for e in entries if not _tree_ignored(e[0], rules_by_dir)]
+    # Name order per directory, like the scandir walk (git sorts 'a.py' before 'a/')
+    entries.sort(key=lambda e: e[0].split("/"))
+    return entries
+
+
+def iter_rev_summaries(
+    repo_root: Path,
+    rev: str,
+    workers: int,
+    cache: Optional[BlobCache] = None,
+    fast: bool = False,
+    stats: Optional[ExtractionStats] = None,
+    respect_gitignore: bool = False,
+    include_stubs: bool = False,
+    calls: bool = False,
+) -> Iterator[Tuple[str, Optional[FileSummary]]]:
+    """Yield (rel path, summary) for the Python files of ``rev``, reading blobs from git.
+
+    Nothing is checked out: the tree is listed with ``git ls-tree`` and blob
+    contents are streamed through one ``git cat-file --batch`` process into
+    the same parse pipeline as files on disk (see summarize_contents). Blobs
+    found in ``cache`` are not read at all, so re-extracting a revision, or
+    one that shares most files with a cached one, costs little more than
+    listing its tree. Copies of a blob within the revision count as
+    deduplicated in ``stats``. Results are yielded in tree order.
+    """
+    if stats is None:
+        stats = ExtractionStats()
+    clock = PhaseClock(stats.phases)
+    tree = resolve_tree(repo_root, rev)
+    with CatFile(repo_root) as cat:
+        entries = list_python_blobs(repo_root, tree, cat, respect_gitignore, include_stubs)
+        clock.lap("discovery")
+        stats.bytes_scanned += sum(size for _, _, size in entries)
+        summaries = summarize_contents(
+            cat.read,
+            ((_content_key(rel, blob), f"{rev}:{rel}") for rel, blob, _ in entries),
+            workers,
+            cache,
+            fast,
+            stats=stats,
+            calls=calls,
+        )
+        reasons = {key: content_skip_reason(cat.read(key[0])) for key, s in summaries.items() if s is None}
+    emitted: Set[ContentKey] = set()
+    for rel, blob, size in entries:
+        key = _content_key(rel, blob)
+        if key in emitted:
+            stats.files_deduplicated += 1
+            stats.bytes_deduplicated += size
+        emitted.add(key)
+        if key in reasons:
+            stats.count_skip(reasons[key])
+        yield rel, summaries[key]
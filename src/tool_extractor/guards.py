@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
+
+
+# Why a file produced no summary; counted per reason in ExtractionStats.skip_reasons
+SKIP_UNREADABLE = "unreadable"  # I/O error or not valid UTF-8
+SKIP_SYNTAX_ERROR = "syntax error"
+SKIP_TOO_LARGE = "too large"
+SKIP_GENERATED = "generated"
+SKIP_TIMEOUT = "timeout"
+SKIP_CRASHED = "crashed"  # the isolated parser died (e.g. out of memory)
+
+# How much of a file the generated-code heuristics look at
+_HEAD_BYTES = 64 * 1024
+_HEAD_LINES = 10
+# A line this long is data (tables, serialized descriptors, minified code), not code
+_LONG_LINE = 4000
+
+_GENERATED_MARKER = re.compile(
+    rb"@generated|^[ \t]*#.*(?:do not edit|generated by|auto-?generated|code generated)",
+    re.I | re.M,
+)
+
+
+@dataclass(frozen=True)
+class ParseLimits:
+    """Per-file guards for Pass 1 against pathological sources.
+
+    - max_bytes: files larger than this are skipped unread
+    - timeout: seconds a file of at least ``isolate_bytes`` may take to parse;
+      such files are parsed in a separate process that is killed when the
+      budget runs out. Smaller files parse in-process, unbounded.
+    - skip_generated: skip files that look generated (see looks_generated)
+    """
+
+    max_bytes: Optional[int] = None
+    timeout: Optional[float] = None
+    isolate_bytes: int = 256 * 1024
+    skip_generated: bool = False
+
+    def check(self, path: Path) -> Optional[str]:
+        """Skip reason for a file the guards turn away before parsing, else None.
+
+        Unreadable files pass; parsing them reports the error.
+        """
+        if self.max_bytes is None and not self.skip_generated:
+            return None
+        try:
+            size = path.stat().st_size
+            if self.max_bytes is not None and size > self.max_bytes:
+                return SKIP_TOO_LARGE
+            if self.skip_generated:
+                with path.open("rb") as f:
+                    if looks_generated(f.read(_HEAD_BYTES)):
+                        return SKIP_GENERATED
+        except OSError:
+            pass
+        return None
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> Optional["ParseLimits"]:
+        """Limits from the options of add_limit_arguments; None if none was given."""
+        if args.max_file_size is None and args.parse_timeout is None and not args.skip_generated:
+            return None
+        return cls(max_bytes=args.max_file_size, timeout=args.parse_timeout, skip_generated=args.skip_generated)
+
+    def isolates(self, path: Path) -> bool:
+        """Whether parsing path goes through run_isolated under the time budget."""
+        if self.timeout is None:
+            return False
+        try:
+            return path.stat().st_size >= self.isolate_bytes
+        except OSError:
+            return False
+
+
+def add_limit_arguments(parser: argparse.ArgumentParser) -> None:
+    """The command line options behind ParseLimits.from_args."""
+    parser.add_argument(
+        "--max-file-size",
+        type=int,
+        default=None,
+        metavar="BYTES",
+        help="Skip files larger than this many bytes",
+    )
+    parser.add_argument(
+        "--parse-timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Parse files of 256 KiB or more in a separate process and skip them if they take longer",
+    )
+    parser.add_argument(
+        "--skip-generated",
+        action="store_true",
+        help="Skip files marked as generated (e.g. 'DO NOT EDIT', '@generated') or with very long lines",
+    )
+
+
+def looks_generated(head: bytes) -> bool:
+    """Whether the start of a file marks it as generated code or data.
+
+    Looks for the usual markers (``@generated``, "DO NOT EDIT", "Generated
+    by ...", as protoc, Thrift or Cython write them) in comments among the
+    first lines, and for lines longer than any hand-written code.
+    """
+    lines = head.split(b"\n", _HEAD_LINES)
+    if _GENERATED_MARKER.search(b"\n".join(lines[:_HEAD_LINES])):
+        return True
+    start = 0
+    while True:
+        end = head.find(b"\n", start)
+        if end < 0:
+            # The last line may be cut off by the head size; judge it only if it is long anyway
+            return len(head) - start > _LONG_LINE
+        if end - start > _LONG_LINE:
+            return True
+        start = end + 1
+
+
+def content_skip_reason(data: bytes) -> str:
+    """Why contents that are within the limits produced no summary."""
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError:
+        return SKIP_UNREADABLE
+    return SKIP_SYNTAX_ERROR
+
+
+def skip_reason(path: Path) -> str:
+    """Like content_skip_reason for a file on disk."""
+    try:
+        return content_skip_reason(path.read_bytes())
+    except OSError:
+        return SKIP_UNREADABLE
+
+
+def _isolated_child(conn: Any, func: Callable[..., Any], args: Tuple[Any, ...]) -> None:
+    try:
+        result = func(*args)
+    except Exception:
+        # Same as a file that cannot be parsed (e.g. RecursionError on deep nesting)
+        result = None
+    conn.send(result)
+    conn.close()
+
+
+def run_isolated(func: Callable[..., Any], args: Tuple[Any, ...], timeout: float) -> Tuple[Optional[str], Any]:
+    """Call func(*args) in a child process; (None, result), or (skip reason, None).
+
+    The child is killed if it does not deliver its result within ``timeout``
+    seconds, so neither a runaway parse nor its memory can take the caller
+    down. func and its arguments and result must be picklable.
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    proc = multiprocessing.Process(target=_isolated_child, args=(sender, func, args), daemon=True)
+    proc.start()
+    sender.close()
+    try:
+        if not receiver.poll(timeout):
+            return SKIP_TIMEOUT, None
+        try:
+            return None, receiver.recv()
+        except EOFError:
+            return SKIP_CRASHED, None
+    finally:
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+        receiver.close()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import os
+import time
+import tracemalloc
+from typing import Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore[assignment]
+
+from .models import ExtractionStats
+
+
+T = TypeVar("T")
+
+# Phase name -> {"wall_seconds": ..., "cpu_seconds": ...}, as kept in ExtractionStats.phases
+Phases = Dict[str, Dict[str, float]]
+
+
+class PhaseClock:
+    """Accumulates wall and CPU time per phase into a Phases dict.
+
+    ``start`` marks the beginning of a measured stretch and ``lap`` charges
+    the time since the last mark to a phase, so consecutive phases are
+    measured with one pair of clock reads each. CPU time is this process's
+    only; worker processes keep their own clock and ship its ``phases`` back
+    to be ``merge``d.
+    """
+
+    def __init__(self, phases: Optional[Phases] = None) -> None:
+        self.phases: Phases = phases if phases is not None else {}
+        self.start()
+
+    def start(self) -> None:
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def lap(self, phase: str) -> None:
+        wall, cpu = time.perf_counter(), time.process_time()
+        self._add(phase, wall - self._wall, cpu - self._cpu)
+        self._wall, self._cpu = wall, cpu
+
+    def _add(self, phase: str, wall: float, cpu: float) -> None:
+        entry = self.phases.get(phase)
+        if entry is None:
+            self.phases[phase] = {"wall_seconds": wall, "cpu_seconds": cpu}
+        else:
+            entry["wall_seconds"] += wall
+            entry["cpu_seconds"] += cpu
+
+    def merge(self, phases: Phases) -> None:
+        for phase, entry in phases.items():
+            self._add(phase, entry["wall_seconds"], entry["cpu_seconds"])
+
+    def timed(self, items: Iterable[T], phase: str) -> Iterator[T]:
+        """Iterate items, charging only the time spent producing them to phase."""
+        it = iter(items)
+        while True:
+            self.start()
+            try:
+                item = next(it)
+            except StopIteration:
+                self.lap(phase)
+                return
+            self.lap(phase)
+            yield item
+
+    def consumed(self, items: Iterable[T], phase: str) -> Iterator[T]:
+        """Iterate items, charging only the time the consumer spends on each to phase."""
+        for item in items:
+            self.start()
+            yield item
+            self.lap(phase)
+
+
+def _rusage() -> Tuple[float, float, Optional[int], Optional[int]]:
+    """(own CPU, reaped children's CPU, own peak RSS, largest child's peak RSS); RSS in bytes."""
+    if resource is None:
+        return time.process_time(), 0.0, None, None
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in kilobytes on Linux, in bytes on macOS
+    unit = 1 if os.uname().sysname == "Darwin" else 1024
+    return (
+        own.ru_utime + own.ru_stime,
+        children.ru_utime + children.ru_stime,
+        own.ru_maxrss * unit,
+        children.ru_maxrss * unit or None,
+    )
+
+
+class RunMeter:
+    """Wall time, CPU time (including worker processes) and peak memory of one run.
+
+    Peak RSS is the high-water mark of the process (and of the largest worker)
+    since it started, not just of the run. The tracemalloc peak is recorded
+    only if tracing is already on (``python -X tracemalloc``), since tracing
+    slows extraction down several times over.
+    """
+
+    def __init__(self) -> None:
+        self._wall = time.perf_counter()
+        self._cpu, self._children_cpu, _, _ = _rusage()
+
+    def finish(self, stats: ExtractionStats) -> None:
+        cpu, children_cpu, peak, worker_peak = _rusage()
+        stats.wall_seconds = time.perf_counter() - self._wall
+        stats.cpu_seconds = (cpu - self._cpu) + (children_cpu - self._children_cpu)
+        stats.peak_rss_bytes = peak
+        stats.worker_peak_rss_bytes = worker_peak
+        if tracemalloc.is_tracing():
+            stats.tracemalloc_peak_bytes = tracemalloc.get_traced_memory()[1]
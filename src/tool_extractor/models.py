@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, asdict
-from typing import Dict, Any
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Any, List, Optional, Tuple
 
 
 @dataclass
@@ -13,8 +13,98 @@ class ToolRecord:
     doc_first_line: str
     file: str
     lineno: int
+    origin_id: str  # id of the direct definition this record exposes (its own id if direct)
+    kind: str  # 'function', 'class', 'method', 'classmethod', 'staticmethod' or 'property'
+    parent_id: Optional[str]  # id of the class record a member belongs to
 
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
 
 
+@dataclass
+class DefinitionSummary:
+    """A public top-level definition as seen in a single file.
+
+    Classes carry their public members (kind 'method', 'classmethod',
+    'staticmethod' or 'property') in ``members``. ``calls`` are the names the
+    body calls when Pass 1 collects them (see extractor._called_names).
+    """
+
+    name: str
+    signature: str
+    doc_first_line: str
+    lineno: int
+    kind: str = "function"
+    members: List["DefinitionSummary"] = field(default_factory=list)
+    calls: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DefinitionSummary":
+        data = dict(data)
+        data["members"] = [cls.from_dict(m) for m in data.get("members", [])]
+        return cls(**data)
+
+
+@dataclass
+class FileSummary:
+    """Compact Pass-1 result for a single source file.
+
+    Summaries are independent of where the file lives in the repository: module
+    names are only attached when the summary is merged, so a summary can be
+    produced in a worker process and shipped back to the parent cheaply.
+
+    - defs: public top-level function and class definitions, in source order
+    - literal_all: names listed in a literal ``__all__``
+    - exports: package re-exports as ``(module, level, name, exported_as)`` taken
+      from ``from X import name as exported_as`` in a package ``__init__``
+    - aliases: subpackage aliases as ``(alias, subpackage)`` taken from
+      ``from . import subpackage as alias`` in a package ``__init__``
+    - star_imports: ``(module, level)`` of every top-level ``from X import *``
+    """
+
+    defs: List[DefinitionSummary] = field(default_factory=list)
+    literal_all: List[str] = field(default_factory=list)
+    exports: List[Tuple[Optional[str], int, str, str]] = field(default_factory=list)
+    aliases: List[Tuple[str, str]] = field(default_factory=list)
+    star_imports: List[Tuple[Optional[str], int]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FileSummary":
+        """Rebuild a summary from to_dict() output (e.g. after a JSON round-trip)."""
+        return cls(
+            defs=[DefinitionSummary.from_dict(d) for d in data.get("defs", [])],
+            literal_all=list(data.get("literal_all", [])),
+            exports=[tuple(e) for e in data.get("exports", [])],
+            aliases=[tuple(a) for a in data.get("aliases", [])],
+            star_imports=[tuple(s) for s in data.get("star_imports", [])],
+        )
+
+
+@dataclass
+class ExtractionStats:
+    """Counters describing one extraction run, reported in tools_summary.txt."""
+
+    files_scanned: int = 0
+    files_skipped: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    # Files whose content was already summarized elsewhere in the run or cache
+    files_deduplicated: int = 0
+    bytes_deduplicated: int = 0
+    # files_skipped broken down by reason (see guards.py for the reasons)
+    skip_reasons: Dict[str, int] = field(default_factory=dict)
+    # Throughput and resources (see metrics.py); phase times are summed over
+    # processes, so with workers they can add up to more than wall_seconds
+    bytes_scanned: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    phases: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    peak_rss_bytes: Optional[int] = None
+    worker_peak_rss_bytes: Optional[int] = None
+    tracemalloc_peak_bytes: Optional[int] = None
+
+    def count_skip(self, reason: str) -> None:
+        self.skip_reasons[reason] = self.skip_reasons.get(reason, 0) + 1
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import heapq
+import json
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from .models import ExtractionStats
+from .store import ToolStore
+
+
+Record = Dict[str, Any]
+
+# Records held in memory per sorted run when sorting externally
+DEFAULT_SORT_CHUNK_SIZE = 50_000
+
+
+def tool_sort_key(record: Record) -> Tuple[str, str]:
+    """Deterministic catalog order used by every output format."""
+    return (record["module"], record["name"])
+
+
+def _dump_line(record: Record) -> str:
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _read_run(fh: IO[str]) -> Iterator[Record]:
+    for line in fh:
+        yield json.loads(line)
+
+
+def external_sort(
+    records: Iterable[Record],
+    key: Callable[[Record], Any] = tool_sort_key,
+    chunk_size: int = DEFAULT_SORT_CHUNK_SIZE,
+) -> Iterator[Record]:
+    """Yield records sorted by key using bounded memory.
+
+    Records are buffered ``chunk_size`` at a time; each buffer is sorted and
+    spilled to a temporary JSONL run, and the runs are k-way merged. Inputs
+    that fit in a single chunk never touch disk. The sort is stable, so the
+    result equals ``sorted(records, key=key)``.
+    """
+    with tempfile.TemporaryDirectory(prefix="tool_extractor_sort_") as tmp:
+        runs: List[IO[str]] = []
+        try:
+            buffer: List[Record] = []
+            for record in records:
+                buffer.append(record)
+                if len(buffer) >= chunk_size:
+                    runs.append(_spill_run(Path(tmp) / f"run{len(runs)}.jsonl", buffer, key))
+                    buffer = []
+            buffer.sort(key=key)
+            if not runs:
+                yield from buffer
+                return
+            # heapq.merge prefers earlier iterables on ties, keeping the sort stable
+            yield from heapq.merge(*(_read_run(fh) for fh in runs), buffer, key=key)
+        finally:
+            for fh in runs:
+                fh.close()
+
+
+def _spill_run(path: Path, buffer: List[Record], key: Callable[[Record], Any]) -> IO[str]:
+    buffer.sort(key=key)
+    with path.open("w", encoding="utf-8") as f:
+        f.writelines(_dump_line(r) for r in buffer)
+    return path.open("r", encoding="utf-8")
+
+
+def write_jsonl(records: Iterable[Record], path: Path) -> int:
+    """Stream records to path, one JSON object per line; return the count."""
+    count = 0
+    with path.open("w", encoding="utf-8") as f:
+        for record in records:
+            f.write(_dump_line(record))
+            count += 1
+    return count
+
+
+def iter_jsonl(path: Path) -> Iterator[Record]:
+    """Stream records back from a JSONL catalog, skipping blank lines."""
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _rate(amount: float, seconds: float) -> float:
+    return amount / seconds if seconds > 0 else 0.0
+
+
+def _mib(n: Optional[int]) -> str:
+    return "n/a" if n is None else f"{n / (1024 * 1024):.1f} MiB"
+
+
+def metrics(stats: ExtractionStats) -> Dict[str, Any]:
+    """Throughput, per-phase times and peak memory of a measured run, as written to tools_metrics.json."""
+    return {
+        "files_scanned": stats.files_scanned,
+        "bytes_scanned": stats.bytes_scanned,
+        "wall_seconds": round(stats.wall_seconds, 6),
+        "cpu_seconds": round(stats.cpu_seconds, 6),
+        "files_per_second": round(_rate(stats.files_scanned, stats.wall_seconds), 3),
+        "bytes_per_second": round(_rate(stats.bytes_scanned, stats.wall_seconds), 3),
+        "phases": {
+            phase: {name: round(value, 6) for name, value in entry.items()}
+            for phase, entry in stats.phases.items()
+        },
+        "peak_rss_bytes": stats.peak_rss_bytes,
+        "worker_peak_rss_bytes": stats.worker_peak_rss_bytes,
+        "tracemalloc_peak_bytes": stats.tracemalloc_peak_bytes,
+    }
+
+
+def write_metrics(path: Path, stats: ExtractionStats) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(metrics(stats), f, indent=2)
+        f.write("\n")
+
+
+def _metrics_lines(stats: ExtractionStats) -> List[str]:
+    lines = [
+        f"Wall time: {stats.wall_seconds:.3f}s (CPU {stats.cpu_seconds:.3f}s)",
+        f"Throughput: {_rate(stats.files_scanned, stats.wall_seconds):.1f} files/s, "
+        f"{_rate(stats.bytes_scanned, stats.wall_seconds) / (1024 * 1024):.2f} MiB/s "
+        f"({stats.bytes_scanned} bytes)",
+        "Phases (wall / CPU, summed over workers):",
+    ]
+    lines += [
+        f"  {phase}: {entry['wall_seconds']:.3f}s / {entry['cpu_seconds']:.3f}s"
+        for phase, entry in stats.phases.items()
+    ]
+    lines.append(f"Peak RSS: {_mib(stats.peak_rss_bytes)} (largest child process: {_mib(stats.worker_peak_rss_bytes)})")
+    if stats.tracemalloc_peak_bytes is not None:
+        lines.append(f"tracemalloc peak: {_mib(stats.tracemalloc_peak_bytes)}")
+    return lines
+
+
+def iter_json_array(path: Path, chunk_size: int = 1 << 16) -> Iterator[Record]:
+    """Stream the objects of a JSON array (a tools.json catalog) without loading the file.
+
+    The file is read ``chunk_size`` characters at a time and each object is
+    decoded as soon as it is complete; ValueError if the file is not an
+    array of objects.
+    """
+    decoder = json.JSONDecoder()
+    with path.open("r", encoding="utf-8") as f:
+        buffer, pos, eof = "", 0, False
+        state = "start"  # expecting '[', then an object or ']', then ',' or ']'
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos == len(buffer):
+                if eof:
+                    raise ValueError(f"{path}: unexpected end of JSON array")
+                buffer, pos = f.read(chunk_size), 0
+                eof = not buffer
+                continue
+            char = buffer[pos]
+            if state == "start":
+                if char != "[":
+                    raise ValueError(f"{path} is not a JSON array")
+                pos += 1
+                state = "first"
+            elif char == "]" and state in ("first", "next"):
+                return
+            elif state == "next":
+                if char != ",":
+                    raise ValueError(f"{path}: expected ',' or ']' after an object in the JSON array")
+                pos += 1
+                state = "object"
+            elif char != "{":
+                raise ValueError(f"{path}: expected an object in the JSON array")
+            else:
+                try:
+                    record, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    more = f.read(chunk_size)
+                    if not more:
+                        raise ValueError(f"{path}: unexpected end of JSON array") from None
+                    buffer, pos = buffer[pos:] + more, 0
+                    continue
+                yield record
+                state = "next"
+
+
+def summary_lines(stats: ExtractionStats, total_tools: int, cache_enabled: bool, out_path: Path) -> List[str]:
+    """Render the counters written to tools_summary.txt."""
+    lines = [
+        f"Scanned files: {stats.files_scanned}",
+        f"Files skipped: {stats.files_skipped}",
+        *(f"  {reason}: {count}" for reason, count in sorted(stats.skip_reasons.items())),
+        f"Duplicate files reused: {stats.files_deduplicated} ({stats.bytes_deduplicated} bytes not parsed)",
+        f"Tools found: {total_tools}",
+    ]
+    if cache_enabled:
+        lines += [
+            f"Cache hits: {stats.cache_hits}",
+            f"Cache misses: {stats.cache_misses}",
+        ]
+    else:
+        lines.append("Cache: disabled")
+    if stats.wall_seconds:
+        lines += _metrics_lines(stats)
+    lines.append(f"Output: {out_path}")
+    return lines
+
+
+def write_summary(
+    path: Path, stats: ExtractionStats, total_tools: int, cache_enabled: bool, out_path: Path
+) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        f.write("\n".join(summary_lines(stats, total_tools, cache_enabled, out_path)) + "\n")
+
+
+def write_tools_json(records: Iterable[Record], path: Path) -> int:
+    """Write records as a JSON array in catalog order; return the count.
+
+    The records are collected in a ToolStore rather than a list, and each is
+    materialized again only to be written.
+    """
+    return write_json_array(ToolStore.from_records(records).iter_sorted(), path)
+
+
+def write_json_array(records: Iterable[Record], path: Path) -> int:
+    """Stream records, already in order, as a JSON array; return the count.
+
+    The text is the same as ``json.dump(list(records), f, ensure_ascii=False,
+    indent=2)``, without holding the list (e.g. ToolStore.iter_sorted).
+    """
+    count = 0
+    with path.open("w", encoding="utf-8") as f:
+        for record in records:
+            f.write(",\n  " if count else "[\n  ")
+            f.write(json.dumps(record, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+            count += 1
+        f.write("\n]" if count else "[]")
+    return count
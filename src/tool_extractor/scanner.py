@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import bisect
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+
+
+# String literals; prefixes are left out because only their extent matters
+_STRING = (
+    r'"""(?:[^"\\]|\\.|"(?!""))*"""'
+    r"|'''(?:[^'\\]|\\.|'(?!''))*'''"
+    r'|"(?:[^"\\\r\n]|\\.)*"'
+    r"|'(?:[^'\\\r\n]|\\.)*'"
+)
+# A run of code up to and including the next literal: comment, string, or a
+# quote that starts no valid string
+_CHUNK = re.compile(rf"[^\"'#]*(?:#[^\r\n]*|(?P<string>{_STRING})|(?P<bad>[\"']))?", re.S)
+_HEADER = re.compile(
+    rf"(?:{_STRING})|#[^\r\n]*|(?P<open>[(\[{{])|(?P<close>[)\]}}])|(?P<colon>:)|(?P<quote>[\"'])",
+    re.S,
+)
+_DOCSTRING = re.compile(rf"[rRuU]?(?:{_STRING})[ \t\f]*(?:#[^\r\n]*)?(?=\r\n|\r|\n|$)", re.S)
+_BODY_GAP = re.compile(r"(?:[ \t\f]*(?:#[^\r\n]*)?(?:\r\n|\r|\n))*[ \t\f]*")
+_TOP_LINE = re.compile(r"^[^ \t\f\r\n#]", re.M)
+_INDENTED_LINE = re.compile(r"^([ \t]+)[^ \t\f\r\n#]", re.M)
+_STATEMENT = re.compile(r"(?P<deco>@)|(?P<def>(?:async[ \t]+)?def\b)|(?P<cls>class\b)|(?P<keep>from\b|__all__\b)")
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+# Lines starting at exactly one indentation, compiled once per distinct indent
+_indent_patterns: Dict[str, Pattern[str]] = {}
+
+# (start, end, text appended after source[start:end]) for each kept region
+_Piece = Tuple[int, int, str]
+
+
+class _Unsupported(Exception):
+    """The scanner met a construct it does not model; parse the file fully."""
+
+
+def _bracket_delta(source: str, start: int, end: int) -> int:
+    return (
+        source.count("(", start, end) + source.count("[", start, end) + source.count("{", start, end)
+        - source.count(")", start, end) - source.count("]", start, end) - source.count("}", start, end)
+    )
+
+
+class _Layout:
+    """Where a file's code is, as opposed to string literals and comments.
+
+    Only quotes and '#' are visited in Python; the code between literals is
+    kept as segments whose bracket balance is counted with ``str.count``, so
+    the bracket depth at any position is a bisect plus a few counts.
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.segment_starts: List[int] = []
+        self.segment_ends: List[int] = []
+        self.depth_at_start: List[int] = []
+        starts, ends, depths = self.segment_starts, self.segment_ends, self.depth_at_start
+        count = source.count
+        depth = 0
+        end = len(source)
+        for m in _CHUNK.finditer(source):
+            start = m.start()
+            if m.lastgroup == "bad":
+                raise _Unsupported("unterminated string")
+            # Where the code run ends: the literal's first character
+            code_end = source.find("#", start, m.end())
+            if m.lastgroup == "string":
+                code_end = m.start("string")
+            elif code_end < 0:
+                code_end = m.end()
+            starts.append(start)
+            ends.append(code_end)
+            depths.append(depth)
+            if code_end > start:
+                depth += (
+                    count("(", start, code_end) + count("[", start, code_end) + count("{", start, code_end)
+                    - count(")", start, code_end) - count("]", start, code_end) - count("}", start, code_end)
+                )
+                if depth < 0:
+                    raise _Unsupported("unbalanced brackets")
+            if m.end() == end:
+                break
+        if depth:
+            raise _Unsupported("unbalanced brackets")
+
+    def is_code(self, pos: int) -> bool:
+        """Whether a line starting at pos begins a statement (not inside a literal or brackets)."""
+        k = bisect.bisect_right(self.segment_starts, pos) - 1
+        if pos > self.segment_ends[k]:
+            return False
+        return self.depth_at_start[k] + _bracket_delta(self.source, self.segment_starts[k], pos) == 0
+
+
+def _header_colon(source: str, pos: int, limit: int) -> int:
+    """Index of the ':' ending the def/class header that starts at pos."""
+    depth = 0
+    for m in _HEADER.finditer(source, pos, limit):
+        kind = m.lastgroup
+        if kind == "open":
+            depth += 1
+        elif kind == "close":
+            depth -= 1
+        elif kind == "colon" and depth == 0:
+            return m.start()
+        elif kind == "quote":
+            break
+    raise _Unsupported("no header colon")
+
+
+def _definition_piece(source: str, start: int, keyword_pos: int, limit: int) -> Tuple[_Piece, bool]:
+    """Keep a def/class header and its docstring; stub the body otherwise.
+
+    Returns the piece and whether a docstring was kept.
+    """
+    colon = _header_colon(source, keyword_pos, limit)
+    body = _BODY_GAP.match(source, colon + 1, limit).end()
+    doc = _DOCSTRING.match(source, body, limit)
+    if doc is not None:
+        return (start, doc.end(), ""), True
+    if source.startswith(("'", '"'), body) or source[body : body + 2].lower() in ("r'", 'r"', "u'", 'u"'):
+        # A string that is not a whole statement ("a" "b", "x".join(...))
+        raise _Unsupported("complex docstring")
+    return (start, colon + 1, " ..."), False
+
+
+def _class_pieces(source: str, layout: _Layout, start: int, keyword_pos: int, end: int) -> List[_Piece]:
+    """Pieces for a class: header, docstring and the header/docstring of each direct method."""
+    header, _ = _definition_piece(source, start, keyword_pos, end)
+    members: List[_Piece] = []
+    body_indent: Optional[str] = None
+    for m in _INDENTED_LINE.finditer(source, header[1], end):
+        if layout.is_code(m.end() - 1):
+            body_indent = m.group(1)
+            break
+    if body_indent is not None:
+        pattern = _indent_patterns.get(body_indent)
+        if pattern is None:
+            pattern = re.compile("^" + re.escape(body_indent) + r"[^ \t\f\r\n#]", re.M)
+            _indent_patterns[body_indent] = pattern
+        decorated: Optional[int] = None
+        for m in pattern.finditer(source, header[1], end):
+            first = m.end() - 1
+            if not layout.is_code(first):
+                continue
+            stmt = _STATEMENT.match(source, first)
+            kind = stmt.lastgroup if stmt is not None else None
+            if kind == "deco":
+                if decorated is None:
+                    decorated = m.start()
+                continue
+            if kind == "def":
+                piece, _ = _definition_piece(source, decorated if decorated is not None else m.start(), first, end)
+                members.append(piece)
+            # Anything else, decorated nested classes included, is left out
+            decorated = None
+    if members and header[2]:
+        # Members follow, so the header must not end in a one-line stub body
+        header = (header[0], header[1], "")
+    return [header] + members
+
+
+def reduce_source(source: str) -> Optional[str]:
+    """Blank out everything the collection pass does not read.
+
+    Keeps top-level ``def``/``async def``/``class`` headers with their
+    decorators and docstrings, the same for methods directly in a class body,
+    and whole top-level ``from ... import`` and ``__all__`` statements. Other
+    text is replaced by its line breaks only, so line numbers and column
+    offsets of everything kept are unchanged and the result parses to the same
+    top-level facts at a fraction of the cost. Returns None when the file uses
+    something the scanner does not model, in which case it must be parsed
+    fully.
+    """
+    try:
+        layout = _Layout(source)
+        tops = [m.start() for m in _TOP_LINE.finditer(source) if layout.is_code(m.start())]
+        tops.append(len(source))
+        pieces: List[_Piece] = []
+        decorated: Optional[int] = None
+        for i, start in enumerate(tops[:-1]):
+            end = tops[i + 1]
+            stmt = _STATEMENT.match(source, start)
+            kind = stmt.lastgroup if stmt is not None else None
+            if kind == "deco":
+                if decorated is None:
+                    decorated = start
+                continue
+            begin = decorated if decorated is not None else start
+            if decorated is not None and kind not in ("def", "cls"):
+                raise _Unsupported("decorator without definition")
+            decorated = None
+            if kind == "def":
+                pieces.append(_definition_piece(source, begin, start, end)[0])
+            elif kind == "cls":
+                pieces.extend(_class_pieces(source, layout, begin, start, end))
+            elif kind == "keep":
+                pieces.append((start, end, ""))
+    except _Unsupported:
+        return None
+
+    out: List[str] = []
+    pos = 0
+    for start, end, suffix in pieces:
+        out.extend(_LINE_BREAK.findall(source, pos, start))
+        out.append(source[start:end])
+        out.append(suffix)
+        pos = end
+    out.extend(_LINE_BREAK.findall(source, pos))
+    return "".join(out)
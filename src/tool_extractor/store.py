@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import fields
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .models import ToolRecord
+
+
+_RECORD_FIELDS = frozenset(f.name for f in fields(ToolRecord))
+# Added to every record by --call-graph (synthesis._with_calls)
+_CALL_FIELDS = ("calls", "centrality")
+
+
+class ToolStore:
+    """Tool records held column-wise, with every string interned once.
+
+    A catalog of a million records as dicts costs about a kilobyte per
+    record: the dict itself plus its own copy of every string when the
+    records come from a JSON catalog. The store keeps one array entry per
+    field instead, pointing into a table of distinct strings, so modules,
+    files, kinds and repeated signatures are stored once.
+
+    Definition fields (signature, doc_first_line, file, lineno, kind) live in
+    a separate table. A re-export whose origin row is already in the store
+    and has the same definition points at the origin's entry, so adding
+    re-exports costs little beyond their module and name. ids are not stored
+    when they are ``module:name`` (always so for iter_tools output), and
+    neither are origin ids that name a row in the store.
+
+    Records from ``--call-graph`` keep their ``calls`` (interned ids) and
+    ``centrality``; these columns are only allocated once such a record is
+    added. A record with any other field raises ValueError rather than
+    losing it, and so does one missing a ToolRecord field (``kind``,
+    ``origin_id`` and ``parent_id`` are absent from catalogs written before
+    they were added).
+
+    Dicts are only built when records are read back (iteration, ``record``,
+    ``iter_sorted``), with the same keys and values they were added with, in
+    ToolRecord order followed by ``calls`` and ``centrality``.
+    """
+
+    def __init__(self) -> None:
+        self._string_ids: Dict[str, int] = {}
+        self._strings: List[str] = []
+        # Per row
+        self._module = array("I")
+        self._name = array("I")
+        self._parent = array("i")  # interned parent_id, -1 for None
+        self._origin = array("q")  # origin row, or -1 - interned origin_id when not in the store
+        self._definition = array("I")
+        # Per definition
+        self._signature = array("I")
+        self._doc = array("I")
+        self._file = array("I")
+        self._lineno = array("I")
+        self._kind = array("I")
+        # (module, name) of rows that are their own origin, to resolve re-exports
+        self._direct_rows: Dict[int, int] = {}
+        # Rows whose id is not module:name
+        self._odd_ids: Dict[int, int] = {}
+        # Per row once a record with calls is added: offset of the row's calls in
+        # _callees (-1 for a record without them), their count and the centrality
+        self._call_start: Optional[array] = None
+        self._call_count = array("I")
+        self._centrality = array("d")
+        self._callees = array("I")
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "ToolStore":
+        """A store holding ``records`` (e.g. iter_tools or output.iter_jsonl), consumed one at a time."""
+        store = cls()
+        store.extend(records)
+        return store
+
+    def __len__(self) -> int:
+        return len(self._module)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Records in the order they were added."""
+        for row in range(len(self)):
+            yield self.record(row)
+
+    def _intern(self, text: str) -> int:
+        index = self._string_ids.get(text)
+        if index is None:
+            index = self._string_ids[text] = len(self._strings)
+            self._strings.append(text)
+        return index
+
+    def _key(self, module: int, name: int) -> int:
+        return (module << 32) | name
+
+    def _same_definition(self, definition: int, record: Dict[str, Any]) -> bool:
+        s = self._strings
+        return (
+            s[self._signature[definition]] == record["signature"]
+            and s[self._doc[definition]] == record["doc_first_line"]
+            and s[self._file[definition]] == record["file"]
+            and self._lineno[definition] == record["lineno"]
+            and s[self._kind[definition]] == record["kind"]
+        )
+
+    def _add_definition(self, record: Dict[str, Any]) -> int:
+        self._signature.append(self._intern(record["signature"]))
+        self._doc.append(self._intern(record["doc_first_line"]))
+        self._file.append(self._intern(record["file"]))
+        self._lineno.append(record["lineno"])
+        self._kind.append(self._intern(record["kind"]))
+        return len(self._signature) - 1
+
+    def _check_fields(self, record: Dict[str, Any]) -> bool:
+        """Whether record carries the call-graph fields; raise if it lacks or has fields the store cannot hold."""
+        missing = _RECORD_FIELDS - record.keys()
+        if missing:
+            raise ValueError(
+                f"ToolStore needs record fields: {', '.join(sorted(missing))} "
+                "(catalog written by an older tool_extractor?)"
+            )
+        unknown = record.keys() - _RECORD_FIELDS
+        other = unknown - set(_CALL_FIELDS)
+        if other:
+            raise ValueError(f"ToolStore cannot hold record fields: {', '.join(sorted(other))}")
+        if len(unknown) != len(_CALL_FIELDS):
+            raise ValueError("ToolStore holds calls and centrality only together")
+        return True
+
+    def _add_calls(self, row: int, record: Optional[Dict[str, Any]]) -> None:
+        if self._call_start is None:
+            self._call_start = array("q", [-1]) * row
+            self._call_count = array("I", [0]) * row
+            self._centrality = array("d", [0.0]) * row
+        if record is None:
+            self._call_start.append(-1)
+            self._call_count.append(0)
+            self._centrality.append(0.0)
+            return
+        self._call_start.append(len(self._callees))
+        self._call_count.append(len(record["calls"]))
+        self._centrality.append(record["centrality"])
+        self._callees.extend(self._intern(callee) for callee in record["calls"])
+
+    def add(self, record: Dict[str, Any]) -> int:
+        """Append a record (a ToolRecord dict, optionally with calls and centrality); return its row."""
+        row = len(self)
+        with_calls = record.keys() != _RECORD_FIELDS and self._check_fields(record)
+        module = self._intern(record["module"])
+        name = self._intern(record["name"])
+        tool_id = record["id"]
+        if tool_id != f"{record['module']}:{record['name']}":
+            self._odd_ids[row] = self._intern(tool_id)
+        parent_id: Optional[str] = record["parent_id"]
+
+        origin_id = record["origin_id"]
+        origin: Optional[int] = None
+        if origin_id == tool_id:
+            origin = row
+        elif row not in self._odd_ids:
+            origin_module, _, origin_name = origin_id.partition(":")
+            m, n = self._string_ids.get(origin_module), self._string_ids.get(origin_name)
+            if m is not None and n is not None:
+                origin = self._direct_rows.get(self._key(m, n))
+        if origin is not None and origin != row and self._same_definition(self._definition[origin], record):
+            definition = self._definition[origin]
+        else:
+            definition = self._add_definition(record)
+
+        self._module.append(module)
+        self._name.append(name)
+        self._parent.append(-1 if parent_id is None else self._intern(parent_id))
+        self._origin.append(origin if origin is not None else -1 - self._intern(origin_id))
+        self._definition.append(definition)
+        if origin == row and row not in self._odd_ids:
+            self._direct_rows[self._key(module, name)] = row
+        if with_calls or self._call_start is not None:
+            self._add_calls(row, record if with_calls else None)
+        return row
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self.add(record)
+
+    def tool_id(self, row: int) -> str:
+        odd = self._odd_ids.get(row)
+        if odd is not None:
+            return self._strings[odd]
+        return f"{self._strings[self._module[row]]}:{self._strings[self._name[row]]}"
+
+    def parent_id(self, row: int) -> Optional[str]:
+        parent = self._parent[row]
+        return self._strings[parent] if parent >= 0 else None
+
+    def kind(self, row: int) -> str:
+        return self._strings[self._kind[self._definition[row]]]
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """The record at ``row`` as a fresh dict, keys in ToolRecord order (then calls and centrality)."""
+        s = self._strings
+        module, name = s[self._module[row]], s[self._name[row]]
+        odd = self._odd_ids.get(row)
+        tool_id = f"{module}:{name}" if odd is None else s[odd]
+        origin = self._origin[row]
+        if origin == row:
+            origin_id = tool_id
+        elif origin >= 0:
+            origin_id = f"{s[self._module[origin]]}:{s[self._name[origin]]}"
+        else:
+            origin_id = s[-1 - origin]
+        parent = self._parent[row]
+        definition = self._definition[row]
+        # Same keys and order as ToolRecord.to_dict()
+        record = {
+            "id": tool_id,
+            "module": module,
+            "name": name,
+            "signature": s[self._signature[definition]],
+            "doc_first_line": s[self._doc[definition]],
+            "file": s[self._file[definition]],
+            "lineno": self._lineno[definition],
+            "origin_id": origin_id,
+            "kind": s[self._kind[definition]],
+            "parent_id": s[parent] if parent >= 0 else None,
+        }
+        start = self._call_start[row] if self._call_start is not None else -1
+        if start >= 0:
+            record["calls"] = [s[i] for i in self._callees[start : start + self._call_count[row]]]
+            record["centrality"] = self._centrality[row]
+        return record
+
+    def sorted_rows(self, rows: Optional[Iterable[int]] = None) -> List[int]:
+        """``rows`` (default: all) in catalog order (output.tool_sort_key), ties in the given order.
+
+        Sorts by the ranks of the interned strings, so no (module, name)
+        tuples are built per row.
+        """
+        rank = array("I", bytes(4 * len(self._strings)))
+        for position, index in enumerate(sorted(range(len(self._strings)), key=self._strings.__getitem__)):
+            rank[index] = position
+        module, name = self._module, self._name
+        return sorted(
+            range(len(self)) if rows is None else rows, key=lambda row: (rank[module[row]] << 32) | rank[name[row]]
+        )
+
+    def iter_sorted(self) -> Iterator[Dict[str, Any]]:
+        """Records in catalog order, materialized one at a time (see output.write_json_array)."""
+        for row in self.sorted_rows():
+            yield self.record(row)
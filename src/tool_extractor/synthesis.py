@@ -0,0 +1,1001 @@
+from __future__ import annotations
+
+import bisect
+import operator
+from collections import deque
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, TypeVar
+
+from .callgraph import centrality
+from .filesystem import is_package_init
+from .metrics import PhaseClock
+from .models import DefinitionSummary, ExtractionStats, FileSummary, ToolRecord
+from .store import ToolStore
+
+
+T = TypeVar("T")
+
+
+def _normalize_module_name(mod: str) -> str:
+    """Normalize module names for src-layout and future rules.
+
+    Current rules:
+    - Strip leading 'src.' if present.
+    """
+    if mod.startswith("src."):
+        mod = mod[len("src.") :]
+    return mod
+
+
+def _module_name_for(file_path: Path, repo_root: Path) -> str:
+    """Compute the dotted module name for a file under the repository root.
+
+    - Produces src-layout aware names (e.g., strips trailing '.__init__').
+    - Normalizes with _normalize_module_name for consistency across layouts.
+    """
+    return _module_name_for_rel(file_path.relative_to(repo_root).as_posix())
+
+
+def _module_name_for_rel(rel: str) -> str:
+    """Dotted module name for a repo-relative posix path (see _module_name_for)."""
+    mod = rel[: -4 if rel.endswith(".pyi") else -3].replace("/", ".")  # strip .py / .pyi
+    if mod.endswith(".__init__"):
+        mod = mod[: -len(".__init__")]
+    return _normalize_module_name(mod)
+
+
+def _resolve_relative_module(current_module: str, module: Optional[str], level: int) -> str:
+    """Resolve a relative import target to an absolute dotted path.
+
+    Parameters
+    - current_module: The dotted path of the module performing the import
+      (e.g., 'pkg.subpkg.__init__' caller context already normalized upstream).
+    - module: The 'from X import ...' target (can be None for 'from . import ...').
+    - level: The number of leading dots indicating relative depth.
+
+    The algorithm climbs 'level-1' parents from current_module, then appends the
+    explicit 'module' if provided. For 'from . import subpkg as alias', module is
+    None and we return the package prefix for alias handling at the call site.
+    """
+    # Resolve relative import target to absolute dotted path
+    if level <= 0:
+        return module or current_module
+    parts = current_module.split(".")
+    # If importing from a package __init__, current_module is the package path
+    base = parts[: len(parts) - level + 1] if level > 0 else parts
+    prefix = ".".join([p for p in base if p])
+    if module:
+        if prefix:
+            return f"{prefix}.{module}"
+        return module
+    return prefix
+
+
+def _star_base(module: str, is_init: bool) -> str:
+    """Module that relative imports are resolved against (the enclosing package)."""
+    if is_init:
+        return module
+    return module.rpartition(".")[0]
+
+
+def _file_key(rel: str) -> Tuple[str, ...]:
+    """Sort key reproducing discovery order (name order, depth first)."""
+    return tuple(rel.split("/"))
+
+
+def _parent_prefixes(full: str) -> Iterator[str]:
+    """Yield every package prefix P such that full starts with 'P.'."""
+    pos = full.find(".")
+    while pos != -1:
+        yield full[:pos]
+        pos = full.find(".", pos + 1)
+
+
+def _score(full: str, name: str) -> int:
+    """Prefer modules whose leaf matches the name ('<name>' > '_<name>' > other)."""
+    mod = full.rsplit(".", 1)[0]
+    leaf = mod.split(".")[-1]
+    if leaf == name:
+        return 3
+    if leaf == f"_{name}":
+        return 2
+    return 1
+
+
+def _member_records(
+    cls: DefinitionSummary, class_record: Dict[str, Any], file: str, origin_class_id: str
+) -> Iterator[Dict[str, Any]]:
+    """Records for a class's members, exposed under the given class record."""
+    for member in cls.members:
+        yield ToolRecord(
+            id=f"{class_record['id']}.{member.name}",
+            module=class_record["module"],
+            name=f"{class_record['name']}.{member.name}",
+            signature=member.signature,
+            doc_first_line=member.doc_first_line,
+            file=file,
+            lineno=member.lineno,
+            origin_id=f"{origin_class_id}.{member.name}",
+            kind=member.kind,
+            parent_id=class_record["id"],
+        ).to_dict()
+
+
+def _with_implementation_docs(stub: FileSummary, impl: Optional[FileSummary]) -> FileSummary:
+    """The stub's summary with the docstrings it lacks taken from its implementation.
+
+    Definitions and class members are matched by name; everything else,
+    signatures and line numbers included, comes from the stub, except calls,
+    which only the implementation's bodies make.
+    """
+    if impl is None:
+        return stub
+    found = {d.name: d for d in impl.defs}
+    defs: List[DefinitionSummary] = []
+    for d in stub.defs:
+        source = found.get(d.name)
+        if source is not None:
+            found_members = {m.name: m for m in source.members}
+            members = []
+            for m in d.members:
+                impl_member = found_members.get(m.name)
+                if impl_member is not None:
+                    m = replace(
+                        m, doc_first_line=m.doc_first_line or impl_member.doc_first_line, calls=impl_member.calls
+                    )
+                members.append(m)
+            d = replace(
+                d, doc_first_line=d.doc_first_line or source.doc_first_line, members=members, calls=source.calls
+            )
+        defs.append(d)
+    return replace(stub, defs=defs)
+
+
+@dataclass
+class _FileState:
+    key: Tuple[str, ...]
+    module: str
+    is_init: bool
+    summary: FileSummary
+    tops: List[ToolRecord]  # one per top-level definition, in source order
+    defs: Dict[str, ToolRecord]  # full dotted -> last definition in this file
+    classes: Dict[str, DefinitionSummary]  # full dotted -> last class definition
+    rows: Optional[range] = None  # of its records in the index's store, added on first output
+
+
+@dataclass
+class _Emitter:
+    """Records a package exposes for one public module.
+
+    Either a package's own exports (public_module == source_pkg) or an aliased
+    subpackage (``from . import sub as alias``: public 'pkg.alias', source
+    'pkg.sub'). ``rows`` (of its records in the index's store) is None while
+    the emitter needs recomputation. ``origins`` and ``hops`` are every dotted
+    name and re-exporting module its records were resolved through.
+    """
+
+    public_module: str
+    source_pkg: str
+    rows: Optional[range] = None
+    origins: Set[str] = field(default_factory=set)
+    hops: Set[str] = field(default_factory=set)
+
+
+class ToolIndex:
+    """Pass-1 state of a repository plus incrementally maintained Pass 2.
+
+    Files are added, replaced or removed one at a time by their repo-relative
+    path. Each change only invalidates what it can influence: the export
+    mappings of packages whose inputs (their ``__init__`` re-exports, ``__all__``
+    and aliases, or the definitions under their prefix) changed, and the
+    emitted records that dereference changed definitions. Recomputation happens
+    lazily when records are requested, so the cost of an update follows the
+    size of the change rather than the size of the repository.
+
+    Semantics match a single full pass: definitions are ordered by discovery
+    order, a later file defining the same dotted name wins, ties in export
+    inference go to the definition found first, and direct definitions take
+    precedence over synthesized public records with the same id.
+
+    ``from X import *`` is resolved to the names X exports: its ``__all__`` when
+    present, its public names otherwise, including names X itself obtained by
+    star import. These sets are solved as a least fixed point over the star
+    import graph with a worklist (cycles included), and a change only re-solves
+    the modules that can observe it; packages are invalidated only if their
+    set actually changed.
+
+    A ``.pyi`` stub takes the place of the ``.py`` file next to it: the
+    module's definitions, signatures and line numbers come from the stub and
+    only the docstrings it lacks from the implementation, which is otherwise
+    ignored. Records then name the stub as their file.
+
+    Records are held in a ToolStore (``store``) rather than as dicts, each
+    file's and emitter's as a range of rows. Rows of replaced files and
+    invalidated emitters go stale; once they are the majority, an update
+    copies the live rows to a fresh store. Without ``keep_records``, for
+    consumers that read the records once (_synthesize_tools), file_records
+    and public_records build them afresh instead of keeping them.
+    """
+
+    def __init__(self, keep_records: bool = True) -> None:
+        self._keep_records = keep_records
+        self._files: Dict[str, _FileState] = {}
+        # stub rel -> its summary, and implementation rel -> summary of a
+        # .py file hidden by its stub (None if it could not be parsed)
+        self._stubs: Dict[str, Optional[FileSummary]] = {}
+        self._shadowed: Dict[str, Optional[FileSummary]] = {}
+        self._file_order: List[Tuple[Tuple[str, ...], str]] = []
+
+        # full dotted name -> {rel: (position, record)}; position is the
+        # (file key, index) of the definition within its file
+        self._defs: Dict[str, Dict[str, Tuple[Tuple[Any, ...], ToolRecord]]] = {}
+        self._sorted_fulls: List[str] = []
+        self._under_memo: Dict[str, List[str]] = {}
+
+        # package -> {rel: contribution} for package __init__ inputs
+        self._pkg_exports: Dict[str, Dict[str, Dict[str, str]]] = {}
+        self._pkg_all: Dict[str, Dict[str, Set[str]]] = {}
+        self._pkg_aliases: Dict[str, Dict[str, Dict[str, str]]] = {}
+
+        self._mappings: Dict[str, Dict[str, str]] = {}
+        self._prefix_watchers: Dict[str, Set[str]] = {}  # prefix -> packages inferred from it
+
+        self._emitters: Dict[Tuple[str, ...], _Emitter] = {}
+        self._owned: Dict[str, Set[Tuple[str, ...]]] = {}  # package -> emitter keys it defines
+        self._pkg_users: Dict[str, Set[Tuple[str, ...]]] = {}  # source pkg -> emitter keys
+        self._origin_users: Dict[str, Set[Tuple[str, ...]]] = {}  # origin full -> emitter keys
+        self._hop_users: Dict[str, Set[Tuple[str, ...]]] = {}  # re-exporting module -> emitter keys
+        # origin full -> (canonical definition or None, names traversed to get there)
+        self._canonical: Dict[str, Tuple[Optional[str], Tuple[str, ...]]] = {}
+        self._direct_ids: Dict[str, int] = {}
+        self._store = ToolStore()
+        self._stale_rows = 0
+
+        # Star imports: module -> {rel: resolved source modules}, the reverse
+        # edges, and the solved name -> origin sets of modules on those edges
+        self._module_files: Dict[str, Set[str]] = {}
+        self._module_stars: Dict[str, Dict[str, List[str]]] = {}
+        self._star_edges: Dict[str, Set[str]] = {}
+        self._star_importers: Dict[str, Set[str]] = {}
+        self._star_exports: Dict[str, Dict[str, str]] = {}
+        self._star_dirty: Set[str] = set()
+
+    # -- file updates -----------------------------------------------------
+
+    def __contains__(self, rel: str) -> bool:
+        return rel in self._files
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def update(self, rel: str, summary: Optional[FileSummary]) -> None:
+        """Add or replace a file.
+
+        A None summary (unreadable or unparsable file) removes its contributions.
+        Records are not built here but on first output (file_records).
+        """
+        if rel.endswith(".pyi"):
+            impl = rel[:-1]
+            state = self._files.get(impl)
+            if rel not in self._stubs and state is not None:
+                self._shadowed[impl] = state.summary
+            self._stubs[rel] = summary
+            self._sync_stub(rel)
+        elif rel + "i" in self._stubs:
+            self._shadowed[rel] = summary
+            self._sync_stub(rel + "i")
+        else:
+            self._set_file(rel, summary)
+        self._compact()
+
+    def remove(self, rel: str) -> None:
+        """Forget a file and everything it contributed."""
+        if rel in self._stubs:
+            del self._stubs[rel]
+            self._remove_file(rel)
+            if rel[:-1] in self._shadowed:
+                self._set_file(rel[:-1], self._shadowed.pop(rel[:-1]))
+        elif rel in self._shadowed:
+            del self._shadowed[rel]
+            self._sync_stub(rel + "i")
+        else:
+            self._remove_file(rel)
+        self._compact()
+
+    def _sync_stub(self, stub_rel: str) -> None:
+        """Re-derive the module of a stub and its implementation from both summaries."""
+        impl_rel = stub_rel[:-1]
+        stub = self._stubs[stub_rel]
+        impl = self._shadowed.get(impl_rel)
+        if stub is None:
+            # An unparsable stub does not hide its implementation
+            self._remove_file(stub_rel)
+            self._set_file(impl_rel, impl)
+        else:
+            self._remove_file(impl_rel)
+            self._set_file(stub_rel, _with_implementation_docs(stub, impl))
+
+    def _set_file(self, rel: str, summary: Optional[FileSummary]) -> None:
+        self._remove_file(rel)
+        if summary is None:
+            return
+        module = _module_name_for_rel(rel)
+        key = _file_key(rel)
+        state = _FileState(
+            key=key,
+            module=module,
+            is_init=is_package_init(rel),
+            summary=summary,
+            tops=[],
+            defs={},
+            classes={},
+        )
+        for i, d in enumerate(summary.defs):
+            record = ToolRecord(
+                id=f"{module}:{d.name}",
+                module=module,
+                name=d.name,
+                signature=d.signature,
+                doc_first_line=d.doc_first_line,
+                file=rel,
+                lineno=d.lineno,
+                origin_id=f"{module}:{d.name}",
+                kind=d.kind,
+                parent_id=None,
+            )
+            state.tops.append(record)
+            full = f"{module}.{d.name}"
+            contributors = self._defs.setdefault(full, {})
+            previous = contributors.get(rel)
+            # Position of the first occurrence, value of the last (like dict assignment)
+            position = previous[0] if previous is not None else (key, i)
+            contributors[rel] = (position, record)
+            state.defs[full] = record
+            if d.kind == "class":
+                state.classes[full] = d
+            else:
+                state.classes.pop(full, None)
+        self._files[rel] = state
+        bisect.insort(self._file_order, (key, rel))
+        self._module_files.setdefault(module, set()).add(rel)
+        if summary.star_imports:
+            base = _star_base(module, state.is_init)
+            self._module_stars.setdefault(module, {})[rel] = [
+                _resolve_relative_module(base, mod, level) for mod, level in summary.star_imports
+            ]
+        self._star_inputs_changed(module)
+
+        for record in state.tops:
+            self._direct_ids[record.id] = self._direct_ids.get(record.id, 0) + 1
+        for full in state.defs:
+            if len(self._defs[full]) == 1:
+                bisect.insort(self._sorted_fulls, full)
+            self._definition_changed(full)
+        if state.is_init:
+            self._set_package_inputs(rel, state)
+
+    def _remove_file(self, rel: str) -> None:
+        state = self._files.pop(rel, None)
+        if state is None:
+            return
+        del self._file_order[bisect.bisect_left(self._file_order, (state.key, rel))]
+        if state.rows is not None:
+            self._stale_rows += len(state.rows)
+        for record in state.tops:
+            count = self._direct_ids[record.id] - 1
+            if count:
+                self._direct_ids[record.id] = count
+            else:
+                del self._direct_ids[record.id]
+        for full in state.defs:
+            contributors = self._defs[full]
+            del contributors[rel]
+            if not contributors:
+                del self._defs[full]
+                del self._sorted_fulls[bisect.bisect_left(self._sorted_fulls, full)]
+            self._definition_changed(full)
+        files = self._module_files[state.module]
+        files.discard(rel)
+        if not files:
+            del self._module_files[state.module]
+        stars = self._module_stars.get(state.module)
+        if stars is not None and stars.pop(rel, None) is not None and not stars:
+            del self._module_stars[state.module]
+        self._star_inputs_changed(state.module)
+        if state.is_init:
+            self._clear_package_inputs(rel, state.module)
+
+    # -- invalidation -----------------------------------------------------
+
+    def _invalidate_emitter(self, key: Tuple[str, ...]) -> None:
+        emitter = self._emitters.get(key)
+        if emitter is not None:
+            for users_by, names in ((self._origin_users, emitter.origins), (self._hop_users, emitter.hops)):
+                for name in names:
+                    users = users_by.get(name)
+                    if users is not None:
+                        users.discard(key)
+                        if not users:
+                            del users_by[name]
+            emitter.origins = set()
+            emitter.hops = set()
+            if emitter.rows is not None:
+                self._stale_rows += len(emitter.rows)
+                emitter.rows = None
+
+    def _compact(self) -> None:
+        """Copy the rows in use to a fresh store once most of the store is stale."""
+        if self._stale_rows * 2 <= len(self._store):
+            return
+        old, self._store = self._store, ToolStore()
+        # Files first, so re-exports share the definitions of their origins again
+        for holder in [*self._files.values(), *self._emitters.values()]:
+            if holder.rows is not None:
+                start = len(self._store)
+                self._store.extend(map(old.record, holder.rows))
+                holder.rows = range(start, len(self._store))
+        self._stale_rows = 0
+
+    def _invalidate_package(self, pkg: str) -> None:
+        if self._canonical:
+            self._canonical.clear()
+        if self._mappings.pop(pkg, None) is not None:
+            for key in list(self._pkg_users.get(pkg, ())):
+                self._invalidate_emitter(key)
+        for key in list(self._hop_users.get(pkg, ())):
+            self._invalidate_emitter(key)
+
+    def _definition_changed(self, full: str) -> None:
+        if self._canonical:
+            self._canonical.clear()
+        for key in list(self._origin_users.get(full, ())):
+            self._invalidate_emitter(key)
+        for prefix in _parent_prefixes(full):
+            self._under_memo.pop(prefix, None)
+            for pkg in list(self._prefix_watchers.get(prefix, ())):
+                self._invalidate_package(pkg)
+
+    def _set_package_inputs(self, rel: str, state: _FileState) -> None:
+        pkg = state.module
+        summary = state.summary
+        exports: Dict[str, str] = {}
+        for mod, level, name, exported_name in summary.exports:
+            abs_mod = _resolve_relative_module(pkg, mod, level)
+            exports[exported_name] = f"{abs_mod}.{name}"
+        if exports:
+            self._pkg_exports.setdefault(pkg, {})[rel] = exports
+        if summary.literal_all:
+            self._pkg_all.setdefault(pkg, {})[rel] = set(summary.literal_all)
+        aliases: Dict[str, str] = {}
+        for alias, subpkg in summary.aliases:
+            aliases[alias] = subpkg
+        if aliases:
+            self._pkg_aliases.setdefault(pkg, {})[rel] = aliases
+        self._package_inputs_changed(pkg)
+
+    def _clear_package_inputs(self, rel: str, pkg: str) -> None:
+        for inputs in (self._pkg_exports, self._pkg_all, self._pkg_aliases):
+            per_file = inputs.get(pkg)
+            if per_file is not None and per_file.pop(rel, None) is not None and not per_file:
+                del inputs[pkg]
+        self._package_inputs_changed(pkg)
+
+    def _merged(self, inputs: Dict[str, Dict[str, Any]], pkg: str) -> Dict[str, Any]:
+        """Merge per-file contributions for a package in discovery order."""
+        merged: Dict[str, Any] = {}
+        per_file = inputs.get(pkg, {})
+        for rel in sorted(per_file, key=_file_key):
+            merged.update(per_file[rel])
+        return merged
+
+    def _merged_all(self, pkg: str) -> Set[str]:
+        names: Set[str] = set()
+        for contribution in self._pkg_all.get(pkg, {}).values():
+            names |= contribution
+        return names
+
+    def _package_inputs_changed(self, pkg: str) -> None:
+        """Re-derive the emitters owned by a package after its __init__ changed."""
+        self._invalidate_package(pkg)
+        wanted: Dict[Tuple[str, ...], Tuple[str, str]] = {}
+        if pkg in self._pkg_exports or pkg in self._pkg_all or self._has_init_stars(pkg):
+            wanted[("pkg", pkg)] = (pkg, pkg)
+        for alias, subpkg in self._merged(self._pkg_aliases, pkg).items():
+            wanted[("alias", pkg, alias)] = (f"{pkg}.{alias}", f"{pkg}.{subpkg}")
+        owned = self._owned.get(pkg, set())
+        for key in list(owned):
+            emitter = self._emitters[key]
+            if wanted.get(key) != (emitter.public_module, emitter.source_pkg):
+                self._drop_emitter(key)
+                owned.discard(key)
+        for key, (public_module, source_pkg) in wanted.items():
+            if key not in self._emitters:
+                self._emitters[key] = _Emitter(public_module=public_module, source_pkg=source_pkg)
+                self._pkg_users.setdefault(source_pkg, set()).add(key)
+                owned.add(key)
+            else:
+                self._invalidate_emitter(key)
+        if owned:
+            self._owned[pkg] = owned
+        else:
+            self._owned.pop(pkg, None)
+
+    def _has_init_stars(self, pkg: str) -> bool:
+        stars = self._module_stars.get(pkg, {})
+        return any(self._files[rel].is_init for rel in stars)
+
+    def _star_sources(self, module: str) -> List[str]:
+        sources: List[str] = []
+        per_file = self._module_stars.get(module, {})
+        for rel in sorted(per_file, key=_file_key):
+            sources.extend(src for src in per_file[rel] if src != module)
+        return sources
+
+    def _star_inputs_changed(self, module: str) -> None:
+        """Refresh a module's star-import edges and schedule it for re-solving."""
+        sources = set(self._star_sources(module))
+        for src in self._star_edges.pop(module, set()) - sources:
+            importers = self._star_importers[src]
+            importers.discard(module)
+            if not importers:
+                del self._star_importers[src]
+        for src in sources:
+            self._star_importers.setdefault(src, set()).add(module)
+        if sources:
+            self._star_edges[module] = sources
+        if module in self._star_exports or sources or module in self._star_importers:
+            self._star_dirty.add(module)
+
+    def _drop_emitter(self, key: Tuple[str, ...]) -> None:
+        self._invalidate_emitter(key)
+        emitter = self._emitters.pop(key)
+        users = self._pkg_users.get(emitter.source_pkg)
+        if users is not None:
+            users.discard(key)
+            if not users:
+                del self._pkg_users[emitter.source_pkg]
+
+    # -- star imports -----------------------------------------------------
+
+    def _star_namespace(self, module: str) -> Dict[str, str]:
+        """Names ``from module import *`` binds, given its sources' current sets.
+
+        Later bindings win: star imports in file order, then explicit
+        re-exports, then the module's own definitions. The result is filtered
+        by the module's ``__all__``, or to public names without one.
+        """
+        namespace: Dict[str, str] = {}
+        for src in self._star_sources(module):
+            namespace.update(self._star_value(src))
+        namespace.update(self._merged(self._pkg_exports, module))
+        names_all: Set[str] = set()
+        for rel in sorted(self._module_files.get(module, ()), key=_file_key):
+            summary = self._files[rel].summary
+            names_all.update(summary.literal_all)
+            for d in summary.defs:
+                namespace[d.name] = f"{module}.{d.name}"
+        if names_all:
+            return {name: origin for name, origin in namespace.items() if name in names_all}
+        return {name: origin for name, origin in namespace.items() if not name.startswith("_")}
+
+    def _star_value(self, module: str) -> Dict[str, str]:
+        value = self._star_exports.get(module)
+        if value is None:
+            if module in self._star_edges:
+                # Not reached yet by the solver; the fixed point starts empty
+                return {}
+            value = self._star_namespace(module)
+            self._star_exports[module] = value
+        return value
+
+    def _star_postorder(self, modules: Set[str]) -> List[str]:
+        """Order modules so star sources come before their importers where possible."""
+        order: List[str] = []
+        visited: Set[str] = set()
+        for root in sorted(modules):
+            if root in visited:
+                continue
+            visited.add(root)
+            stack = [(root, iter(sorted(self._star_edges.get(root, ()))))]
+            while stack:
+                module, sources = stack[-1]
+                for src in sources:
+                    if src in modules and src not in visited:
+                        visited.add(src)
+                        stack.append((src, iter(sorted(self._star_edges.get(src, ())))))
+                        break
+                else:
+                    stack.pop()
+                    order.append(module)
+        return order
+
+    def _solve_stars(self) -> None:
+        """Re-solve star export sets for dirty modules and everything that sees them.
+
+        Affected modules restart from the empty set (so names removed inside a
+        cycle do not keep each other alive) and a worklist re-evaluates a
+        module only when one of its sources changed. Packages whose set ends up
+        different are invalidated.
+        """
+        if not self._star_dirty:
+            return
+        affected: Set[str] = set()
+        stack = list(self._star_dirty)
+        self._star_dirty = set()
+        while stack:
+            module = stack.pop()
+            if module not in affected:
+                affected.add(module)
+                stack.extend(self._star_importers.get(module, ()))
+        previous = {module: self._star_exports.pop(module, None) for module in affected}
+
+        # Modules without star imports are leaves, evaluated on first use
+        queue = deque(m for m in self._star_postorder(affected) if m in self._star_edges)
+        queued = set(queue)
+        while queue:
+            module = queue.popleft()
+            queued.discard(module)
+            value = self._star_namespace(module)
+            if value != self._star_exports.get(module):
+                self._star_exports[module] = value
+                for importer in self._star_importers.get(module, ()):
+                    if importer not in queued:
+                        queued.add(importer)
+                        queue.append(importer)
+        for module in affected:
+            if self._star_exports.get(module) != previous[module]:
+                self._invalidate_package(module)
+
+    # -- Pass 2 -----------------------------------------------------------
+
+    def _definition(self, full: str) -> Optional[ToolRecord]:
+        """The effective definition of a dotted name: the last file wins."""
+        contributors = self._defs.get(full)
+        if not contributors:
+            return None
+        rel = max(contributors, key=lambda r: self._files[r].key)
+        return contributors[rel][1]
+
+    def _under(self, pkg: str) -> List[str]:
+        """Definitions under ``pkg.`` in the order they were first discovered."""
+        found = self._under_memo.get(pkg)
+        if found is None:
+            # '/' sorts right after '.', bounding the run of 'pkg.' names
+            lo = bisect.bisect_left(self._sorted_fulls, f"{pkg}.")
+            hi = bisect.bisect_left(self._sorted_fulls, f"{pkg}/", lo)
+            found = sorted(
+                self._sorted_fulls[lo:hi],
+                key=lambda full: min(pos for pos, _ in self._defs[full].values()),
+            )
+            self._under_memo[pkg] = found
+        return found
+
+    def _exports_for(self, pkg: str) -> Dict[str, str]:
+        """Return mapping export_name -> origin.full.dotted for a package.
+
+        Preference order:
+        - Explicit 'from X import name as alias' collected for the package,
+          plus names bound by its 'from X import *' imports
+        - If none, infer from available definitions within the package tree,
+          optionally restricting to names present in __all__
+        - As a last resort, consider the top-level package scope
+
+        Where multiple candidates exist, a simple score prefers modules whose
+        leaf name best matches the function name (e.g., '....<name>' > '...._<name>').
+        """
+        mapping = self._mappings.get(pkg)
+        if mapping is not None:
+            return mapping
+        mapping = self._merged(self._pkg_exports, pkg)
+        if self._has_init_stars(pkg):
+            self._solve_stars()
+            for name, origin in self._star_value(pkg).items():
+                # The package's own definitions are direct records already
+                if name not in mapping and origin != f"{pkg}.{name}":
+                    mapping[name] = origin
+        if not mapping:
+            preferred_names = self._merged_all(pkg)
+            self._prefix_watchers.setdefault(pkg, set()).add(pkg)
+            candidates = self._under(pkg)
+            if not candidates:
+                # fallback to top-level package scope
+                top = pkg.split(".")[0]
+                self._prefix_watchers.setdefault(top, set()).add(pkg)
+                candidates = self._under(top)
+            for full in candidates:
+                name = full.split(".")[-1]
+                if preferred_names and name not in preferred_names:
+                    continue
+                prev = mapping.get(name)
+                if prev is None or _score(full, name) > _score(prev, name):
+                    mapping[name] = full
+        self._mappings[pkg] = mapping
+        return mapping
+
+    def _reexported(self, full: str) -> Optional[str]:
+        """Where a module that re-exports ``full``'s name takes it from, if it does."""
+        module, _, name = full.rpartition(".")
+        if module in self._pkg_exports or self._has_init_stars(module):
+            return self._exports_for(module).get(name)
+        if module in self._star_edges:
+            self._solve_stars()
+            return self._star_value(module).get(name)
+        return None
+
+    def _resolve_origin(self, origin: str) -> Tuple[Optional[str], Tuple[str, ...]]:
+        """Follow re-export hops from origin to a definition.
+
+        Returns the definition's dotted name (None if the chain leaves the
+        repository or loops) and every name traversed. Results are memoized
+        for each name on the path, so shared chain tails are walked once; the
+        memo is dropped whenever a definition or re-export mapping changes.
+        """
+        path: List[str] = []
+        on_path: Set[str] = set()
+        current: Optional[str] = origin
+        canonical: Optional[str] = None
+        tail: Tuple[str, ...] = ()
+        while current is not None:
+            memo = self._canonical.get(current)
+            if memo is not None:
+                canonical, tail = memo
+                break
+            if current in on_path:
+                break
+            path.append(current)
+            on_path.add(current)
+            if self._definition(current) is not None:
+                canonical = current
+                break
+            current = self._reexported(current)
+        # Path compression: every name on the path now points at the result
+        for i, full in enumerate(path):
+            self._canonical[full] = (canonical, tuple(path[i:]) + tail)
+        return canonical, tuple(path) + tail
+
+    def _build_emitter_records(self, key: Tuple[str, ...]) -> Iterator[Dict[str, Any]]:
+        emitter = self._emitters[key]
+        for export_name, origin in self._exports_for(emitter.source_pkg).items():
+            canonical, traversed = self._resolve_origin(origin)
+            for full in traversed:
+                emitter.origins.add(full)
+                self._origin_users.setdefault(full, set()).add(key)
+                if full != canonical:
+                    hop = full.rpartition(".")[0]
+                    emitter.hops.add(hop)
+                    self._hop_users.setdefault(hop, set()).add(key)
+            src = self._definition(canonical) if canonical is not None else None
+            if src is None:
+                continue
+            # Carries over signature and first-line doc from the origin definition
+            record = ToolRecord(
+                id=f"{emitter.public_module}:{export_name}",
+                module=emitter.public_module,
+                name=export_name,
+                signature=src.signature,
+                doc_first_line=src.doc_first_line,
+                file=src.file,
+                lineno=src.lineno,
+                origin_id=src.id,
+                kind=src.kind,
+                parent_id=None,
+            ).to_dict()
+            yield record
+            if src.kind == "class":
+                # A re-exported class brings its members along
+                cls = self._files[src.file].classes[canonical]
+                yield from _member_records(cls, record, src.file, src.id)
+
+    def _emitter_rows(self, key: Tuple[str, ...]) -> range:
+        emitter = self._emitters[key]
+        if emitter.rows is None:
+            start = len(self._store)
+            self._store.extend(self._build_emitter_records(key))
+            emitter.rows = range(start, len(self._store))
+        return emitter.rows
+
+    def _emitter_records(self, key: Tuple[str, ...]) -> Iterable[Dict[str, Any]]:
+        if not self._keep_records and self._emitters[key].rows is None:
+            return self._build_emitter_records(key)
+        return map(self._store.record, self._emitter_rows(key))
+
+    def _build_file_records(self, rel: str, state: _FileState) -> Iterator[Dict[str, Any]]:
+        for d, top in zip(state.summary.defs, state.tops):
+            record = top.to_dict()
+            yield record
+            if d.kind == "class":
+                yield from _member_records(d, record, rel, top.id)
+
+    def _file_rows(self, rel: str) -> range:
+        state = self._files.get(rel)
+        if state is None:
+            return range(0)
+        if state.rows is None:
+            start = len(self._store)
+            self._store.extend(self._build_file_records(rel, state))
+            state.rows = range(start, len(self._store))
+        return state.rows
+
+    def _public(
+        self, emitted: Callable[[Tuple[str, ...]], Iterable[T]], view: Callable[[T], Tuple[str, Optional[str], str]]
+    ) -> Iterator[T]:
+        """Emitted rows or records that make it into public_records; view gives their (id, parent_id, kind)."""
+        self._solve_stars()
+        seen: Set[str] = set()
+        dropped: Set[str] = set()
+        # ('alias', ...) keys sort after ('pkg', ...) keys
+        for key in sorted(self._emitters, key=lambda k: (k[0] != "pkg", k[1:])):
+            for item in emitted(key):
+                rec_id, parent_id, kind = view(item)
+                if rec_id in self._direct_ids or rec_id in seen or parent_id in dropped:
+                    if kind == "class":
+                        dropped.add(rec_id)
+                    continue
+                seen.add(rec_id)
+                yield item
+
+    def _row_view(self, row: int) -> Tuple[str, Optional[str], str]:
+        return self._store.tool_id(row), self._store.parent_id(row), self._store.kind(row)
+
+    @property
+    def store(self) -> ToolStore:
+        """The store holding every record handed out; replaced when an update compacts it."""
+        return self._store
+
+    def rows(self) -> Iterator[int]:
+        """Rows in ``store`` of records(), valid until the next update or removal."""
+        for _, rel in self._file_order:
+            yield from self._file_rows(rel)
+        yield from self._public(self._emitter_rows, self._row_view)
+
+    def file_records(self, rel: str) -> Iterator[Dict[str, Any]]:
+        """Direct records of one file: definitions in source order, members after their class."""
+        state = self._files.get(rel)
+        if not self._keep_records and state is not None and state.rows is None:
+            return self._build_file_records(rel, state)
+        return map(self._store.record, self._file_rows(rel))
+
+    def direct_records(self) -> Iterator[Dict[str, Any]]:
+        """Records for definitions themselves, in discovery order."""
+        for _, rel in self._file_order:
+            yield from self.file_records(rel)
+
+    def public_records(self) -> Iterator[Dict[str, Any]]:
+        """Records for names exposed by packages and aliased subpackages.
+
+        Package exports come before aliased subpackages; ids already used by a
+        direct definition or an earlier public record are skipped, and so are
+        the members of a class record that was skipped.
+        """
+        return self._public(self._emitter_records, operator.itemgetter("id", "parent_id", "kind"))
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """All records: direct definitions, then synthesized public API records."""
+        return map(self._store.record, self.rows())
+
+    # -- call graph -------------------------------------------------------
+
+    def _tool_for(self, full: str) -> Optional[str]:
+        """Id of the definition or class member a dotted name refers to, following re-exports."""
+        canonical, _ = self._resolve_origin(full)
+        if canonical is not None:
+            return self._definition(canonical).id
+        owner, _, member = full.rpartition(".")
+        if not owner:
+            return None
+        canonical, _ = self._resolve_origin(owner)
+        if canonical is None:
+            return None
+        src = self._definition(canonical)
+        cls = self._files[src.file].classes.get(canonical)
+        if cls is not None and any(m.name == member for m in cls.members):
+            return f"{src.id}.{member}"
+        return None
+
+    def _call_target(self, state: _FileState, call: str) -> Optional[str]:
+        """Resolve a name called in a file: relative imports, then its module, star imports, absolute names."""
+        if call.startswith("."):
+            name = call.lstrip(".")
+            base = _star_base(state.module, state.is_init)
+            return self._tool_for(_resolve_relative_module(base, name, len(call) - len(name)))
+        target = self._tool_for(f"{state.module}.{call}")
+        if target is None and state.module in self._star_edges:
+            root, dot, rest = call.partition(".")
+            origin = self._star_value(state.module).get(root)
+            if origin is not None:
+                target = self._tool_for(origin + dot + rest)
+        if target is None and "." in call:
+            target = self._tool_for(call)
+        return target
+
+    def _call_targets(self, state: _FileState, caller: str, calls: List[str]) -> List[str]:
+        targets: Dict[str, None] = {}
+        for call in calls:
+            target = self._call_target(state, call)
+            if target is not None and target != caller:
+                targets[target] = None
+        return list(targets)
+
+    def call_graph(self) -> Dict[str, List[str]]:
+        """Definition id -> ids of the definitions in the index its body calls.
+
+        Built from the names in DefinitionSummary.calls, resolved in the
+        module that makes the call and through re-exports, so a call to
+        ``pkg.run`` leads to the function ``pkg.core:run`` it re-exports.
+        Methods and classes are targets too (``self.fit()`` or
+        ``Model()``). Every direct definition and class member is a key, in
+        discovery order; targets are listed in order of first call, without
+        the definition itself.
+        """
+        self._solve_stars()
+        graph: Dict[str, List[str]] = {}
+        for _, rel in self._file_order:
+            state = self._files[rel]
+            for d, top in zip(state.summary.defs, state.tops):
+                graph[top.id] = self._call_targets(state, top.id, d.calls)
+                for m in d.members:
+                    member_id = f"{top.id}.{m.name}"
+                    graph[member_id] = self._call_targets(state, member_id, m.calls)
+        return graph
+
+
+def _with_calls(index: ToolIndex) -> Iterator[Dict[str, Any]]:
+    """index.records() with the ``calls`` and ``centrality`` of the definition each exposes."""
+    graph = index.call_graph()
+    scores = centrality(graph)
+    for record in index.records():
+        origin = record["origin_id"]
+        yield {**record, "calls": graph.get(origin, []), "centrality": scores.get(origin, 0.0)}
+
+
+def _synthesize_tools(
+    summaries: Iterable[Tuple[str, Optional[FileSummary]]], stats: ExtractionStats, call_graph: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """Merge per-file summaries and yield direct and public API records.
+
+    ``summaries`` are (repo-relative posix path, summary-or-None) pairs in
+    discovery order; None marks a file that could not be read or parsed. Direct
+    records are yielded as each file is merged, public records once every file
+    has been seen. A ``.py`` file is held back until the next pair shows
+    whether a stub replaces it (stubs directly follow their implementation).
+    Time spent here, but not in producing ``summaries`` or consuming the
+    records, is charged to the "synthesis" phase of ``stats``.
+
+    With ``call_graph`` (summaries with calls), records are held back until
+    every file is merged and then come with two more keys: ``calls``, the ids
+    of the definitions the exposed definition calls (ToolIndex.call_graph),
+    and its ``centrality`` in that graph (callgraph.centrality).
+    """
+    clock = PhaseClock(stats.phases)
+    index = ToolIndex(keep_records=False)
+    if call_graph:
+        for rel_file, summary in summaries:
+            stats.files_scanned += 1
+            if summary is None:
+                stats.files_skipped += 1
+                continue
+            clock.start()
+            index.update(rel_file, summary)
+            clock.lap("synthesis")
+        yield from clock.timed(_with_calls(index), "synthesis")
+        return
+    held: Optional[str] = None
+    for rel_file, summary in summaries:
+        stats.files_scanned += 1
+        if held is not None and (summary is None or rel_file != held + "i"):
+            yield from clock.timed(index.file_records(held), "synthesis")
+        held = None
+        if summary is None:
+            stats.files_skipped += 1
+            continue
+        clock.start()
+        index.update(rel_file, summary)
+        clock.lap("synthesis")
+        if rel_file.endswith(".pyi"):
+            yield from clock.timed(index.file_records(rel_file), "synthesis")
+        else:
+            held = rel_file
+    if held is not None:
+        yield from clock.timed(index.file_records(held), "synthesis")
+    yield from clock.timed(index.public_records(), "synthesis")
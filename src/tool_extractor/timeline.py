@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .cache import BlobCache, ContentKey
+from .extractor import _resolve_workers, summarize_contents
+from .gitrev import CatFile, TreeEntry, _content_key, _git, list_python_blobs, resolve_tree
+from .guards import content_skip_reason
+from .models import ExtractionStats
+from .output import write_summary
+from .synthesis import ToolIndex
+from .watch import _JsonCatalogWriter
+
+
+def resolve_tags(repo_root: Path, tags: List[str], pattern: Optional[str] = None) -> List[str]:
+    """The explicit ``tags`` in the given order, then tags matching ``pattern`` oldest first.
+
+    Duplicates are dropped; ValueError if a name does not resolve to a tree.
+    """
+    names = list(tags)
+    if pattern is not None:
+        listed = _git(repo_root, "tag", "--list", pattern, "--sort=creatordate").decode("utf-8").split()
+        names.extend(listed)
+    names = list(dict.fromkeys(names))
+    for name in names:
+        resolve_tree(repo_root, name)
+    return names
+
+
+def _diff(previous: Dict[str, Dict[str, Any]], current: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Added, removed and signature-changed tool ids between two catalogs keyed by id."""
+    changed = []
+    for tool_id in sorted(current.keys() & previous.keys()):
+        before, after = previous[tool_id], current[tool_id]
+        # ToolIndex hands out the same dict until a record's inputs change
+        if before is not after and before["signature"] != after["signature"]:
+            changed.append({"id": tool_id, "before": before["signature"], "after": after["signature"]})
+    return {
+        "added": sorted(current.keys() - previous.keys()),
+        "removed": sorted(previous.keys() - current.keys()),
+        "signature_changed": changed,
+    }
+
+
+def build_timeline(
+    repo_path: str,
+    tags: List[str],
+    out_root: Path,
+    workers: Optional[int] = None,
+    cache_dir: Optional[Path] = None,
+    respect_gitignore: bool = False,
+    fast: bool = False,
+) -> Dict[str, Any]:
+    """Write a tool catalog per tag and return the API timeline between consecutive tags.
+
+    Every tag's tree is listed first and the union of their blobs is
+    summarized with each distinct blob parsed once (see
+    extractor.summarize_contents), so unchanged files cost nothing after the first
+    tag that has them. A single ToolIndex is then moved from tag to tag by
+    updating only the files whose blob differs from the previous tag, which
+    redoes Pass 2 only for the packages those files affect. Each catalog is
+    written to ``<out_root>/<tag>/tools.json`` with its tools_summary.txt,
+    where cache hits count files not parsed for that tag.
+    """
+    started = time.perf_counter()
+    repo_root = Path(repo_path)
+    cache = BlobCache(cache_dir, fast=fast) if cache_dir is not None else None
+    n_workers = _resolve_workers(workers)
+
+    with CatFile(repo_root) as cat:
+        trees: List[List[TreeEntry]] = [
+            list_python_blobs(repo_root, resolve_tree(repo_root, tag), cat, respect_gitignore) for tag in tags
+        ]
+        # The tag each distinct blob first appears in, and the name it is parsed under
+        first_seen: Dict[ContentKey, Tuple[str, str]] = {}
+        for tag, entries in zip(tags, trees):
+            for rel, blob, _ in entries:
+                first_seen.setdefault(_content_key(rel, blob), (tag, f"{tag}:{rel}"))
+        cached = {key for key in first_seen if cache is not None and key in cache}
+        summaries = summarize_contents(
+            cat.read, ((key, name) for key, (_, name) in first_seen.items()), n_workers, cache, fast
+        )
+        reasons = {key: content_skip_reason(cat.read(key[0])) for key, s in summaries.items() if s is None}
+    if cache is not None:
+        cache.save()
+
+    index = ToolIndex()
+    writer = _JsonCatalogWriter(out_root / tags[0] / "tools.json")
+    files: Dict[str, ContentKey] = {}
+    catalog: Dict[str, Dict[str, Any]] = {}
+    entries_report: List[Dict[str, Any]] = []
+    changes: List[Dict[str, Any]] = []
+    for i, (tag, entries) in enumerate(zip(tags, trees)):
+        current = {rel: _content_key(rel, blob) for rel, blob, _ in entries}
+        for rel in files.keys() - current.keys():
+            index.remove(rel)
+        changed_files = [rel for rel, key in current.items() if files.get(rel) != key]
+        for rel in changed_files:
+            index.update(rel, summaries[current[rel]])
+        files = current
+
+        rows = list(index.rows())
+        out_path = out_root / tag / "tools.json"
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        writer.write(index.store, rows, out_path)
+        stats = ExtractionStats(files_scanned=len(entries))
+        for key in current.values():
+            if key in reasons:
+                stats.files_skipped += 1
+                stats.count_skip(reasons[key])
+        in_tag: Set[ContentKey] = set()
+        for rel, blob, size in entries:
+            if current[rel] in in_tag:
+                stats.files_deduplicated += 1
+                stats.bytes_deduplicated += size
+            in_tag.add(current[rel])
+        stats.cache_misses = sum(
+            1 for key in set(current.values()) if first_seen[key][0] == tag and key not in cached
+        )
+        stats.cache_hits = len(entries) - stats.cache_misses
+        write_summary(out_path.parent / "tools_summary.txt", stats, len(rows), True, out_path)
+
+        previous, catalog = catalog, {r["id"]: r for r in map(index.store.record, rows)}
+        entries_report.append({
+            "tag": tag,
+            "files": len(entries),
+            "files_changed": len(changed_files),
+            "tools": len(rows),
+            "catalog": str(out_path),
+        })
+        if i:
+            changes.append({"from": tags[i - 1], "to": tag, **_diff(previous, catalog)})
+
+    return {
+        "repo": str(repo_root),
+        "tags": entries_report,
+        "changes": changes,
+        "blobs_parsed": len(first_seen) - len(cached),
+        "blobs_cached": len(cached),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tool_extractor timeline",
+        description="Extract a tool catalog per git tag and the API changes between consecutive tags",
+    )
+    parser.add_argument("--repo", required=True, help="Path to the git repository (or a subdirectory of it)")
+    parser.add_argument("--tags", nargs="*", default=[], help="Tags (or any revisions) in timeline order")
+    parser.add_argument(
+        "--tag-pattern",
+        default=None,
+        help="Also include every tag matching this glob (e.g. 'v*'), oldest first",
+    )
+    parser.add_argument(
+        "--out-root",
+        default="artifacts/timeline",
+        help="Catalogs go to <out-root>/<tag>/tools.json, the timeline to <out-root>/timeline.json",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes parsing blobs (default: 1; 0 uses all CPUs)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for the blob summary cache (default: <out-root>/.tool_cache)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the blob cache")
+    parser.add_argument(
+        "--respect-gitignore",
+        action="store_true",
+        help="Skip files ignored by the .gitignore files committed in each tag",
+    )
+    parser.add_argument("--fast", action="store_true", help="Parse only top-level statements (see --fast)")
+    args = parser.parse_args(argv)
+
+    repo_root = Path(args.repo)
+    if not repo_root.is_dir():
+        print(f"Error: --repo '{repo_root}' is not a directory or not accessible.")
+        return 2
+    if args.workers < 0:
+        print(f"Error: --workers must be >= 0, got {args.workers}.")
+        return 2
+    try:
+        tags = resolve_tags(repo_root, args.tags, args.tag_pattern)
+    except ValueError as exc:
+        print(f"Error: {exc}")
+        return 2
+    if not tags:
+        print("Error: no tags given or matched.")
+        return 2
+
+    out_root = Path(args.out_root)
+    cache_dir: Optional[Path] = None
+    if not args.no_cache:
+        cache_dir = Path(args.cache_dir) if args.cache_dir else out_root / ".tool_cache"
+    timeline = build_timeline(
+        str(repo_root),
+        tags,
+        out_root,
+        workers=args.workers,
+        cache_dir=cache_dir,
+        respect_gitignore=args.respect_gitignore,
+        fast=args.fast,
+    )
+    out_root.mkdir(parents=True, exist_ok=True)
+    with (out_root / "timeline.json").open("w", encoding="utf-8") as f:
+        json.dump(timeline, f, ensure_ascii=False, indent=2)
+
+    for change in timeline["changes"]:
+        print(
+            f"{change['from']} -> {change['to']}: +{len(change['added'])} -{len(change['removed'])} "
+            f"~{len(change['signature_changed'])}"
+        )
+    print(
+        f"{len(tags)} tags, {timeline['blobs_parsed']} blobs parsed, {timeline['blobs_cached']} cached, "
+        f"in {timeline['seconds']}s; timeline written to {out_root / 'timeline.json'}"
+    )
+    return 0
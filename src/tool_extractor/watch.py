@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cache import SummaryCache
+from .extractor import _iter_file_summaries, _resolve_workers, _summarize_guarded
+from .filesystem import discover_python_files
+from .guards import ParseLimits
+from .models import ExtractionStats
+from .output import write_summary
+from .store import ToolStore
+from .synthesis import ToolIndex
+
+
+Snapshot = Dict[str, Tuple[int, int]]  # rel path -> (mtime_ns, size)
+
+
+def _snapshot(repo_root: Path, respect_gitignore: bool, include_stubs: bool = False) -> Snapshot:
+    """Stat every discoverable file; the poll-based change detector's view."""
+    snap: Snapshot = {}
+    for path in discover_python_files(repo_root, respect_gitignore=respect_gitignore, include_stubs=include_stubs):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        snap[path.relative_to(repo_root).as_posix()] = (st.st_mtime_ns, st.st_size)
+    return snap
+
+
+class _JsonCatalogWriter:
+    """Atomically rewrites tools.json, re-serializing only new records.
+
+    ToolIndex keeps a record at the same row of its store until the record's
+    inputs change, so each row's JSON fragment is cached until the index
+    compacts into a new store. A rewrite is a sort plus a join of cached
+    fragments; the output is byte-identical to ``json.dump(sorted_records, f,
+    ensure_ascii=False, indent=2)``. ``write`` can target another path, so
+    catalogs of related trees share the cache.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._store: Optional[ToolStore] = None
+        self._fragments: Dict[int, str] = {}
+
+    def _fragment(self, store: ToolStore, row: int) -> str:
+        text = self._fragments.get(row)
+        if text is None:
+            text = json.dumps(store.record(row), ensure_ascii=False, indent=2).replace("\n", "\n  ")
+            self._fragments[row] = text
+        return text
+
+    def write(self, store: ToolStore, rows: List[int], path: Optional[Path] = None) -> None:
+        """Write the records at ``rows`` of ``store`` (ToolIndex.rows) in catalog order."""
+        if store is not self._store:
+            self._store, self._fragments = store, {}
+        fragments = [self._fragment(store, row) for row in store.sorted_rows(rows)]
+        # Drop fragments of rows that went stale
+        live = set(rows)
+        for key in [k for k in self._fragments if k not in live]:
+            del self._fragments[key]
+        text = "[\n  " + ",\n  ".join(fragments) + "\n]" if fragments else "[]"
+        path = path or self.path
+        tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def watch_tools(
+    repo_path: str,
+    out_path: Path,
+    interval: float = 1.0,
+    workers: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+    respect_gitignore: bool = False,
+    stop: Optional[threading.Event] = None,
+    on_update: Optional[Callable[[Dict[str, Any]], None]] = None,
+    fast: bool = False,
+    prefer_stubs: bool = False,
+    limits: Optional[ParseLimits] = None,
+) -> None:
+    """Keep ``out_path`` (tools.json) up to date while files under repo_path change.
+
+    The initial extraction is a normal run (optionally parallel and cached).
+    Afterwards the per-file summaries live in a ToolIndex; every ``interval``
+    seconds the tree is polled for added, modified and removed files, only
+    those are re-parsed, Pass 2 is redone only for the packages they affect,
+    and tools.json plus tools_summary.txt are rewritten atomically. Runs until
+    ``stop`` is set (or KeyboardInterrupt). ``on_update`` receives a dict with
+    the counts of each update, including the initial one. ``fast`` selects
+    the top-level scanner for every parse and ``prefer_stubs`` makes ``.pyi``
+    stubs authoritative over their implementation (see iter_tools). ``limits``
+    guard every parse, the initial ones and those of changed files alike.
+    """
+    repo_root = Path(repo_path)
+    summary_path = out_path.parent / "tools_summary.txt"
+    writer = _JsonCatalogWriter(out_path)
+    index = ToolIndex()
+    limits = limits or ParseLimits()
+    skipped: Dict[str, str] = {}  # rel -> skip reason
+    # Deduplication only happens in the initial extraction; its counts stay
+    initial = ExtractionStats()
+    stop = stop or threading.Event()
+
+    def _publish(changed: int, added: int, removed: int, started: float) -> None:
+        rows = list(index.rows())
+        writer.write(index.store, rows)
+        stats = ExtractionStats(
+            files_scanned=len(snapshot),
+            files_skipped=len(skipped),
+            files_deduplicated=initial.files_deduplicated,
+            bytes_deduplicated=initial.bytes_deduplicated,
+        )
+        for reason in skipped.values():
+            stats.count_skip(reason)
+        if cache is not None:
+            stats.cache_hits, stats.cache_misses = cache.hits, cache.misses
+        write_summary(summary_path, stats, len(rows), cache is not None, out_path)
+        if on_update is not None:
+            on_update({
+                "changed": changed,
+                "added": added,
+                "removed": removed,
+                "tools": len(rows),
+                "seconds": round(time.perf_counter() - started, 4),
+            })
+
+    started = time.perf_counter()
+    snapshot = _snapshot(repo_root, respect_gitignore, prefer_stubs)
+    cache = SummaryCache(Path(cache_dir), repo_root, fast=fast) if cache_dir is not None else None
+    files = [repo_root / rel for rel in snapshot]
+    reasons: Dict[Path, str] = {}
+    for file, summary in _iter_file_summaries(files, _resolve_workers(workers), cache, fast, initial, limits, reasons):
+        rel = file.relative_to(repo_root).as_posix()
+        if summary is None:
+            skipped[rel] = reasons[file]
+        index.update(rel, summary)
+    if cache is not None:
+        cache.save()
+    _publish(0, len(snapshot), 0, started)
+
+    try:
+        while not stop.wait(interval):
+            current = _snapshot(repo_root, respect_gitignore, prefer_stubs)
+            if current == snapshot:
+                continue
+            started = time.perf_counter()
+            removed = [rel for rel in snapshot if rel not in current]
+            added = [rel for rel in current if rel not in snapshot]
+            changed = [rel for rel in current if rel in snapshot and current[rel] != snapshot[rel]]
+            snapshot = current
+            for rel in removed:
+                skipped.pop(rel, None)
+                index.remove(rel)
+            for rel in added + changed:
+                reason, summary = _summarize_guarded(repo_root / rel, fast, limits)
+                if reason is None:
+                    skipped.pop(rel, None)
+                else:
+                    skipped[rel] = reason
+                index.update(rel, summary)
+            _publish(len(changed), len(added), len(removed), started)
+    except KeyboardInterrupt:
+        pass
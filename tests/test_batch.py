@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from tool_extractor import batch
+from tool_extractor.batch import load_manifest, run_batch
+
+
+def _repo(root: Path, name: str) -> Path:
+    pkg = root / name / "pkg"
+    pkg.mkdir(parents=True)
+    (pkg / "__init__.py").write_text("from .core import run\n", encoding="utf-8")
+    (pkg / "core.py").write_text(f"def run(x):\n    '''Run {name}.'''\n    return x\n", encoding="utf-8")
+    return root / name
+
+
+_summarize_chunk = batch._summarize_chunk
+
+
+def _exploding_chunk(sources, fast=False):
+    """batch._summarize_chunk, raising for a chunk with boom.py (pickled by reference for the workers)."""
+    if any(name.endswith("boom.py") for _, name, _ in sources):
+        raise RuntimeError("worker exploded")
+    return _summarize_chunk(sources, fast)
+
+
+def test_manifest_rejects_shared_output(tmp_path: Path) -> None:
+    _repo(tmp_path / "a", "src")
+    _repo(tmp_path / "b", "src")
+    manifest = tmp_path / "repos.json"
+    manifest.write_text(json.dumps(["a/src", "b/src"]), encoding="utf-8")
+    with pytest.raises(ValueError, match="explicit"):
+        load_manifest(manifest, tmp_path / "out")
+
+    manifest.write_text(json.dumps(["a/src", "a/src"]), encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_manifest(manifest, tmp_path / "out")
+
+    manifest.write_text(json.dumps(["a/src", {"repo": "b/src", "out": "b.json"}]), encoding="utf-8")
+    assert [out for _, out in load_manifest(manifest, tmp_path / "out")] == [
+        tmp_path / "out" / "src" / "tools.json",
+        tmp_path / "b.json",
+    ]
+
+
+def test_unwritable_output_fails_only_its_repo(tmp_path: Path) -> None:
+    good, bad = _repo(tmp_path, "good"), _repo(tmp_path, "bad")
+    blocker = tmp_path / "blocker"
+    blocker.write_text("", encoding="utf-8")
+    report = run_batch(
+        [(bad, blocker / "tools.json"), (good, tmp_path / "out" / "tools.json")], workers=1
+    )
+
+    bad_entry, good_entry = report["repos"]
+    assert bad_entry["error"].startswith("writing output failed")
+    assert "error" not in good_entry and good_entry["tools_found"] == 2
+    assert json.loads((tmp_path / "out" / "tools.json").read_text(encoding="utf-8"))[0]["id"] == "pkg:run"
+    assert report["totals"]["repos_failed"] == 1
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failing_parse_fails_only_its_repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, workers: int) -> None:
+    good, bad = _repo(tmp_path, "good"), _repo(tmp_path, "bad")
+    (bad / "pkg" / "boom.py").write_text("def boom():\n    pass\n", encoding="utf-8")
+    monkeypatch.setattr(batch, "_summarize_chunk", _exploding_chunk)
+    report = run_batch(
+        [(bad, tmp_path / "bad_out" / "tools.json"), (good, tmp_path / "good_out" / "tools.json")],
+        workers=workers,
+    )
+
+    bad_entry, good_entry = report["repos"]
+    assert bad_entry["error"] == "parse failed: RuntimeError: worker exploded"
+    assert not (tmp_path / "bad_out" / "tools.json").exists()
+    assert good_entry["tools_found"] == 2
+    assert (tmp_path / "good_out" / "tools.json").exists()
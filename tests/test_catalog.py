@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict
+
+from tool_extractor.catalog import ToolCatalog, write_sqlite
+
+
+def _record(tool_id: str, module: str, name: str) -> Dict[str, Any]:
+    return {
+        "id": tool_id,
+        "module": module,
+        "name": name,
+        "kind": "function",
+        "signature": "()",
+        "doc_first_line": "",
+        "file": "pkg/core.py",
+        "lineno": 1,
+        "origin_id": None,
+    }
+
+
+def test_resolve_keeps_the_last_match_like_the_json_map(tmp_path: Path) -> None:
+    path = tmp_path / "tools.db"
+    write_sqlite(
+        [
+            _record("pkg.core:run", "pkg.core", "run"),
+            _record("pkg:run", "pkg", "run"),
+            _record("pkg.core:run", "pkg.core", "run"),
+            _record("pkg.core:Box.open", "pkg.core", "Box.open"),
+            _record("pkg.Box:open", "pkg.Box", "open"),
+            _record("pkg.late:run", "pkg.core", "run"),
+        ],
+        path,
+    )
+    with ToolCatalog(path) as catalog:
+        assert catalog.resolve("pkg.core.run") == "pkg.late:run"
+        assert catalog.resolve("pkg.core:run") == "pkg.core:run"
+        assert catalog.resolve("pkg.run") == "pkg:run"
+        assert catalog.resolve("pkg.core.Box.open") == "pkg.core:Box.open"
+        assert catalog.resolve("pkg.Box.open") == "pkg.Box:open"
+        assert catalog.resolve("pkg.core.missing") is None
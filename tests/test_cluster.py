@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from tool_extractor.cluster import cluster_tools
+
+
+def _legacy_record(k: int) -> Dict[str, Any]:
+    # As written before records had kind, origin_id and parent_id
+    words = " ".join(f"word{w}" for w in range(2 * k, 2 * k + 6))
+    return {
+        "id": f"m{k}:run",
+        "module": f"m{k}",
+        "name": "run",
+        "signature": "def run()",
+        "doc_first_line": words,
+        "file": f"m{k}.py",
+        "lineno": 1,
+    }
+
+
+def test_chain_of_alike_tools_is_not_one_cluster() -> None:
+    # Neighbors in the chain share 5 of 9 features (Jaccard 0.56), tools two apart only 3 of 11
+    records = [_legacy_record(k) for k in range(5)]
+    result = cluster_tools([records], threshold=0.5, num_perm=64, bands=64)
+
+    clusters = [[m["id"] for m in c["members"]] for c in result["clusters"]]
+    assert clusters == [["m0:run", "m1:run", "m2:run"], ["m3:run", "m4:run"]]
+    assert result["counts"]["definitions"] == 5
+    assert result["counts"]["verified_pairs"] == 4
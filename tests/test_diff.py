@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+from tool_extractor.diff import diff_catalogs
+
+
+def _record(name: str, lineno: int, signature: str = "(x)") -> Dict[str, Any]:
+    return {
+        "id": f"pkg.core:{name}",
+        "module": "pkg.core",
+        "name": name,
+        "kind": "function",
+        "signature": signature,
+        "doc_first_line": "",
+        "file": "pkg/core.py",
+        "lineno": lineno,
+        "origin_id": None,
+    }
+
+
+def _write(path: Path, records: List[Dict[str, Any]]) -> Path:
+    path.write_text(json.dumps(records), encoding="utf-8")
+    return path
+
+
+def test_line_shift_is_relocated_not_changed(tmp_path: Path) -> None:
+    old = _write(tmp_path / "old.json", [_record("a", 1), _record("b", 5), _record("c", 9)])
+    new = _write(tmp_path / "new.json", [_record("a", 1), _record("b", 7), _record("c", 11, "(x, y)")])
+    result = diff_catalogs(old, new)
+
+    assert result["counts"]["unchanged"] == 1
+    assert result["relocated"] == [{"id": "pkg.core:b", "fields": {"lineno": [5, 7]}}]
+    assert result["changed"] == [
+        {"id": "pkg.core:c", "fields": {"signature": ["(x)", "(x, y)"], "lineno": [9, 11]}}
+    ]
+    assert result["counts"]["relocated"] == 1 and result["counts"]["changed"] == 1
+
+
+def test_baseline_without_newer_fields(tmp_path: Path) -> None:
+    legacy = _record("a", 1)
+    for field in ("kind", "origin_id"):
+        del legacy[field]
+    old = _write(tmp_path / "old.json", [legacy])
+    new = _write(tmp_path / "new.json", [_record("a", 1)])
+    result = diff_catalogs(old, new)
+
+    assert result["changed"] == [{"id": "pkg.core:a", "fields": {"kind": [None, "function"]}}]
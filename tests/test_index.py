@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import json
+import random
+from typing import Dict, List, Optional
+
+import pytest
+
+from tool_extractor.extractor import _summarize_source
+from tool_extractor.filesystem import is_package_init
+from tool_extractor.synthesis import ToolIndex
+
+# Versions a file takes during the replay; None is a file that does not parse
+_VERSIONS: Dict[str, List[Optional[str]]] = {
+    "pkg/__init__.py": [
+        "from .core import run\n",
+        "from .core import *\nfrom .mod import Box as Crate\n",
+        "__all__ = ['Box', 'leaf']\nfrom .mod import Box\nfrom .sub import leaf\n",
+        "",
+        None,
+    ],
+    "pkg/__init__.pyi": [
+        "from .core import run as run\n",
+        "from .mod import *\n",
+    ],
+    "pkg/core.py": [
+        "def run(x):\n    '''Run it.'''\n    return x\n",
+        "def run(x, y=2):\n    '''Run both.'''\n\n\ndef helper():\n    pass\n",
+        "from .mod import *\n\n\ndef run(x, *, fast=False):\n    return x\n",
+        None,
+    ],
+    "pkg/core.pyi": [
+        "def run(x: int) -> int: ...\n",
+        "def run(x: int, y: int = ...) -> int: ...\ndef extra() -> None: ...\n",
+    ],
+    "pkg/mod.py": [
+        "class Box:\n    '''A box.'''\n\n    def open(self, force=False):\n        '''Open it.'''\n",
+        "__all__ = ['Box', 'run']\nfrom .core import run\n\n\nclass Box:\n    def close(self):\n        pass\n",
+        "def run():\n    '''Shadowing run.'''\n",
+    ],
+    "pkg/mod.pyi": [
+        "class Box:\n    def open(self, force: bool = ...) -> None: ...\n",
+        None,
+    ],
+    "pkg/sub/__init__.py": [
+        "from ..core import run as go\n",
+        "from .leaf import *\n",
+        "from ..mod import Box\nfrom .leaf import leaf\n",
+    ],
+    "pkg/sub/leaf.py": [
+        "def leaf():\n    '''A leaf.'''\n",
+        "from ..mod import *\n\n\ndef leaf(depth=1):\n    pass\n",
+        "__all__ = ['leaf']\nfrom ..pkg import nothing\n\n\ndef leaf():\n    pass\n\n\ndef _hidden():\n    pass\n",
+    ],
+}
+
+
+def _summary(rel: str, text: Optional[str]):
+    if text is None:
+        return None
+    return _summarize_source(text, rel, is_package_init(rel))
+
+
+def _snapshot(index: ToolIndex) -> List[str]:
+    return sorted(json.dumps(record, sort_keys=True) for record in index.records())
+
+
+def _fresh(current: Dict[str, Optional[str]]) -> List[str]:
+    index = ToolIndex()
+    for rel in sorted(current, key=lambda r: tuple(r.split("/"))):
+        index.update(rel, _summary(rel, current[rel]))
+    return _snapshot(index)
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_incremental_updates_match_a_fresh_build(seed: int) -> None:
+    rng = random.Random(seed)
+    rels = sorted(_VERSIONS)
+    current: Dict[str, Optional[str]] = {}
+    index = ToolIndex(keep_records=seed % 2 == 0)
+    for step in range(60):
+        rel = rng.choice(rels)
+        if rel in current and rng.random() < 0.3:
+            del current[rel]
+            index.remove(rel)
+        else:
+            current[rel] = rng.choice(_VERSIONS[rel])
+            index.update(rel, _summary(rel, current[rel]))
+        if rng.random() < 0.5:
+            assert _snapshot(index) == _fresh(current), f"step {step}: {sorted(current)}"
+    assert _snapshot(index) == _fresh(current)
+
+
+def test_stub_hides_and_restores_implementation() -> None:
+    index = ToolIndex()
+    index.update("pkg/mod.py", _summary("pkg/mod.py", _VERSIONS["pkg/mod.py"][0]))
+    index.update("pkg/mod.pyi", _summary("pkg/mod.pyi", _VERSIONS["pkg/mod.pyi"][0]))
+    (box,) = [r for r in index.records() if r["id"] == "pkg.mod:Box.open"]
+    assert box["file"] == "pkg/mod.pyi"
+    assert box["signature"] == "def open(self, force: bool=...) -> None"
+    assert box["doc_first_line"] == "Open it."
+
+    index.remove("pkg/mod.pyi")
+    (box,) = [r for r in index.records() if r["id"] == "pkg.mod:Box.open"]
+    assert box["file"] == "pkg/mod.py"
+    assert _snapshot(index) == _fresh({"pkg/mod.py": _VERSIONS["pkg/mod.py"][0]})
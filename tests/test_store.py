@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import pytest
+
+from tool_extractor.store import ToolStore
+
+
+def _record(**extra):
+    record = {
+        "id": "pkg.core:run",
+        "module": "pkg.core",
+        "name": "run",
+        "signature": "def run(x)",
+        "doc_first_line": "",
+        "file": "pkg/core.py",
+        "lineno": 1,
+        "origin_id": "pkg.core:run",
+        "kind": "function",
+        "parent_id": None,
+    }
+    record.update(extra)
+    return record
+
+
+def test_records_round_trip() -> None:
+    records = [_record(), _record(id="pkg:run", module="pkg"), _record(calls=["pkg.core:run"], centrality=0.5)]
+    assert list(ToolStore.from_records(records)) == records
+
+
+def test_legacy_record_is_a_clear_error() -> None:
+    legacy = _record()
+    for field in ("kind", "origin_id", "parent_id"):
+        del legacy[field]
+    with pytest.raises(ValueError, match="kind, origin_id, parent_id"):
+        ToolStore.from_records([legacy])
+    with pytest.raises(ValueError, match="origin_id"):
+        ToolStore.from_records([{k: v for k, v in _record(calls=[], centrality=0.0).items() if k != "origin_id"}])